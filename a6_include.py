@@ -1,4 +1,18 @@
 
+import mmap
+import os
+import pickle
+import struct
+from array import array
+from bisect import bisect_left
+from functools import partial
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
 class DynamicArrayException(Exception):
     pass
 
@@ -7,26 +21,25 @@ class DynamicArray:
     """
     Class implementing a Dynamic Array
     Supported methods are:
-    append, pop, swap, get_at_index, set_at_index, length
+    append, extend, pop, swap, get_at_index, set_at_index, length, filled, data
     """
 
+    __slots__ = ('_data',)
+
     def __init__(self, arr=None) -> None:
-        """Initialize new dynamic array using a list."""
-        self._data = arr.copy() if arr else []
+        """Initialize new dynamic array with the elements of a list or any other iterable, copied."""
+        self._data = list(arr) if arr is not None else []
 
-    def __iter__(self):
-        """
-        Disable iterator capability for DynamicArray class
-        This means loops and aggregate functions like
-        those shown below won't work:
+    @classmethod
+    def filled(cls, length: int, value: object = None) -> "DynamicArray":
+        """Return a new dynamic array of the given length with every element set to value, built in one step."""
+        arr = cls()
+        arr._data = [value] * length
+        return arr
 
-        da = DynamicArray()
-        for value in da:        # will not work
-        min(da)                 # will not work
-        max(da)                 # will not work
-        sort(da)                # will not work
-        """
-        return None
+    def __iter__(self):
+        """Return an iterator over the elements, in index order."""
+        return iter(self._data)
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -36,6 +49,10 @@ class DynamicArray:
         """Add new element at the end of the array."""
         self._data.append(value)
 
+    def extend(self, values) -> None:
+        """Add every element of an iterable at the end of the array."""
+        self._data.extend(values)
+
     def pop(self):
         """Remove element from end of the array and return it."""
         return self._data.pop()
@@ -52,7 +69,12 @@ class DynamicArray:
 
     def __getitem__(self, index: int):
         """Return value of element at a given index using [] syntax."""
-        return self.get_at_index(index)
+        if index >= 0:
+            try:
+                return self._data[index]
+            except IndexError:
+                pass
+        raise DynamicArrayException
 
     def set_at_index(self, index: int, value: object) -> None:
         """Set value of element at a given index."""
@@ -62,12 +84,25 @@ class DynamicArray:
 
     def __setitem__(self, index: int, value: object) -> None:
         """Set value of element at a given index using [] syntax."""
-        self.set_at_index(index, value)
+        if index >= 0:
+            try:
+                self._data[index] = value
+                return
+            except IndexError:
+                pass
+        raise DynamicArrayException
 
     def length(self) -> int:
         """Return length of array."""
         return len(self._data)
 
+    def data(self) -> list:
+        """
+        Return the list holding the elements, not a copy. For internal loops that index it directly, without the bounds
+        check of get_at_index; such callers must keep their indexes in range themselves.
+        """
+        return self._data
+
 
 def hash_function_1(key: str) -> int:
     """Sample Hash function #1 to be used with HashMap implementation"""
@@ -87,6 +122,295 @@ def hash_function_2(key: str) -> int:
     return hash
 
 
+# Hash functions below produce unsigned 64-bit values
+MASK_64 = (1 << 64) - 1
+
+FNV_OFFSET_BASIS = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+
+
+def fnv1a_hash(key: str, seed: int = 0) -> int:
+    """
+    64-bit FNV-1a over the UTF-8 bytes of the key. A seed is folded into the offset basis; this varies the hash
+    between maps but, unlike siphash_hash, gives no protection against keys crafted to collide.
+    """
+    hash = (FNV_OFFSET_BASIS ^ seed) & MASK_64
+    for byte in key.encode('utf-8', 'surrogatepass'):
+        hash = ((hash ^ byte) * FNV_PRIME) & MASK_64
+    return hash
+
+
+def _rotate_left(value: int, bits: int) -> int:
+    """Rotate a 64-bit value left by the given number of bits."""
+    return ((value << bits) | (value >> (64 - bits))) & MASK_64
+
+
+def _sip_round(v0: int, v1: int, v2: int, v3: int) -> tuple:
+    """One SipRound over the four 64-bit state words."""
+    v0 = (v0 + v1) & MASK_64
+    v1 = _rotate_left(v1, 13) ^ v0
+    v0 = _rotate_left(v0, 32)
+    v2 = (v2 + v3) & MASK_64
+    v3 = _rotate_left(v3, 16) ^ v2
+    v0 = (v0 + v3) & MASK_64
+    v3 = _rotate_left(v3, 21) ^ v0
+    v2 = (v2 + v1) & MASK_64
+    v1 = _rotate_left(v1, 17) ^ v2
+    v2 = _rotate_left(v2, 32)
+    return v0, v1, v2, v3
+
+
+def siphash_hash(key: str, seed: int = 0) -> int:
+    """
+    SipHash-2-4 of the UTF-8 bytes of the key, keyed by the low 128 bits of the seed. Without knowing the seed, keys
+    can't be chosen so that they collide, so a random seed per map protects it from adversarial key sets.
+    """
+    k0 = seed & MASK_64
+    k1 = (seed >> 64) & MASK_64
+    v0 = k0 ^ 0x736f6d6570736575
+    v1 = k1 ^ 0x646f72616e646f6d
+    v2 = k0 ^ 0x6c7967656e657261
+    v3 = k1 ^ 0x7465646279746573
+
+    data = key.encode('utf-8', 'surrogatepass')
+    length = len(data)
+    end = length - length % 8
+
+    for index in range(0, end, 8):
+        word = int.from_bytes(data[index:index + 8], 'little')
+        v3 ^= word
+        v0, v1, v2, v3 = _sip_round(v0, v1, v2, v3)
+        v0, v1, v2, v3 = _sip_round(v0, v1, v2, v3)
+        v0 ^= word
+
+    word = ((length & 0xff) << 56) | int.from_bytes(data[end:], 'little')
+    v3 ^= word
+    v0, v1, v2, v3 = _sip_round(v0, v1, v2, v3)
+    v0, v1, v2, v3 = _sip_round(v0, v1, v2, v3)
+    v0 ^= word
+
+    v2 ^= 0xff
+    for _ in range(4):
+        v0, v1, v2, v3 = _sip_round(v0, v1, v2, v3)
+
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+def builtin_hash(key: str, seed: int = 0) -> int:
+    """
+    Python's built-in hash of the key (combined with the seed, if one is given), as an unsigned 64-bit value. This
+    is by far the fastest function here, but string hashes differ between interpreter runs unless PYTHONHASHSEED is
+    set, so the result must not be stored or shared with other processes.
+    """
+    if seed:
+        return hash((seed, key)) & MASK_64
+    return hash(key) & MASK_64
+
+
+# Every built-in hash function by name
+HASH_FUNCTIONS = {
+    'hash_function_1': hash_function_1,
+    'hash_function_2': hash_function_2,
+    'fnv1a_hash': fnv1a_hash,
+    'siphash_hash': siphash_hash,
+    'builtin_hash': builtin_hash,
+}
+
+# Hash functions that take a seed keyword argument
+KEYED_HASH_FUNCTIONS = (fnv1a_hash, siphash_hash, builtin_hash)
+
+
+def random_seed() -> int:
+    """Return a random 128-bit seed for a keyed hash function."""
+    return int.from_bytes(os.urandom(16), 'little')
+
+
+def seeded_hash(function, seed: int):
+    """
+    Return function with its seed fixed, for use as a HashMap hash function. Raise ValueError if the function does
+    not take a seed.
+    """
+    if function not in KEYED_HASH_FUNCTIONS:
+        raise ValueError(getattr(function, '__name__', repr(function)) + ' does not take a seed')
+    return partial(function, seed=seed)
+
+
+# Multipliers of the MurmurHash3 64-bit finalizer
+MIX_MULTIPLIER_1 = 0xff51afd7ed558ccd
+MIX_MULTIPLIER_2 = 0xc4ceb9fe1a85ec53
+
+
+def mix_hash(value: int) -> int:
+    """
+    Scramble the low 64 bits of a hash value with the MurmurHash3 finalizer, so that every input bit affects the
+    low bits of the result. A table whose capacity is a power of two only uses the low bits of each hash.
+    """
+    value &= MASK_64
+    value ^= value >> 33
+    value = (value * MIX_MULTIPLIER_1) & MASK_64
+    value ^= value >> 33
+    value = (value * MIX_MULTIPLIER_2) & MASK_64
+    return value ^ (value >> 33)
+
+
+# Hash functions whose low bits already depend on every byte of the key, so they gain nothing from mix_hash
+WELL_MIXED_HASH_FUNCTIONS = (fnv1a_hash, siphash_hash, builtin_hash)
+
+
+def needs_mixing(function) -> bool:
+    """
+    Return True unless function (or the function a seeded_hash was made from) is one of the well mixed hash functions.
+    """
+    if isinstance(function, partial):
+        function = function.func
+    return function not in WELL_MIXED_HASH_FUNCTIONS
+
+
+def _hash_and_mix(function, key: str) -> int:
+    """Hash the key with function and pass the result through mix_hash."""
+    return mix_hash(function(key))
+
+
+def base_hash_function(function):
+    """
+    Return the hash function that seeded_hash and mixed_hash built function from, or function itself.
+    """
+    while isinstance(function, partial):
+        function = function.args[0] if function.func is _hash_and_mix else function.func
+    return function
+
+
+def hash_function_name(function) -> str:
+    """
+    Return the name HASH_FUNCTIONS registers the base hash function of function under. Raise ValueError if it is not
+    registered, since it could not be found again when a saved map is loaded, or if it is builtin_hash, since string
+    hashes differ between processes and a loaded map would place its keys in the wrong buckets.
+    """
+    function = base_hash_function(function)
+    if function is builtin_hash:
+        raise ValueError('builtin_hash differs between processes, so a map hashed with it cannot be saved')
+
+    for name, registered in HASH_FUNCTIONS.items():
+        if registered is function:
+            return name
+    raise ValueError(getattr(function, '__name__', repr(function)) + ' is not in HASH_FUNCTIONS')
+
+
+def mixed_hash(function):
+    """
+    Return a hash function that passes the result of function through mix_hash, for use as a HashMap hash function
+    with a power-of-two capacity.
+    """
+    return partial(_hash_and_mix, function)
+
+
+# Keys are hashed in chunks so that one long key only widens the code point matrix of its own chunk
+BATCH_CHUNK_SIZE = 4096
+
+# Longest key hashed as part of a batch. Longer keys are hashed one at a time, so the code point matrix of a chunk
+# holds at most BATCH_CHUNK_SIZE x BATCH_MAX_KEY_LENGTH code points (16 MB) however long the keys are
+BATCH_MAX_KEY_LENGTH = 1024
+
+# Columns of the code point matrix widened to int64 at a time by batch_hash_function_2
+BATCH_COLUMN_BLOCK = 64
+
+
+def _code_point_matrix(keys):
+    """
+    Encode a list of strings as a zero padded (len(keys), longest key) matrix of uint32 code points. Padding
+    contributes 0 to both sample hash functions.
+    """
+    # A fixed width unicode array is stored as UTF-32, so it can be viewed directly as code points
+    encoded = numpy.array(keys, dtype=str)
+    width = encoded.dtype.itemsize // 4
+    if width == 0:
+        return numpy.zeros((len(keys), 1), dtype=numpy.uint32)
+    return encoded.view(numpy.uint32).reshape(len(keys), width)
+
+
+def _batch_hash_chunks(keys, function, hash_matrix) -> list:
+    """
+    Return [function(key) for key in keys]. The strings of at most BATCH_MAX_KEY_LENGTH characters in each chunk are
+    hashed together by hash_matrix from their code point matrix, and any other key by function.
+    """
+    keys = list(keys)
+    if numpy is None:
+        return [function(key) for key in keys]
+
+    hashes = []
+    for start in range(0, len(keys), BATCH_CHUNK_SIZE):
+        chunk = keys[start:start + BATCH_CHUNK_SIZE]
+        for key in chunk:
+            if type(key) is not str or len(key) > BATCH_MAX_KEY_LENGTH:
+                break
+        else:
+            hashes.extend(hash_matrix(_code_point_matrix(chunk)))
+            continue
+
+        # The chunk holds a long key or a key that isn't a string, so only its short strings are hashed together
+        batched = [type(key) is str and len(key) <= BATCH_MAX_KEY_LENGTH for key in chunk]
+        short_keys = [key for key, short in zip(chunk, batched) if short]
+        short_hashes = iter(hash_matrix(_code_point_matrix(short_keys)) if short_keys else ())
+        hashes.extend(next(short_hashes) if short else function(key) for key, short in zip(chunk, batched))
+    return hashes
+
+
+def _row_sums(matrix) -> list:
+    """
+    Return the sum of each row of a code point matrix, which is hash_function_1 of its key
+    """
+    return matrix.sum(axis=1, dtype=numpy.int64).tolist()
+
+
+def _weighted_row_sums(matrix) -> list:
+    """
+    Return the sum of each row of a code point matrix weighted by position 1, 2, 3, ..., which is hash_function_2 of
+    its key. The matrix is widened to int64 a block of columns at a time rather than copied whole.
+    """
+    hashes = numpy.zeros(matrix.shape[0], dtype=numpy.int64)
+    for start in range(0, matrix.shape[1], BATCH_COLUMN_BLOCK):
+        block = matrix[:, start:start + BATCH_COLUMN_BLOCK].astype(numpy.int64)
+        hashes += block @ numpy.arange(start + 1, start + block.shape[1] + 1, dtype=numpy.int64)
+    return hashes.tolist()
+
+
+def batch_hash_function_1(keys) -> list:
+    """
+    Return [hash_function_1(key) for key in keys], computed with NumPy as a row sum of the code point matrix when it
+    is available.
+    """
+    return _batch_hash_chunks(keys, hash_function_1, _row_sums)
+
+
+def batch_hash_function_2(keys) -> list:
+    """
+    Return [hash_function_2(key) for key in keys], computed with NumPy as the product of the code point matrix and
+    the position weights 1, 2, 3, ... when it is available.
+    """
+    return _batch_hash_chunks(keys, hash_function_2, _weighted_row_sums)
+
+
+# Batch versions of the scalar hash functions, used by batch_hash
+BATCH_HASH_FUNCTIONS = {
+    hash_function_1: batch_hash_function_1,
+    hash_function_2: batch_hash_function_2,
+}
+
+
+def batch_hash(function, keys) -> list:
+    """
+    Hash every key in keys with the given hash function and return the hashes as a list, using the registered batch
+    version of the function when there is one.
+    """
+    if isinstance(function, partial) and function.func is _hash_and_mix:
+        return [mix_hash(hash) for hash in batch_hash(function.args[0], keys)]
+
+    batch_function = BATCH_HASH_FUNCTIONS.get(function)
+    if batch_function is not None:
+        return batch_function(keys)
+    return [function(key) for key in keys]
+
+
 # --------- For use in Separate Chaining (SC) HashMap  --------- #
 
 class SLNode:
@@ -94,22 +418,43 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
+    __slots__ = ('key', 'value', 'next', 'hash')
+
+    def __init__(self, key: str, value: object, next: "SLNode" = None, hash: int = None) -> None:
+        """Initialize node given a key, value and the full hash of the key."""
         self.key = key
         self.value = value
         self.next = next
+        self.hash = hash
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
         return '(' + str(self.key) + ': ' + str(self.value) + ')'
 
 
+class CacheNode(SLNode):
+    """
+    Singly Linked List node that is also an entry of a cache's doubly linked eviction list
+    """
+
+    __slots__ = ('newer', 'older', 'frequency', 'expires')
+
+    def __init__(self, key: str, value: object, next: SLNode = None, hash: int = None) -> None:
+        """Initialize node given a key, value and the full hash of the key, not yet in any eviction list."""
+        super().__init__(key, value, next, hash)
+        self.newer = None
+        self.older = None
+        self.frequency = 1
+        self.expires = None
+
+
 class LinkedListIterator:
     """
     Separate iterator class for LinkedList
     """
 
+    __slots__ = ('_node',)
+
     def __init__(self, current_node: SLNode) -> None:
         """Initialize the iterator with a node."""
         self._node = current_node
@@ -132,9 +477,11 @@ class LinkedListIterator:
 class LinkedList:
     """
     Class implementing a Singly Linked List
-    Supported methods are: insert, remove, contains, length, iterator
+    Supported methods are: insert, remove, contains, find, move_to_front, transpose, length, iterator
     """
 
+    __slots__ = ('_head', '_size')
+
     def __init__(self) -> None:
         """
         Initialize new linked list;
@@ -159,20 +506,27 @@ class LinkedList:
         """Return an iterator for the list, starting at the head."""
         return LinkedListIterator(self._head)
 
-    def insert(self, key: str, value: object) -> None:
+    def insert(self, key: str, value: object, hash: int = None) -> None:
         """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
+        self._head = SLNode(key, value, self._head, hash)
         self._size += 1
 
-    def remove(self, key: str) -> bool:
+    def insert_node(self, node: SLNode) -> None:
+        """Link an existing node in at the front of the list."""
+        node.next = self._head
+        self._head = node
+        self._size += 1
+
+    def remove(self, key: str, hash: int = None) -> bool:
         """
         Remove first node with matching key.
+        If the full hash of the key is given, nodes with a different hash are skipped without comparing keys.
         Return True if removal was successful, False otherwise.
         """
         previous, node = None, self._head
         while node:
 
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 if previous:
                     previous.next = node.next
                 else:
@@ -183,28 +537,193 @@ class LinkedList:
             previous, node = node, node.next
         return False
 
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
+    def contains(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match
+        If the full hash of the key is given, nodes with a different hash are skipped without comparing keys.
+        """
         node = self._head
+        if hash is None:
+            while node:
+                if node.key == key:
+                    return node
+                node = node.next
+            return node
+
         while node:
-            if node.key == key:
+            if node.hash == hash and node.key == key:
                 return node
             node = node.next
         return node
 
+    # Lookup that leaves the list in order, even in a subclass whose contains reorders it
+    find = contains
+
+    def move_to_front(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match, first moving a matching node to the front of the list.
+        If the full hash of the key is given, nodes with a different hash are skipped without comparing keys.
+        """
+        node = self._head
+        if node is None or ((hash is None or node.hash == hash) and node.key == key):
+            return node
+
+        previous, node = node, node.next
+        if hash is None:
+            while node and node.key != key:
+                previous, node = node, node.next
+        else:
+            while node and (node.hash != hash or node.key != key):
+                previous, node = node, node.next
+
+        if node:
+            previous.next = node.next
+            node.next = self._head
+            self._head = node
+        return node
+
+    def transpose(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match, first swapping a matching node with the node before it.
+        If the full hash of the key is given, nodes with a different hash are skipped without comparing keys.
+        """
+        node = self._head
+        if node is None or ((hash is None or node.hash == hash) and node.key == key):
+            return node
+
+        before, previous, node = None, node, node.next
+        if hash is None:
+            while node and node.key != key:
+                before, previous, node = previous, node, node.next
+        else:
+            while node and (node.hash != hash or node.key != key):
+                before, previous, node = previous, node, node.next
+
+        if node:
+            previous.next = node.next
+            node.next = previous
+            if before:
+                before.next = node
+            else:
+                self._head = node
+        return node
+
     def length(self) -> int:
         """Return the length of the list."""
         return self._size
 
 
+class MoveToFrontList(LinkedList):
+    """
+    Singly Linked List whose contains moves the node it finds to the front of the list
+    """
+
+    __slots__ = ()
+
+    contains = LinkedList.move_to_front
+
+
+class TransposeList(LinkedList):
+    """
+    Singly Linked List whose contains moves the node it finds one place nearer the front of the list
+    """
+
+    __slots__ = ()
+
+    contains = LinkedList.transpose
+
+
+class SortedBucket:
+    """
+    Bucket holding the nodes of a long chain in a list sorted by (full hash, key), searched by bisection
+    Supported methods are those of LinkedList. Keys sharing a full hash must be comparable with each other.
+    """
+
+    __slots__ = ('_entries',)
+
+    def __init__(self, nodes=()) -> None:
+        """
+        Initialize the bucket with the given nodes, which must have distinct keys;
+        each entry is a (hash, key, node) tuple, so one list insert or delete keeps the bucket consistent.
+        """
+        self._entries = sorted((node.hash, node.key, node) for node in nodes)
+        for entry in self._entries:
+            entry[2].next = None
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return 'SB [' + ' -> '.join(str(entry[2]) for entry in self._entries) + ']'
+
+    def __iter__(self):
+        """Return an iterator over the nodes, in sorted order. Nodes may be removed while it runs."""
+        return iter([entry[2] for entry in self._entries])
+
+    def _index(self, key: str, hash: int = None) -> int:
+        """Return the index of the entry with matching key, or -1 if no match."""
+        entries = self._entries
+        if hash is None:
+            for index in range(len(entries)):
+                if entries[index][1] == key:
+                    return index
+            return -1
+
+        index = bisect_left(entries, (hash, key))
+        if index < len(entries) and entries[index][0] == hash and entries[index][1] == key:
+            return index
+        return -1
+
+    def insert(self, key: str, value: object, hash: int = None) -> None:
+        """Insert new node in sorted position. The key must not already be in the bucket."""
+        self.insert_node(SLNode(key, value, None, hash))
+
+    def insert_node(self, node: SLNode) -> None:
+        """Link an existing node in at its sorted position."""
+        node.next = None
+        entry = (node.hash, node.key, node)
+        self._entries.insert(bisect_left(self._entries, entry[:2]), entry)
+
+    def remove(self, key: str, hash: int = None) -> bool:
+        """
+        Remove node with matching key.
+        Return True if removal was successful, False otherwise.
+        """
+        index = self._index(key, hash)
+        if index < 0:
+            return False
+        del self._entries[index]
+        return True
+
+    def contains(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match
+        If the full hash of the key is not given, every node is compared.
+        """
+        index = self._index(key, hash)
+        if index < 0:
+            return None
+        return self._entries[index][2]
+
+    # The nodes stay in sorted order, so the self-adjusting lookups only find them
+    find = contains
+    move_to_front = contains
+    transpose = contains
+
+    def length(self) -> int:
+        """Return the number of nodes in the bucket."""
+        return len(self._entries)
+
+
 # ---------- For use in Open Addressing (OA) HashMap  ---------- #
 
 class HashEntry:
 
-    def __init__(self, key: str, value: object) -> None:
-        """Initialize an entry for use in a hash map."""
+    __slots__ = ('key', 'value', 'hash', 'is_tombstone')
+
+    def __init__(self, key: str, value: object, hash: int = None) -> None:
+        """Initialize an entry for use in a hash map, given the full hash of its key."""
         self.key = key
         self.value = value
+        self.hash = hash
 
         # Set this value to True when you "delete" a HashEntry
         self.is_tombstone = False
@@ -212,3 +731,122 @@ class HashEntry:
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
         return f"K: {self.key} V: {self.value} TS: {self.is_tombstone}"
+
+
+# ---------------- Snapshots of a HashMap on disk ---------------- #
+
+# Identifies a snapshot file, and the version of its layout
+SNAPSHOT_MAGIC = b'HMSNAP\x00\x01'
+
+# magic, map kind, capacity, entries, tombstones, hash function name, seed, whether the seed is used, whether the
+# capacity policy is power_of_two
+SNAPSHOT_HEADER = struct.Struct('<8s2sQQQ32s16s??')
+
+
+class Snapshot:
+    """
+    The layout of a HashMap as saved to disk: its kind ('sc', 'oa' or 'rh'), capacity, hash function and capacity
+    policy, and for every entry its full hash, its bucket index, its key and its value, plus the bucket indexes of any
+    tombstones. A map is rebuilt from it by placing each entry straight into its bucket, without hashing any key.
+
+    On disk the header is followed by the hashes, bucket indexes and tombstone indexes as arrays of unsigned 64-bit
+    integers, and then one pickle holding the list of keys and the list of values.
+    """
+
+    def __init__(self, kind: str, capacity: int, function_name: str, seed: int = None,
+                 power_of_two: bool = False) -> None:
+        """Initialize an empty snapshot of a map with the given layout and hash function."""
+        self.kind = kind
+        self.capacity = capacity
+        self.function_name = function_name
+        self.seed = seed
+        self.power_of_two = power_of_two
+        self.hashes = array('Q')
+        self.positions = array('Q')
+        self.tombstones = array('Q')
+        self.keys = []
+        self.values = []
+
+    def add(self, position: int, key_hash: int, key: str, value: object) -> None:
+        """Record an entry and the index of the bucket holding it."""
+        self.positions.append(position)
+        self.hashes.append(key_hash)
+        self.keys.append(key)
+        self.values.append(value)
+
+    def write(self, path: str) -> None:
+        """
+        Write the snapshot to path. It is written to a temporary file that is flushed to disk and then renamed over
+        path, so path always holds either the previous snapshot or the complete new one.
+        """
+        if self.seed is not None and not 0 <= self.seed < 1 << 128:
+            raise ValueError('only seeds of at most 128 bits can be saved')
+
+        header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, self.kind.encode('ascii'), self.capacity, len(self.keys),
+                                      len(self.tombstones), self.function_name.encode('ascii'),
+                                      (self.seed or 0).to_bytes(16, 'little'), self.seed is not None,
+                                      self.power_of_two)
+
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(header)
+            self.hashes.tofile(file)
+            self.positions.tofile(file)
+            self.tombstones.tofile(file)
+            pickle.dump((self.keys, self.values), file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary, path)
+
+    @classmethod
+    def read(cls, path: str) -> "Snapshot":
+        """
+        Read a snapshot written by write. The file is memory-mapped and each section is taken straight from the
+        mapping, rather than through a series of reads.
+        """
+        with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                magic, kind, capacity, count, tombstones, function_name, seed, seeded, power_of_two = \
+                    SNAPSHOT_HEADER.unpack_from(view, 0)
+
+                if magic != SNAPSHOT_MAGIC:
+                    raise ValueError(path + ' is not a HashMap snapshot')
+
+                snapshot = cls(kind.decode('ascii'), capacity, function_name.rstrip(b'\x00').decode('ascii'),
+                               int.from_bytes(seed, 'little') if seeded else None, power_of_two)
+
+                offset = SNAPSHOT_HEADER.size
+                for section, length in ((snapshot.hashes, count), (snapshot.positions, count),
+                                        (snapshot.tombstones, tombstones)):
+                    end = offset + length * section.itemsize
+                    section.frombytes(view[offset:end])
+                    offset = end
+
+                snapshot.keys, snapshot.values = pickle.loads(view[offset:])
+            finally:
+                view.release()
+
+        return snapshot
+
+    def map_options(self, **options) -> dict:
+        """
+        Return the hash function, seed and capacity policy of the saved map merged with options, as HashMap
+        constructors take them. An option may repeat a saved one, but raise ValueError if it differs, since the saved
+        entries are placed by the saved hash function, seed and capacity policy.
+        """
+        saved = {
+            'function': HASH_FUNCTIONS[self.function_name],
+            'seed': self.seed,
+            'capacity_policy': 'power_of_two' if self.power_of_two else 'prime',
+        }
+
+        for name, value in saved.items():
+            given = options.get(name, value)
+            if name == 'function':
+                given = base_hash_function(given)
+            if given != value:
+                raise ValueError(f'{name} {given!r} differs from the saved {name} {value!r}')
+
+        return {**options, **saved}
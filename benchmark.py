@@ -0,0 +1,686 @@
+"""
+Benchmark suite for the HashMap implementations.
+
+Runs every selected map against a set of reproducible workloads and reports
+throughput, latency percentiles, peak memory and resize counts. Results can be
+saved as a JSON baseline and compared against a previous run:
+
+    python benchmark.py --save baseline.json
+    python benchmark.py --compare baseline.json
+
+With --threaded, hash_map_concurrent.HashMap is instead run by reader and
+writer threads at once, for each --stripes setting, and the final contents
+are checked against a single-threaded replay of the writes:
+
+    python benchmark.py --threaded --readers 4 --writers 4 --stripes 1 16
+
+With --sharded, bulk put_many and get_many throughput of
+hash_map_sharded.HashMap is measured for each --shards setting:
+
+    python benchmark.py --sharded --shards 1 2 4 8 --size 1000000
+
+With --parallel-mode, hash_map_parallel.find_mode counts a generated file of
+--size Zipf-distributed lines with each --workers setting:
+
+    python benchmark.py --parallel-mode --workers 1 2 4 8 --size 5000000
+
+With --memory, the memory held by each selected map is measured after
+filling it with each --entries count, and by an empty table of that many
+buckets, and reported per entry and per bucket:
+
+    python benchmark.py --memory --maps sc oa --functions builtin_hash \
+        --entries 1000000 10000000
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from functools import partial
+
+import hash_map_compact
+import hash_map_concurrent
+import hash_map_oa
+import hash_map_parallel
+import hash_map_rh
+import hash_map_sc
+import hash_map_sharded
+from a6_include import HASH_FUNCTIONS
+
+
+MAPS = {
+    'sc': hash_map_sc.HashMap,
+    'oa': hash_map_oa.HashMap,
+    'compact': hash_map_compact.HashMap,
+    'rh': hash_map_rh.HashMap,
+    'sc_pow2': partial(hash_map_sc.HashMap, capacity_policy='power_of_two'),
+    'oa_pow2': partial(hash_map_oa.HashMap, capacity_policy='power_of_two'),
+    'sc_mtf': partial(hash_map_sc.HashMap, chain_policy='move_to_front'),
+    'sc_transpose': partial(hash_map_sc.HashMap, chain_policy='transpose'),
+    'sc_treeify': partial(hash_map_sc.HashMap, treeify=True),
+}
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+# Metrics where a larger value is an improvement; everything else is a cost
+HIGHER_IS_BETTER = ('ops_per_sec', 'puts_per_sec', 'gets_per_sec')
+
+
+# ------------------------------ Workloads ------------------------------ #
+
+class Workload:
+    """
+    A reproducible sequence of operations. The keys in `prefill` are inserted
+    before timing starts; `ops` holds (operation, key, value) tuples.
+    """
+
+    def __init__(self, name: str, prefill, ops) -> None:
+        """Initialize a workload from its prefill keys and operations."""
+        self.name = name
+        self.prefill = prefill
+        self.ops = ops
+
+
+def _keys(count: int, prefix: str = 'key') -> list:
+    """Return `count` distinct string keys."""
+    return [prefix + str(index) for index in range(count)]
+
+
+def insert_heavy(size: int, ops: int, rnd: random.Random) -> Workload:
+    """Insert fresh keys into an empty map, with an occasional overwrite."""
+    keys = _keys(ops)
+    sequence = []
+    for index, key in enumerate(keys):
+        if index and rnd.random() < 0.1:
+            key = keys[rnd.randrange(index)]
+        sequence.append(('put', key, index))
+    return Workload('insert_heavy', [], sequence)
+
+
+def read_heavy(size: int, ops: int, rnd: random.Random) -> Workload:
+    """Mostly hits and misses against a prefilled map, with 5% updates."""
+    keys = _keys(size)
+    sequence = []
+    for index in range(ops):
+        roll = rnd.random()
+        if roll < 0.05:
+            sequence.append(('put', rnd.choice(keys), index))
+        elif roll < 0.8:
+            sequence.append(('get', rnd.choice(keys), None))
+        else:
+            sequence.append(('get', 'miss' + str(index), None))
+    return Workload('read_heavy', keys, sequence)
+
+
+def mixed_delete(size: int, ops: int, rnd: random.Random) -> Workload:
+    """Churn workload: inserts, lookups and deletes over a fixed key space."""
+    keys = _keys(size * 2)
+    sequence = []
+    for index in range(ops):
+        key = rnd.choice(keys)
+        roll = rnd.random()
+        if roll < 0.35:
+            sequence.append(('put', key, index))
+        elif roll < 0.7:
+            sequence.append(('get', key, None))
+        else:
+            sequence.append(('remove', key, None))
+    return Workload('mixed_delete', keys[:size], sequence)
+
+
+def zipf(size: int, ops: int, rnd: random.Random, exponent: float = 1.1) -> Workload:
+    """Lookups and updates where key popularity follows a Zipf distribution."""
+    keys = _keys(size)
+    weights = [1.0 / (rank ** exponent) for rank in range(1, size + 1)]
+    drawn = rnd.choices(keys, weights=weights, k=ops)
+    sequence = []
+    for index, key in enumerate(drawn):
+        if rnd.random() < 0.1:
+            sequence.append(('put', key, index))
+        else:
+            sequence.append(('get', key, None))
+    return Workload('zipf', keys, sequence)
+
+
+def anagram(size: int, ops: int, rnd: random.Random) -> Workload:
+    """
+    Adversarial keys for hash_function_1: every key is a permutation of the
+    same letters, so they all share one hash value.
+    """
+    letters = 'abcdefghij'
+    count = min(ops, size)
+    keys = [''.join(p) for p in itertools.islice(itertools.permutations(letters), count)]
+    sequence = [('put', key, index) for index, key in enumerate(keys)]
+    sequence += [('get', rnd.choice(keys), None) for _ in range(ops - count)]
+    return Workload('anagram', [], sequence)
+
+
+WORKLOADS = {
+    'insert_heavy': insert_heavy,
+    'read_heavy': read_heavy,
+    'mixed_delete': mixed_delete,
+    'zipf': zipf,
+    'anagram': anagram,
+}
+
+
+# ------------------------------- Runner -------------------------------- #
+
+def _build(map_name: str, function, workload: Workload):
+    """Create a map, prefill it and attach a resize counter."""
+    hash_map = MAPS[map_name](11, function)
+    for index, key in enumerate(workload.prefill):
+        hash_map.put(key, index)
+
+    counter = [0]
+    resize_table = hash_map.resize_table
+
+    def counting_resize(new_capacity: int) -> None:
+        counter[0] += 1
+        resize_table(new_capacity)
+
+    hash_map.resize_table = counting_resize
+    return hash_map, counter
+
+
+def _replay(hash_map, ops) -> None:
+    """Apply a list of operations without timing them."""
+    for op, key, value in ops:
+        if op == 'put':
+            hash_map.put(key, value)
+        elif op == 'get':
+            hash_map.get(key)
+        else:
+            hash_map.remove(key)
+
+
+def _percentile(ordered: list, pct: float) -> float:
+    """Return the given percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[rank]
+
+
+def run_one(map_name: str, function, workload: Workload) -> dict:
+    """Run one workload against one map and return its metrics."""
+    hash_map, resizes = _build(map_name, function, workload)
+    put, get, remove = hash_map.put, hash_map.get, hash_map.remove
+    clock = time.perf_counter_ns
+    latencies = []
+    record = latencies.append
+
+    for op, key, value in workload.ops:
+        if op == 'put':
+            start = clock()
+            put(key, value)
+        elif op == 'get':
+            start = clock()
+            get(key)
+        else:
+            start = clock()
+            remove(key)
+        record(clock() - start)
+
+    elapsed = sum(latencies) / 1e9
+    latencies.sort()
+    result = {
+        'ops': len(latencies),
+        'ops_per_sec': round(len(latencies) / elapsed) if elapsed else 0,
+        'resizes': resizes[0],
+        'final_size': hash_map.get_size(),
+        'final_capacity': hash_map.get_capacity(),
+    }
+    for pct in PERCENTILES:
+        result['p%s_us' % pct] = round(_percentile(latencies, pct) / 1000.0, 3)
+
+    # Memory is measured on a separate run, since tracing slows every allocation
+    tracemalloc.start()
+    try:
+        traced, _ = _build(map_name, function, workload)
+        _replay(traced, workload.ops)
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    result['bytes_per_entry'] = round(result['peak_bytes'] / max(1, traced.get_size()), 1)
+    return result
+
+
+def run(maps, workloads, functions, size: int, ops: int, seed: int) -> dict:
+    """Run every combination of map, hash function and workload."""
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'size': size,
+            'ops': ops,
+            'seed': seed,
+        },
+        'results': {},
+    }
+    for workload_name in workloads:
+        workload = WORKLOADS[workload_name](size, ops, random.Random(seed))
+        for function_name in functions:
+            for map_name in maps:
+                label = '%s/%s/%s' % (map_name, workload_name, function_name)
+                result = run_one(map_name, HASH_FUNCTIONS[function_name], workload)
+                report['results'][label] = result
+                print('%-40s %12s ops/s  p99 %8.2f us  resizes %3d  peak %10d B'
+                      % (label, result['ops_per_sec'], result['p99_us'],
+                         result['resizes'], result['peak_bytes']))
+    return report
+
+
+# --------------------------- Threaded runner --------------------------- #
+
+def _gil_enabled() -> bool:
+    """Return False on a free-threaded build running without the GIL."""
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled() if is_gil_enabled else True
+
+
+def _writer_ops(worker: int, size: int, ops: int, rnd: random.Random) -> list:
+    """
+    Operations for one writer thread: inserts of keys only it writes,
+    removals of some of those, and rewrites of prefilled keys with the value
+    they already hold, so readers always know what they should see.
+    """
+    sequence = []
+    fresh = 0
+    for _ in range(ops):
+        roll = rnd.random()
+        if roll < 0.5 or not fresh:
+            sequence.append(('put', 'w%d-%d' % (worker, fresh), fresh))
+            fresh += 1
+        elif roll < 0.7:
+            victim = rnd.randrange(fresh)
+            sequence.append(('remove', 'w%d-%d' % (worker, victim), None))
+        else:
+            index = rnd.randrange(size)
+            sequence.append(('put', 'key' + str(index), index))
+    return sequence
+
+
+def run_threaded_one(function, stripes: int, readers: int, writers: int,
+                     size: int, ops: int, seed: int) -> dict:
+    """
+    Run reader and writer threads against one concurrent map, then check its
+    contents. Every thread performs `ops` operations.
+    """
+    hash_map = hash_map_concurrent.HashMap(11, function, stripes=stripes, stats=True)
+    keys = _keys(size)
+    for index, key in enumerate(keys):
+        hash_map.put(key, index)
+
+    rnd = random.Random(seed)
+    write_ops = [_writer_ops(worker, size, ops, rnd) for worker in range(writers)]
+    read_ops = [[rnd.randrange(size) for _ in range(ops)] for _ in range(readers)]
+
+    barrier = threading.Barrier(readers + writers + 1)
+    elapsed = {'read': [], 'write': []}
+    errors = []
+
+    def read(picks: list) -> None:
+        get = hash_map.get
+        barrier.wait()
+        start = time.perf_counter()
+        for index in picks:
+            if get(keys[index]) != index:
+                errors.append(keys[index])
+        elapsed['read'].append(time.perf_counter() - start)
+
+    def write(sequence: list) -> None:
+        put, remove = hash_map.put, hash_map.remove
+        barrier.wait()
+        start = time.perf_counter()
+        for op, key, value in sequence:
+            if op == 'put':
+                put(key, value)
+            else:
+                remove(key)
+        elapsed['write'].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=read, args=(picks,)) for picks in read_ops]
+    threads += [threading.Thread(target=write, args=(sequence,)) for sequence in write_ops]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    # Each writer owns its fresh keys, so replaying the writers one after
+    # another gives the contents the map must end up with
+    expected = dict(zip(keys, range(size)))
+    for sequence in write_ops:
+        for op, key, value in sequence:
+            if op == 'put':
+                expected[key] = value
+            else:
+                expected.pop(key, None)
+
+    pairs = hash_map.get_keys_and_values()
+    contents = dict(pairs[index] for index in range(pairs.length()))
+    if contents != expected or hash_map.get_size() != len(expected):
+        errors.append('final contents')
+
+    reads, writes = readers * ops, writers * ops
+    return {
+        'ops': reads + writes,
+        'ops_per_sec': round((reads + writes) / wall) if wall else 0,
+        'reads_per_sec': round(reads / max(elapsed['read'])) if reads else 0,
+        'writes_per_sec': round(writes / max(elapsed['write'])) if writes else 0,
+        'errors': len(errors),
+        'resizes': hash_map.stats()['resizes'],
+        'final_size': hash_map.get_size(),
+        'final_capacity': hash_map.get_capacity(),
+    }
+
+
+def run_threaded(stripes_options, functions, readers: int, writers: int,
+                 size: int, ops: int, seed: int) -> dict:
+    """Run the threaded benchmark for every stripe count and hash function."""
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'gil': _gil_enabled(),
+            'readers': readers,
+            'writers': writers,
+            'size': size,
+            'ops': ops,
+            'seed': seed,
+        },
+        'results': {},
+    }
+    for function_name in functions:
+        for stripes in stripes_options:
+            label = 'concurrent/stripes=%d/r%dw%d/%s' % (stripes, readers, writers, function_name)
+            result = run_threaded_one(HASH_FUNCTIONS[function_name], stripes, readers, writers,
+                                      size, ops, seed)
+            report['results'][label] = result
+            print('%-50s %10s ops/s  reads %10s/s  writes %10s/s  errors %d'
+                  % (label, result['ops_per_sec'], result['reads_per_sec'],
+                     result['writes_per_sec'], result['errors']))
+    return report
+
+
+# --------------------------- Sharded runner ---------------------------- #
+
+def run_sharded_one(function, kind: str, shards: int, size: int, seed: int) -> dict:
+    """Bulk insert and look up `size` keys in a sharded map, in one batch each."""
+    keys = _keys(size)
+    random.Random(seed).shuffle(keys)
+    pairs = list(zip(keys, range(size)))
+
+    with hash_map_sharded.HashMap(11, function, shards=shards, kind=kind) as hash_map:
+        start = time.perf_counter()
+        hash_map.put_many(pairs)
+        put_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        values = hash_map.get_many(keys)
+        get_seconds = time.perf_counter() - start
+
+        errors = sum(1 for index in range(size) if values[index] != index)
+        final_size = hash_map.get_size()
+
+    return {
+        'ops': 2 * size,
+        'puts_per_sec': round(size / put_seconds) if put_seconds else 0,
+        'gets_per_sec': round(size / get_seconds) if get_seconds else 0,
+        'errors': errors + (final_size != size),
+        'final_size': final_size,
+    }
+
+
+def run_sharded(shards_options, kinds, functions, size: int, seed: int) -> dict:
+    """Run the sharded bulk benchmark for every shard count, map and hash function."""
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'cpus': os.cpu_count(),
+            'size': size,
+            'seed': seed,
+        },
+        'results': {},
+    }
+    for function_name in functions:
+        for kind in kinds:
+            for shards in shards_options:
+                label = 'sharded/%s/shards=%d/%s' % (kind, shards, function_name)
+                result = run_sharded_one(HASH_FUNCTIONS[function_name], kind, shards, size, seed)
+                report['results'][label] = result
+                print('%-50s puts %10s/s  gets %10s/s  errors %d'
+                      % (label, result['puts_per_sec'], result['gets_per_sec'], result['errors']))
+    return report
+
+
+# ------------------------ Parallel mode runner ------------------------- #
+
+def _write_lines(path: str, size: int, seed: int, exponent: float = 1.1) -> dict:
+    """Write `size` Zipf-distributed lines to path and return how often each occurs."""
+    rnd = random.Random(seed)
+    keys = _keys(max(1, size // 10))
+    weights = [1.0 / (rank ** exponent) for rank in range(1, len(keys) + 1)]
+    counts = {}
+    with open(path, 'w') as out:
+        for start in range(0, size, 100000):
+            drawn = rnd.choices(keys, weights=weights, k=min(100000, size - start))
+            for key in drawn:
+                counts[key] = counts.get(key, 0) + 1
+            out.write('\n'.join(drawn))
+            out.write('\n')
+    return counts
+
+
+def run_parallel_mode_one(function, workers: int, path: str, expected: dict) -> dict:
+    """Find the mode of the lines of path with `workers` processes and check it against the expected counts."""
+    start = time.perf_counter()
+    modes, frequency = hash_map_parallel.find_mode(path, workers, function)
+    seconds = time.perf_counter() - start
+
+    highest = max(expected.values())
+    wanted = sorted(key for key, count in expected.items() if count == highest)
+    found = sorted(modes[index] for index in range(modes.length()))
+    size = sum(expected.values())
+
+    return {
+        'ops': size,
+        'ops_per_sec': round(size / seconds) if seconds else 0,
+        'seconds': round(seconds, 3),
+        'errors': int(found != wanted or frequency != highest),
+    }
+
+
+def run_parallel_mode(workers_options, functions, size: int, seed: int) -> dict:
+    """Run the parallel mode benchmark for every worker count and hash function, over one generated file."""
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'cpus': os.cpu_count(),
+            'size': size,
+            'seed': seed,
+        },
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'lines.txt')
+        expected = _write_lines(path, size, seed)
+
+        for function_name in functions:
+            baseline = None
+            for workers in workers_options:
+                label = 'parallel_mode/workers=%d/%s' % (workers, function_name)
+                result = run_parallel_mode_one(HASH_FUNCTIONS[function_name], workers, path, expected)
+                if baseline is None:
+                    baseline = result['seconds']
+                result['speedup'] = round(baseline / result['seconds'], 2) if result['seconds'] else 0
+                report['results'][label] = result
+                print('%-50s %10s lines/s  %6.2fx  errors %d'
+                      % (label, result['ops_per_sec'], result['speedup'], result['errors']))
+    return report
+
+
+# ---------------------------- Memory runner ---------------------------- #
+
+def run_memory_one(map_name: str, function, entries: int) -> dict:
+    """
+    Measure the memory a map holds for `entries` keys, and for an empty table
+    of as many buckets. The keys and values are built before tracing starts,
+    so only the map's own structure is counted.
+    """
+    pairs = list(zip(_keys(entries), range(entries)))
+
+    tracemalloc.start()
+    try:
+        hash_map = MAPS[map_name](11, function)
+        if hasattr(hash_map, 'put_many'):
+            hash_map.put_many(pairs)
+        else:
+            for key, value in pairs:
+                hash_map.put(key, value)
+        filled_bytes = tracemalloc.get_traced_memory()[0]
+        capacity = hash_map.get_capacity()
+        del hash_map
+
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        hash_map = MAPS[map_name](entries, function)
+        empty_bytes = tracemalloc.get_traced_memory()[0] - base
+        buckets = hash_map.get_capacity()
+        del hash_map
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'entries': entries,
+        'capacity': capacity,
+        'bytes': filled_bytes,
+        'bytes_per_entry': round(filled_bytes / entries, 1),
+        'empty_bytes': empty_bytes,
+        'empty_bytes_per_bucket': round(empty_bytes / buckets, 1),
+    }
+
+
+def run_memory(maps, functions, entries_options) -> dict:
+    """Run the memory benchmark for every map, hash function and entry count."""
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'entries': entries_options,
+        },
+        'results': {},
+    }
+    for function_name in functions:
+        for map_name in maps:
+            for entries in entries_options:
+                label = 'memory/%s/entries=%d/%s' % (map_name, entries, function_name)
+                result = run_memory_one(map_name, HASH_FUNCTIONS[function_name], entries)
+                report['results'][label] = result
+                print('%-50s %8.1f B/entry  empty table %6.1f B/bucket'
+                      % (label, result['bytes_per_entry'], result['empty_bytes_per_bucket']))
+    return report
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> int:
+    """
+    Print the relative change of every metric against a baseline and return
+    the number of regressions larger than `threshold` percent.
+    """
+    regressions = 0
+    for label, result in sorted(current['results'].items()):
+        before = baseline['results'].get(label)
+        if before is None:
+            print('%-40s (new)' % label)
+            continue
+        for metric in ('ops_per_sec', 'puts_per_sec', 'gets_per_sec', 'p50_us', 'p99_us', 'peak_bytes', 'resizes',
+                       'bytes_per_entry', 'empty_bytes_per_bucket'):
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) * 100.0 / old
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = ''
+            if worse > threshold:
+                flag = '  REGRESSION'
+                regressions += 1
+            print('%-40s %-12s %12s -> %12s  %+7.1f%%%s' % (label, metric, old, new, change, flag))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--maps', nargs='+', choices=sorted(MAPS), default=sorted(MAPS))
+    parser.add_argument('--workloads', nargs='+', choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument('--functions', nargs='+', choices=sorted(HASH_FUNCTIONS),
+                        default=['hash_function_1', 'hash_function_2'])
+    parser.add_argument('--size', type=int, default=5000, help='keys prefilled before timing')
+    parser.add_argument('--ops', type=int, default=20000, help='timed operations per workload')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', metavar='PATH', help='write results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare results against a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='percent change reported as a regression (default 10)')
+    parser.add_argument('--threaded', action='store_true',
+                        help='run the multi-threaded benchmark of hash_map_concurrent instead')
+    parser.add_argument('--readers', type=int, default=4, help='reader threads with --threaded')
+    parser.add_argument('--writers', type=int, default=4, help='writer threads with --threaded')
+    parser.add_argument('--stripes', type=int, nargs='+', default=[1, 16],
+                        help='lock stripe counts to compare with --threaded')
+    parser.add_argument('--sharded', action='store_true',
+                        help='run the bulk benchmark of hash_map_sharded instead')
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4],
+                        help='shard counts to compare with --sharded')
+    parser.add_argument('--parallel-mode', action='store_true',
+                        help='run the benchmark of hash_map_parallel.find_mode instead')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                        help='worker process counts to compare with --parallel-mode')
+    parser.add_argument('--memory', action='store_true',
+                        help='run the memory benchmark instead')
+    parser.add_argument('--entries', type=int, nargs='+', default=[1000000],
+                        help='entry counts to measure with --memory')
+    args = parser.parse_args(argv)
+
+    if args.memory:
+        report = run_memory(args.maps, args.functions, args.entries)
+    elif args.parallel_mode:
+        report = run_parallel_mode(args.workers, args.functions, args.size, args.seed)
+    elif args.sharded:
+        kinds = [name for name in args.maps if name in hash_map_sharded.SHARD_MAPS] or ['sc']
+        report = run_sharded(args.shards, kinds, args.functions, args.size, args.seed)
+    elif args.threaded:
+        report = run_threaded(args.stripes, args.functions, args.readers, args.writers,
+                              args.size, args.ops, args.seed)
+    else:
+        report = run(args.maps, args.workloads, args.functions, args.size, args.ops, args.seed)
+
+    if args.save:
+        with open(args.save, 'w') as out:
+            json.dump(report, out, indent=2, sort_keys=True)
+            out.write('\n')
+
+    if args.compare:
+        with open(args.compare) as src:
+            baseline = json.load(src)
+        if compare(baseline, report, args.threshold):
+            return 1
+
+    if any(result.get('errors') for result in report['results'].values()):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
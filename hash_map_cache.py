@@ -0,0 +1,318 @@
+
+from time import monotonic
+
+import hash_map_sc
+from a6_include import CacheNode, DynamicArray, Snapshot, hash_function_name, hash_function_1, hash_function_2
+
+
+# Eviction policies accepted by HashMap
+CACHE_POLICIES = ('lru', 'lfu')
+
+
+class HashMap(hash_map_sc.HashMap):
+    """
+    Bounded cache built on the separate chaining HashMap.
+
+    Each bucket node is an a6_include.CacheNode, which is also linked into a doubly linked eviction list running from
+    the entry to evict next to the one to evict last. A hit moves its node within that list, an insert links its node
+    in and evicts the node at the front if the cache is full, so get, put and remove are all O(1).
+
+    Under the 'lru' policy the list is kept in order of last use. Under 'lfu' it is kept in order of use count, and in
+    order of last use among entries with the same count; the newest node of each count is remembered so a hit can move
+    its node straight past the others with that count.
+
+    Entries may be given a time to live. An expired entry is not removed until it is next looked up, when it is
+    dropped and counted as a miss, or until it reaches the front of the eviction list.
+    """
+
+    def __init__(self,
+                 max_size: int,
+                 function: callable = hash_function_1,
+                 policy: str = 'lru',
+                 ttl: float = None,
+                 seed: int = None,
+                 stats: bool = False,
+                 capacity_policy: str = 'prime',
+                 clock: callable = monotonic) -> None:
+        """
+        Initialize new cache holding at most max_size entries, evicting by the given policy, 'lru' or 'lfu'. ttl is
+        the default time to live of an entry in seconds, as measured by clock, or None for entries that don't expire.
+
+        The table is sized for max_size entries up front, so it never has to grow. The other arguments are those of
+        hash_map_sc.HashMap.
+        """
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+        if policy not in CACHE_POLICIES:
+            raise ValueError('policy must be one of ' + ', '.join(CACHE_POLICIES))
+        if ttl is not None and ttl <= 0:
+            raise ValueError('ttl must be greater than 0')
+
+        super().__init__(max_size, function, seed=seed, stats=stats, capacity_policy=capacity_policy)
+
+        self._max_size = max_size
+        self._policy = policy
+        self._lfu = policy == 'lfu'
+        self._ttl = ttl
+        self._clock = clock
+
+        # The eviction list is circular through a sentinel: _order.newer is the next entry to evict and _order.older
+        # the last. Under LFU, _newest maps each use count to the newest node with that count
+        self._order = CacheNode(None, None)
+        self._order.newer = self._order
+        self._order.older = self._order
+        self._newest = {}
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _link(self, node: CacheNode, anchor: CacheNode) -> None:
+        """
+        Link node into the eviction list just after anchor, on the side evicted later
+        """
+        newer = anchor.newer
+        node.older = anchor
+        node.newer = newer
+        newer.older = node
+        anchor.newer = node
+
+    def _unlink(self, node: CacheNode) -> None:
+        """
+        Take node out of the eviction list, handing its place as the newest node of its use count to the node before
+        it if that has the same count
+        """
+        older = node.older
+        newer = node.newer
+        older.newer = newer
+        newer.older = older
+
+        if self._lfu and self._newest.get(node.frequency) is node:
+            if older is not self._order and older.frequency == node.frequency:
+                self._newest[node.frequency] = older
+            else:
+                del self._newest[node.frequency]
+
+    def _admit(self, node: CacheNode) -> None:
+        """
+        Link a new node into the eviction list, after every node that was used more often or more recently
+        """
+        if self._lfu:
+            self._link(node, self._newest.get(1, self._order))
+            self._newest[1] = node
+        else:
+            self._link(node, self._order.older)
+
+    def _touch(self, node: CacheNode) -> None:
+        """
+        Record a use of node, moving it later in the eviction list
+        """
+        if not self._lfu:
+            self._unlink(node)
+            self._link(node, self._order.older)
+            return
+
+        # The node goes after the newest node used one time more, or failing that after the newest node with its own
+        # count, or failing that stays where it is
+        count = node.frequency
+        older = node.older
+        self._unlink(node)
+
+        anchor = self._newest.get(count + 1)
+        if anchor is None:
+            anchor = self._newest.get(count, older)
+
+        self._link(node, anchor)
+        node.frequency = count + 1
+        self._newest[count + 1] = node
+
+    def _drop(self, node: CacheNode) -> None:
+        """
+        Remove node from its bucket and from the eviction list
+        """
+        self._buckets[node.hash % self._capacity].remove(node.key, node.hash)
+        self._unlink(node)
+        self._size -= 1
+
+    def _live(self, key: str) -> CacheNode:
+        """
+        Returns the node holding the key, or None if the key is not cached. An expired node is dropped and None is
+        returned.
+        """
+        key_hash = self._hash_function(key)
+        node = self._buckets[key_hash % self._capacity].contains(key, key_hash)
+
+        if node is not None and node.expires is not None and node.expires <= self._clock():
+            self._drop(node)
+            self._expirations += 1
+            return None
+
+        return node
+
+    def put(self, key: str, value: object, ttl: float = None) -> None:
+        """
+        Updates the key/value pair in the cache, or adds it if the key is not in the cache. Adding a key to a full
+        cache first evicts the entry at the front of the eviction list. ttl overrides the cache's default time to live
+        for this entry. Updating a key counts as a use of it and restarts its time to live.
+        """
+        if ttl is None:
+            ttl = self._ttl
+        elif ttl <= 0:
+            raise ValueError('ttl must be greater than 0')
+
+        expires = None if ttl is None else self._clock() + ttl
+
+        # 1 - Update the key in place if it is cached
+        key_hash = self._hash_function(key)
+        node = self._buckets[key_hash % self._capacity].contains(key, key_hash)
+
+        if node is not None:
+            node.value = value
+            node.expires = expires
+            self._touch(node)
+            return
+
+        # 2 - Otherwise make room for it, then link a new node into its bucket and the eviction list
+        if self._size >= self._max_size:
+            self._drop(self._order.newer)
+            self._evictions += 1
+
+        node = CacheNode(key, value, None, key_hash)
+        node.expires = expires
+        hash_map_sc._claim_bucket(self._buckets.data(), key_hash % self._capacity).insert_node(node)
+        self._admit(node)
+        self._size += 1
+
+    def get(self, key: str):
+        """
+        Returns the value associated with the given key, counting a hit, or None if the key is not cached or has
+        expired, counting a miss.
+        """
+        node = self._live(key)
+        if node is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self._touch(node)
+        return node.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is cached and has not expired, otherwise False. It does not count as a use of
+        the key or as a hit or miss.
+        """
+        return self._live(key) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the cache. If the key is not cached, it does nothing.
+        """
+        key_hash = self._hash_function(key)
+        node = self._buckets[key_hash % self._capacity].contains(key, key_hash)
+        if node is not None:
+            self._drop(node)
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """
+        Adds amount to the count cached for the given key, or puts amount if the key is not cached or has expired, and
+        returns the new count. It counts as a use of the key but not as a hit or miss.
+        """
+        node = self._live(key)
+        if node is None:
+            self.put(key, amount)
+            return amount
+
+        node.value += amount
+        self._touch(node)
+        return node.value
+
+    def increment_many(self, keys, hash_batch: callable = None) -> int:
+        """
+        Adds one to the count cached for each key of keys, as increment would one at a time, and returns the highest
+        count any of them reached.
+        """
+        highest = 0
+        for key in hash_map_sc._materialize(keys):
+            count = self.increment(key)
+            if count > highest:
+                highest = count
+        return highest
+
+    def put_many(self, pairs, hash_batch: callable = None) -> None:
+        """
+        Puts every (key, value) pair of pairs into the cache, in order, as put would one at a time.
+        """
+        for key, value in hash_map_sc._materialize(pairs):
+            self.put(key, value)
+
+    def get_many(self, keys, hash_batch: callable = None) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key of keys, in order, looked up as get would one at a time.
+        """
+        keys = hash_map_sc._materialize(keys)
+        results = DynamicArray.filled(len(keys))
+        for index in range(len(keys)):
+            results[index] = self.get(keys[index])
+        return results
+
+    def remove_many(self, keys, hash_batch: callable = None) -> None:
+        """
+        Removes every key of keys from the cache, ignoring keys that are not cached.
+        """
+        for key in hash_map_sc._materialize(keys):
+            self.remove(key)
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the cache. The hit, miss, eviction and expiration counts are kept.
+        """
+        super().clear()
+        self._order.newer = self._order
+        self._order.older = self._order
+        self._newest = {}
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the cache's statistics, as hash_map_sc.HashMap.stats does, along with its policy, maximum
+        size and the number of hits, misses, evictions and expirations so far.
+        """
+        snapshot = super().stats()
+        snapshot['policy'] = self._policy
+        snapshot['max_size'] = self._max_size
+        snapshot['hits'] = self._hits
+        snapshot['misses'] = self._misses
+        snapshot['evictions'] = self._evictions
+        snapshot['expirations'] = self._expirations
+        return snapshot
+
+    def snapshot(self) -> Snapshot:
+        """
+        Returns a snapshot of the cache, as hash_map_sc.HashMap.snapshot does, but with the entries in eviction order.
+        """
+        snapshot = Snapshot('sc', self._capacity, hash_function_name(self._hash_function), self._seed,
+                            self._power_of_two)
+
+        node = self._order.newer
+        while node is not self._order:
+            snapshot.add(node.hash % self._capacity, node.hash, node.key, node.value)
+            node = node.newer
+
+        return snapshot
+
+    @classmethod
+    def load(cls, path: str, max_size: int, **options) -> "HashMap":
+        """
+        Returns a new cache of max_size entries holding the contents of a snapshot written by save. The entries are
+        put in the saved order, so a cache saved under LRU comes back in the same order of use. Use counts and times
+        to live are not saved.
+        """
+        snapshot = Snapshot.read(path)
+        if snapshot.kind != 'sc':
+            raise ValueError(path + ' is not a snapshot of a separate chaining HashMap')
+
+        cache = cls(max_size, **snapshot.map_options(**options))
+        for key, value in zip(snapshot.keys, snapshot.values):
+            cache.put(key, value)
+        return cache
@@ -0,0 +1,348 @@
+
+from array import array
+
+from a6_include import (DynamicArray, HashEntry, seeded_hash,
+                        hash_function_1, hash_function_2)
+
+
+# Slot states held in the _states bytearray
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+# Full hashes are kept in a signed 64-bit array, so they are reduced to 63 bits
+HASH_MASK = (1 << 63) - 1
+
+
+class HashMap:
+    """
+    Open addressing HashMap with the same quadratic probing behaviour as hash_map_oa.HashMap, but without a
+    HashEntry object per slot. The table is stored as parallel flat arrays: the full hash of each key in an
+    array('q'), keys and values in two lists, and the state of each slot (empty, live or tombstone) in a bytearray.
+    """
+
+    def __init__(self, capacity: int, function, compact_threshold: float = 0.5, seed: int = None) -> None:
+        """
+        Initialize new HashMap that uses
+        quadratic probing for collision resolution
+
+        compact_threshold is the fraction of slots that may hold either a live entry or a tombstone before put()
+        rehashes the table in place, as in hash_map_oa.HashMap. It must be greater than 0 and no more than 0.5.
+
+        If a seed is given, function must be one of the keyed hash functions in a6_include and is called with it.
+        """
+        if not 0 < compact_threshold <= 0.5:
+            raise ValueError('compact_threshold must be in the range (0, 0.5]')
+
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._allocate(self._capacity)
+
+        if seed is not None:
+            function = seeded_hash(function, seed)
+
+        self._hash_function = function
+        self._seed = seed
+        self._size = 0
+        self._tombstones = 0
+        self._compact_threshold = compact_threshold
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            state = self._states[i]
+            if state == EMPTY:
+                out += str(i) + ': None\n'
+            else:
+                out += str(i) + ': K: ' + str(self._keys[i]) + ' V: ' + str(self._values[i]) + \
+                    ' TS: ' + str(state == TOMBSTONE) + '\n'
+        return out
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replace the storage arrays with empty ones of the given capacity
+        """
+        self._hashes = array('q', bytes(8 * capacity))
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._states = bytearray(capacity)
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number to find the closest prime number
+        """
+        if capacity % 2 == 0:
+            capacity += 1
+
+        while not self._is_prime(capacity):
+            capacity += 2
+
+        return capacity
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        if capacity == 2 or capacity == 3:
+            return True
+
+        if capacity == 1 or capacity % 2 == 0:
+            return False
+
+        factor = 3
+        while factor ** 2 <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+
+        return True
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def tombstone_count(self) -> int:
+        """
+        Return the number of slots holding a tombstone
+        """
+        return self._tombstones
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map. If the given key already exists in the hash map, its associated
+        value is replaced with the new value. If the given key is not in the hash map, a new key/value pair is added.
+
+        When put() is called, if the current load factor of the table is greater than or equal to 0.5, the table is
+        resized to double its current capacity.
+
+        It has O(1) time complexity.
+        """
+        # 1 - Grow at a load factor of 0.5, or rehash in place when tombstones push occupancy past the threshold
+        if self._size / self._capacity >= 0.5:
+            self.resize_table(self._capacity * 2)
+
+        elif self._tombstones and (self._size + self._tombstones) / self._capacity >= self._compact_threshold:
+            if self._size / self._capacity >= self._compact_threshold:
+                self.resize_table(self._capacity * 2)
+            else:
+                self.resize_table(self._capacity)
+
+        # 2 - Quadratic probe until finding an empty slot or a live slot with a matching key, remembering the first
+        # tombstone passed so the key can reuse it
+        ht_capacity = self._capacity
+        hashes = self._hashes
+        keys = self._keys
+        states = self._states
+
+        key_hash = self._hash_function(key) & HASH_MASK
+        base_index = key_hash % ht_capacity
+        table_index = base_index
+        j_val = 0
+        tombstone_index = -1
+
+        state = states[table_index]
+        while state != EMPTY:
+            if state == TOMBSTONE:
+                if tombstone_index < 0:
+                    tombstone_index = table_index
+
+            # 2a - Matching live key, overwrite its value and return
+            elif hashes[table_index] == key_hash and keys[table_index] == key:
+                self._values[table_index] = value
+                return
+
+            j_val += 1
+            table_index = (base_index + j_val * j_val) % ht_capacity
+            state = states[table_index]
+
+        # 3 - The key is not in the table. Store it in the first tombstone passed, or else the empty slot
+        if tombstone_index >= 0:
+            table_index = tombstone_index
+            self._tombstones -= 1
+
+        hashes[table_index] = key_hash
+        keys[table_index] = key
+        self._values[table_index] = value
+        states[table_index] = LIVE
+        self._size += 1
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the underlying table. All live key/value pairs are moved into the new table and
+        tombstones are dropped.
+        """
+        # 1 - Ignore capacities smaller than the number of elements, otherwise round up to a prime
+        if new_capacity < self._size:
+            return
+        elif new_capacity == 2:
+            new_capacity = 2
+        elif not self._is_prime(new_capacity):
+            new_capacity = self._next_prime(new_capacity)
+
+        # 2 - Keep the load factor below 0.5 so that every probe sequence reaches an empty slot
+        while self._size and (self._size - 1) / new_capacity >= 0.5:
+            new_capacity = self._next_prime(new_capacity * 2)
+
+        self._rehash(new_capacity)
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every live slot into new arrays of new_capacity slots, probing from the stored hash for the first empty
+        slot. Keys are known to be distinct, so none are compared.
+        """
+        old_hashes = self._hashes
+        old_keys = self._keys
+        old_values = self._values
+        old_states = self._states
+        old_capacity = self._capacity
+
+        self._allocate(new_capacity)
+        hashes = self._hashes
+        keys = self._keys
+        values = self._values
+        states = self._states
+
+        for index in range(old_capacity):
+            if old_states[index] == LIVE:
+                key_hash = old_hashes[index]
+                base_index = key_hash % new_capacity
+                table_index = base_index
+                j_val = 0
+                while states[table_index] != EMPTY:
+                    j_val += 1
+                    table_index = (base_index + j_val * j_val) % new_capacity
+
+                hashes[table_index] = key_hash
+                keys[table_index] = old_keys[index]
+                values[table_index] = old_values[index]
+                states[table_index] = LIVE
+
+        self._capacity = new_capacity
+        self._tombstones = 0
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty slots in the hash table.
+        """
+        return self._states.count(EMPTY)
+
+    def _find_index(self, key: str) -> int:
+        """
+        Quadratic probes for a live slot holding the given key and returns its index, or -1 if the probe reaches an
+        empty slot first, or has made as many steps as there are slots. Slots whose stored hash differs are passed
+        over without comparing keys.
+        """
+        ht_capacity = self._capacity
+        hashes = self._hashes
+        keys = self._keys
+        states = self._states
+
+        key_hash = self._hash_function(key) & HASH_MASK
+        base_index = key_hash % ht_capacity
+        table_index = base_index
+        j_val = 0
+
+        state = states[table_index]
+        while state != EMPTY:
+            if state == LIVE and hashes[table_index] == key_hash and keys[table_index] == key:
+                return table_index
+
+            j_val += 1
+            if j_val > ht_capacity:
+                return -1
+
+            table_index = (base_index + j_val * j_val) % ht_capacity
+            state = states[table_index]
+
+        return -1
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, or None if the key is not in the hash map.
+        """
+        table_index = self._find_index(key)
+        if table_index < 0:
+            return None
+        return self._values[table_index]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise False.
+        """
+        if self._size == 0:
+            return False
+        return self._find_index(key) >= 0
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map. If the key is not in the hash map the
+        method does nothing. The slot becomes a tombstone and the key and value references are released.
+        """
+        if self._size == 0:
+            return
+
+        table_index = self._find_index(key)
+        if table_index < 0:
+            return
+
+        self._states[table_index] = TOMBSTONE
+        self._keys[table_index] = None
+        self._values[table_index] = None
+        self._size -= 1
+        self._tombstones += 1
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair stored in the hash map. The order
+        of the keys in the dynamic array does not matter.
+        """
+        arr = DynamicArray()
+        keys = self._keys
+        values = self._values
+        states = self._states
+
+        for index in range(self._capacity):
+            if states[index] == LIVE:
+                arr.append((keys[index], values[index]))
+
+        return arr
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map. It does not change the underlying hash table capacity.
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+
+    def __iter__(self):
+        """
+        Iterates over the live entries of the hash map. Each is yielded as a HashEntry, as in hash_map_oa.HashMap,
+        built on the fly from the flat arrays.
+        """
+        hashes = self._hashes
+        keys = self._keys
+        values = self._values
+        states = self._states
+
+        for index in range(self._capacity):
+            if states[index] == LIVE:
+                yield HashEntry(keys[index], values[index], hashes[index])
@@ -0,0 +1,342 @@
+
+from threading import Lock
+
+import hash_map_sc
+from a6_include import DynamicArray, Snapshot, hash_function_1, hash_function_2
+
+
+class HashMap(hash_map_sc.HashMap):
+    """
+    Thread-safe separate chaining HashMap with lock striping.
+
+    The buckets are divided among a fixed number of stripes, bucket i belonging to stripe i % stripes, and each stripe
+    has its own lock and its own count of the entries it holds. put and remove only lock the stripe of the key's
+    bucket, so writers to different stripes run in parallel. get and contains_key take no lock at all: a key that is
+    found is returned straight away, and a miss is only trusted if no resize ran while the chain was being walked,
+    which is checked against a sequence number that every resize makes odd while it runs and even again when done.
+
+    Resizing, clear and the whole-table operations take every stripe lock, in order, so they never run alongside a
+    writer. Incremental resizing is not supported, and long chains are never replaced by sorted buckets: inserting into
+    a sorted bucket shifts its entries, which could make a lock-free reader miss a key that is there.
+    """
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 stripes: int = 16,
+                 seed: int = None,
+                 stats: bool = False,
+                 capacity_policy: str = 'prime') -> None:
+        """
+        Initialize new HashMap that uses
+        separate chaining for collision resolution
+        and stripes locks shared between its buckets
+
+        The other arguments are those of hash_map_sc.HashMap.
+        """
+        if stripes < 1:
+            raise ValueError('stripes must be at least 1')
+
+        self._stripes = stripes
+        self._locks = [Lock() for _ in range(stripes)]
+        self._sequence = 0
+
+        super().__init__(capacity, function, seed=seed, stats=stats, capacity_policy=capacity_policy, treeify=False)
+
+    @property
+    def _size(self) -> int:
+        """
+        Number of entries, summed over the stripes. Only exact while no writer is running
+        """
+        return sum(self._stripe_sizes)
+
+    @_size.setter
+    def _size(self, size: int) -> None:
+        """
+        Replace the per-stripe counts with a single total, for the methods of hash_map_sc.HashMap that set the size
+        directly. They only run with every stripe locked
+        """
+        self._stripe_sizes = [0] * self._stripes
+        self._stripe_sizes[0] = size
+
+    def _lock_all(self) -> None:
+        """
+        Acquire every stripe lock, always in the same order so that two callers can't deadlock
+        """
+        for lock in self._locks:
+            lock.acquire()
+
+    def _unlock_all(self) -> None:
+        """
+        Release every stripe lock
+        """
+        for lock in reversed(self._locks):
+            lock.release()
+
+    def _lock_bucket(self, key_hash: int) -> tuple:
+        """
+        Lock the stripe of the key's bucket and return the stripe number and the table it was locked for. A resize
+        may replace the table before the lock is acquired, in which case the bucket is found again in the new table.
+        """
+        while True:
+            table = self._buckets
+            stripe = key_hash % table.length() % self._stripes
+            lock = self._locks[stripe]
+            lock.acquire()
+
+            if self._buckets is table:
+                return stripe, table
+
+            lock.release()
+
+    def _find(self, key: str, key_hash: int):
+        """
+        Returns the node holding the key, or None, without taking a lock. The walk is retried if a resize started or
+        finished while it ran, and waits for one that is still running.
+        """
+        while True:
+            sequence = self._sequence
+
+            if sequence % 2 == 0:
+                table = self._buckets
+                node = table[key_hash % table.length()].contains(key, key_hash)
+
+                # Nodes are never copied, so a matching node is always the key's own. A miss may mean the walk was
+                # carried into another chain by a resize relinking the nodes
+                if node is not None or self._sequence == sequence:
+                    return node
+            else:
+                with self._locks[0]:
+                    pass
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, or adds it if the key is not in the hash map. If the current load
+        factor of the table is greater than or equal to 1.0, the table is first resized to double its capacity.
+        """
+        # 1 - Grow the table if needed. Several threads may see the same full table, so only the first one resizes it
+        ht_capacity = self._capacity
+        if self._size / ht_capacity >= 1.0:
+            self._grow(ht_capacity)
+
+        # 2 - Insert or update the key with only its stripe locked
+        key_hash = self._hash_function(key)
+        stripe, table = self._lock_bucket(key_hash)
+        try:
+            node = table[key_hash % table.length()].contains(key, key_hash)
+
+            if node is None:
+                hash_map_sc._claim_bucket(table.data(), key_hash % table.length()).insert(key, value, key_hash)
+                self._stripe_sizes[stripe] += 1
+            else:
+                node.value = value
+        finally:
+            self._locks[stripe].release()
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """
+        Adds amount to the count stored for the given key, or stores amount if the key is not in the hash map, with
+        only its stripe locked, and returns the new count.
+        """
+        ht_capacity = self._capacity
+        if self._size / ht_capacity >= 1.0:
+            self._grow(ht_capacity)
+
+        key_hash = self._hash_function(key)
+        stripe, table = self._lock_bucket(key_hash)
+        try:
+            node = table[key_hash % table.length()].contains(key, key_hash)
+
+            if node is None:
+                hash_map_sc._claim_bucket(table.data(), key_hash % table.length()).insert(key, amount, key_hash)
+                self._stripe_sizes[stripe] += 1
+                return amount
+
+            node.value += amount
+            return node.value
+        finally:
+            self._locks[stripe].release()
+
+    def _grow(self, ht_capacity: int) -> None:
+        """
+        Doubles the capacity of the table, unless another thread has already resized it since it had ht_capacity
+        buckets or it is no longer full.
+        """
+        self._lock_all()
+        try:
+            if self._capacity == ht_capacity and self._size / ht_capacity >= 1.0:
+                super().resize_table(ht_capacity * 2)
+        finally:
+            self._unlock_all()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the underlying table, with every stripe locked.
+        """
+        self._lock_all()
+        try:
+            super().resize_table(new_capacity)
+        finally:
+            self._unlock_all()
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every node into a new table of new_capacity buckets. Lock-free readers are told a resize is running
+        through the sequence number, since relinking a node can carry a walk into another chain.
+        """
+        self._sequence += 1
+        try:
+            super()._rehash(new_capacity)
+        finally:
+            self._sequence += 1
+
+    def get(self, key: str):
+        """
+        Returns the value associated with the given key, or None if the key is not in the hash map. No lock is taken.
+        """
+        node = self._find(key, self._hash_function(key))
+        if node is None:
+            return None
+        return node.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise False. No lock is taken.
+        """
+        return self._find(key, self._hash_function(key)) is not None
+
+    def get_many(self, keys, hash_batch: callable = None) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key of keys, in order, with None for keys that are not in
+        the hash map. Keys are hashed in one batch and looked up without taking a lock, as get does.
+        """
+        keys = hash_map_sc._materialize(keys)
+        results = DynamicArray.filled(len(keys))
+        if not keys:
+            return results
+
+        hashes = self._hash_batch(keys, hash_batch)
+        find = self._find
+
+        for index in range(len(keys)):
+            node = find(keys[index], hashes[index])
+            if node is not None:
+                results[index] = node.value
+
+        return results
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map, with only its stripe locked. If the key is
+        not in the hash map, it does nothing.
+        """
+        key_hash = self._hash_function(key)
+        stripe, table = self._lock_bucket(key_hash)
+        try:
+            if table[key_hash % table.length()].remove(key, key_hash):
+                self._stripe_sizes[stripe] -= 1
+        finally:
+            self._locks[stripe].release()
+
+    def put_many(self, pairs, hash_batch: callable = None) -> None:
+        """
+        Puts every (key, value) pair of pairs into the hash map as one batch, with every stripe locked.
+        """
+        self._lock_all()
+        try:
+            super().put_many(pairs, hash_batch)
+        finally:
+            self._unlock_all()
+
+    def remove_many(self, keys, hash_batch: callable = None) -> None:
+        """
+        Removes every key of keys from the hash map as one batch, with every stripe locked.
+        """
+        self._lock_all()
+        try:
+            super().remove_many(keys, hash_batch)
+        finally:
+            self._unlock_all()
+
+    def increment_many(self, keys, hash_batch: callable = None) -> int:
+        """
+        Adds one to the count stored for each key of keys as one batch, with every stripe locked, and returns the
+        highest count any of them reached.
+        """
+        self._lock_all()
+        try:
+            return super().increment_many(keys, hash_batch)
+        finally:
+            self._unlock_all()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array of the key/value pairs in the hash map, taken with every stripe locked.
+        """
+        self._lock_all()
+        try:
+            return super().get_keys_and_values()
+        finally:
+            self._unlock_all()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table, counted with every stripe locked.
+        """
+        self._lock_all()
+        try:
+            return super().empty_buckets()
+        finally:
+            self._unlock_all()
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the map's statistics, as hash_map_sc.HashMap.stats does, taken with every stripe locked.
+        """
+        self._lock_all()
+        try:
+            snapshot = super().stats()
+        finally:
+            self._unlock_all()
+
+        snapshot['stripes'] = self._stripes
+        return snapshot
+
+    def snapshot(self) -> Snapshot:
+        """
+        Returns a snapshot of the hash map, as hash_map_sc.HashMap.snapshot does, taken with every stripe locked.
+        """
+        self._lock_all()
+        try:
+            return super().snapshot()
+        finally:
+            self._unlock_all()
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map. It does not change the table capacity.
+
+        The empty table is built before any lock is taken and then swapped in with every stripe locked, so lock-free
+        readers only ever see a complete table.
+        """
+        new_table = DynamicArray.filled(self._capacity, hash_map_sc.EMPTY_BUCKET)
+
+        self._lock_all()
+        try:
+            if new_table.length() != self._capacity:
+                new_table = DynamicArray.filled(self._capacity, hash_map_sc.EMPTY_BUCKET)
+
+            self._buckets = new_table
+            self._size = 0
+        finally:
+            self._unlock_all()
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        self._lock_all()
+        try:
+            return super().__str__()
+        finally:
+            self._unlock_all()
@@ -1,29 +1,116 @@
+from time import perf_counter
 
-from a6_include import (DynamicArray, DynamicArrayException, HashEntry,
-                        hash_function_1, hash_function_2)
+from a6_include import (DynamicArray, HashEntry, Snapshot, batch_hash, hash_function_name,
+                        mix_hash, mixed_hash, needs_mixing, seeded_hash, hash_function_1, hash_function_2)
+
+
+# Left in the old table's slot once its entry has been migrated, so that probes through the slot continue past it
+_MOVED = HashEntry(None, None)
+_MOVED.is_tombstone = True
+
+
+# Capacity policies accepted by HashMap
+CAPACITY_POLICIES = ('prime', 'power_of_two')
+
+# Primes already found by _next_prime, keyed by the number the search started from. A growing map doubles through
+# the same sizes every time, so each prime is only searched for once
+_NEXT_PRIME = {}
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self,
+                 capacity: int,
+                 function,
+                 compact_threshold: float = 0.5,
+                 incremental: bool = False,
+                 migrate_step: int = 8,
+                 seed: int = None,
+                 stats: bool = False,
+                 capacity_policy: str = 'prime') -> None:
         """
         Initialize new HashMap that uses
         quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        DO NOT CHANGE THE BASELINE BEHAVIOUR OF THIS METHOD: HashMap(capacity, function) must still build an empty
+        table of None buckets whose capacity is the smallest prime at or above capacity, and hash keys with function
+        exactly as given. Every later parameter is optional and its default leaves that behaviour unchanged.
+
+        compact_threshold is the fraction of buckets that may hold either a live entry or a tombstone before
+        put() rehashes the table in place to flush the tombstones. Quadratic probing over a prime table only
+        reaches half of the buckets, so it must be greater than 0 and no more than 0.5.
+
+        With incremental set, a resize keeps the old table alongside the new one and moves migrate_step old buckets
+        across on each put, get and remove, instead of rehashing everything at once.
+
+        If a seed is given, function must be one of the keyed hash functions in a6_include (such as siphash_hash) and
+        is called with that seed. Pass a6_include.random_seed() to give each map its own unpredictable hash.
+
+        With stats set, the map records probe lengths, tombstones passed and resize work for stats() to report.
+
+        capacity_policy is 'prime' (the default) or 'power_of_two'. Under 'power_of_two' the capacity is always a power
+        of two, so no prime has to be searched for on a resize, and collisions are resolved by triangular probing
+        (offsets 1, 3, 6, 10, ...), which visits every bucket of a power-of-two table. Only the low bits of a hash pick
+        its bucket, so hash functions that are not well mixed (see a6_include.needs_mixing) have their hashes passed
+        through a6_include.mix_hash.
         """
-        self._buckets = DynamicArray()
+        if not 0 < compact_threshold <= 0.5:
+            raise ValueError('compact_threshold must be in the range (0, 0.5]')
+
+        if capacity_policy not in CAPACITY_POLICIES:
+            raise ValueError('capacity_policy must be one of ' + ', '.join(CAPACITY_POLICIES))
+
+        # Quadratic probing steps by 1, 3, 5, ... (the gaps between squares), triangular probing by 1, 2, 3, ...
+        self._power_of_two = capacity_policy == 'power_of_two'
+        self._probe_step = 1 if self._power_of_two else 2
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(None)
+        # capacity must be a prime number, or a power of two under the power_of_two policy
+        self._capacity = self._next_capacity(capacity)
+        self._buckets = DynamicArray.filled(self._capacity)
+
+        if seed is not None:
+            function = seeded_hash(function, seed)
+
+        # Under the power_of_two policy, hashes that don't already depend on the whole key in their low bits are mixed
+        self._mix_hashes = self._power_of_two and needs_mixing(function)
+        if self._mix_hashes:
+            function = mixed_hash(function)
 
         self._hash_function = function
+        self._seed = seed
         self._size = 0
+        self._tombstones = 0
+        self._compact_threshold = compact_threshold
+
+        # Bumped whenever an entry is added or removed or the table replaced, so iterators can detect changes
+        self._version = 0
+
+        # Incremental resize state; _old_buckets is None unless a migration is in progress
+        self._incremental = incremental
+        self._migrate_step = migrate_step
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+
+        # Recorded statistics; None unless stats were requested, so the hot path only pays for one check
+        self._stats = None
+        if stats:
+            self._stats = {
+                'probes': {'get': {}, 'put': {}, 'remove': {}},
+                'probe_sequences': 0,
+                'tombstones_seen': 0,
+                'resizes': 0,
+                'resize_seconds': 0.0,
+            }
+
+        # Buckets examined and tombstones passed so far by the operation in progress, counted by the probe loops
+        # while stats are recorded and added to the statistics by _record_probe
+        self._probed = 0
+        self._tombstones_passed = 0
 
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
         """
+        self._finish_migration()
         out = ''
         for i in range(self._buckets.length()):
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
@@ -33,13 +120,34 @@ class HashMap:
         """
         Increment from given number to find the closest prime number
         """
-        if capacity % 2 == 0:
-            capacity += 1
+        prime = _NEXT_PRIME.get(capacity)
+        if prime is not None:
+            return prime
+
+        prime = capacity
+        if prime % 2 == 0:
+            prime += 1
 
-        while not self._is_prime(capacity):
-            capacity += 2
+        while not self._is_prime(prime):
+            prime += 2
 
-        return capacity
+        _NEXT_PRIME[capacity] = prime
+        return prime
+
+    @staticmethod
+    def _next_power_of_two(capacity: int) -> int:
+        """
+        Return the smallest power of two that is at least the given number
+        """
+        return 1 << max(capacity - 1, 0).bit_length()
+
+    def _next_capacity(self, capacity: int) -> int:
+        """
+        Return the smallest capacity allowed by the capacity policy that is at least the given number
+        """
+        if self._power_of_two:
+            return self._next_power_of_two(capacity)
+        return self._next_prime(capacity)
 
     @staticmethod
     def _is_prime(capacity: int) -> bool:
@@ -72,6 +180,12 @@ class HashMap:
         """
         return self._capacity
 
+    def tombstone_count(self) -> int:
+        """
+        Return the number of buckets holding a tombstone
+        """
+        return self._tombstones
+
     def put(self, key: str, value: object) -> None:
         """
         Updates the key/value pair in the hash map. If the given key already exists in the hash map, its associated
@@ -85,63 +199,85 @@ class HashMap:
 
         # 1 - If the current load factor of the table is greater than or equal to 0.5, the table must be resized to
         # double its current capacity
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
+
         if self.table_load() >= 0.5:
             self.resize_table(self._capacity * 2)
 
-        # 2 - The element is hashed and the remainder taken after dividing by the table size
-        ht_capacity = self._capacity
-        hash_function = self._hash_function
-        table = self._buckets
-
-        table_index = hash_function(key) % ht_capacity
-
-        # 3 - If the hash table located at the initial index is empty, insert the element there and stop
-        # Otherwise compute the next index using quadratic probing
-        if table[table_index] is None:
-            table[table_index] = HashEntry(key, value)
-            self._size += 1
-            return
-
-        # 3a - If indexed bucket is a tombstone, overwrite w/ HashEntry containing key/value at the indexed bucket and
-        # increment size
-        elif table[table_index].is_tombstone is True:
-            table[table_index] = HashEntry(key, value)
-            self._size += 1
-            return
+        # 1a - If live entries plus tombstones reach the compaction threshold, rehash at the same capacity to flush
+        # the tombstones. When the live entries alone are past the threshold compaction would not help, so grow.
+        elif self._tombstones and (self._size + self._tombstones) / self._capacity >= self._compact_threshold:
+            if self.table_load() >= self._compact_threshold:
+                self.resize_table(self._capacity * 2)
+            else:
+                self.resize_table(self._capacity)
 
-        # 3b - If indexed bucket holds matching key and is not a tombstone, overwrite its value and return
-        elif table[table_index].key == key and table[table_index].is_tombstone is False:
-            table[table_index].value = value
-            return
-
-        # 4 - Otherwise quadratic probe until finding a tombstone bucket, empty space, or matching key/non-tombstone
-        else:
-            j_val = 0
-            base_index = table_index
-            while True:
+        # 2 - The element is hashed and inserted into the table
+        key_hash = self._hash_function(key)
+        self._insert(key, value, key_hash)
 
-                j_val += 1
-
-                table_index = (base_index + j_val ** 2) % ht_capacity
-
-                # 4a - If the indexed bucket holds None, Insert HashEntry containing the key/value at the indexed bucket
-                # and decrement size
-                if table[table_index] is None:
-                    table[table_index] = HashEntry(key, value)
-                    self._size += 1
-                    return
-
-                # 4b - If indexed bucket is a tombstone, Insert HashEntry containing key/value at the indexed bucket i
-                # and increment size
-                if table[table_index].is_tombstone:
-                    table[table_index] = HashEntry(key, value)
-                    self._size += 1
-                    return
+        if self._stats is not None:
+            self._record_probe('put')
+        return
 
-                # 4c - If indexed bucket holds matching key and not a tombstone, update value of HashEntry and return
-                elif table[table_index].key == key and table[table_index].is_tombstone is False:
-                    table[table_index].value = value
-                    return
+    def _insert(self, key: str, value: object, key_hash: int) -> None:
+        """
+        Inserts the key/value pair, or updates the value of an existing key, without checking the load factor first.
+        Shared by put and put_many.
+        """
+        ht_capacity = self._capacity
+        table = self._buckets.data()
+
+        table_index = key_hash % ht_capacity
+
+        # 3 - Quadratic probe until finding an empty bucket or a live entry with a matching key. The first tombstone
+        # passed is remembered for reuse, but probing continues past it since the key may be stored further along.
+        probe_step = self._probe_step
+        step = 1 - probe_step
+        tombstone_index = None
+        tombstones = 0
+        while True:
+            entry = table[table_index]
+
+            if entry is None:
+                break
+
+            if entry.is_tombstone:
+                tombstones += 1
+                if tombstone_index is None:
+                    tombstone_index = table_index
+
+            # 3a - If indexed bucket holds matching key and is not a tombstone, overwrite its value and return
+            elif entry.hash == key_hash and entry.key == key:
+                entry.value = value
+                if self._stats is not None:
+                    self._count_probe(step, tombstones)
+                return
+
+            step += probe_step
+            table_index = (table_index + step) % ht_capacity
+
+        if self._stats is not None:
+            self._count_probe(step, tombstones)
+
+        # 3b - During a migration the key may still be live in the old table. Update it there; it moves across later
+        if self._old_buckets is not None:
+            old_index = self._find_index(self._old_buckets.data(), self._old_capacity, key, key_hash)
+            if old_index >= 0:
+                self._old_buckets[old_index].value = value
+                return
+
+        # 4 - The key is not in the table. Insert a HashEntry containing the key/value into the first tombstone
+        # passed, or else the empty bucket that ended the probe, and increment size
+        if tombstone_index is not None:
+            table_index = tombstone_index
+            self._tombstones -= 1
+
+        table[table_index] = HashEntry(key, value, key_hash)
+        self._size += 1
+        self._version += 1
+        return
 
     def resize_table(self, new_capacity: int) -> None:
         """
@@ -150,42 +286,135 @@ class HashMap:
         """
 
         # 1 - First check that new_capacity is not less than the current number of elements in the table, if so return
-        # and do nothing. If not, change it to the next highest prime number. (using is_prime and next_prime).
+        # and do nothing. If not, change it to the next highest prime number (using is_prime and next_prime), or power
+        # of two under the power_of_two policy.
         if new_capacity < self._size:
             return
+        elif self._power_of_two:
+            new_capacity = self._next_power_of_two(new_capacity)
         elif new_capacity == 2:
             new_capacity = 2
         elif not self._is_prime(new_capacity):
             new_capacity = self._next_prime(new_capacity)
 
-        # 2 - Initialize the new table and fill it with 'None'
-        new_table = DynamicArray()
+        # 2 - Re-inserting through put would have grown the table again once its load reached 0.5, so do the same
+        while self._size and (self._size - 1) / new_capacity >= 0.5:
+            new_capacity = self._next_capacity(new_capacity * 2)
 
-        for _ in range(new_capacity):
-            new_table.append(None)
+        # 3 - A migration still in progress is completed before the next resize begins
+        self._finish_migration()
 
-        # 2 - Iterate through each bucket of the old table, and initialize capacity and size for the new DA
-        arr = self._buckets
+        if self._incremental:
+            self._start_migration(new_capacity)
+        else:
+            self._rehash(new_capacity)
 
-        self._buckets = new_table
-        self._size = 0
+        return
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every live entry into a new table of new_capacity buckets, dropping tombstones. Entries are placed
+        directly rather than re-inserted through put: the keys are known to be distinct and the new table holds no
+        tombstones, so each one only needs to probe for the first empty bucket, and its HashEntry is reused.
+        """
+        start = perf_counter()
+
+        # 1 - Initialize the new table, filled with 'None'
+        new_buckets = DynamicArray.filled(new_capacity)
+        new_table = new_buckets.data()
+
+        # 2 - Quadratic probe each live entry of the old table into the first empty bucket of the new one, starting
+        # from the full hash cached on the entry
+        arr = self._buckets.data()
+        probe_step = self._probe_step
 
-        old_capacity = self._capacity
+        for index in range(self._capacity):
+            entry = arr[index]
+
+            if entry is not None and entry.is_tombstone is False:
+                table_index = entry.hash % new_capacity
+                step = 1 - probe_step
+                while new_table[table_index] is not None:
+                    step += probe_step
+                    table_index = (table_index + step) % new_capacity
+                new_table[table_index] = entry
+
+        self._buckets = new_buckets
         self._capacity = new_capacity
+        self._tombstones = 0
+        self._version += 1
 
-        for index in range(old_capacity):
+        if self._stats is not None:
+            self._record_resize(start, 1)
 
-            # 2a - if the index is not empty and is not a tombstone, extract the key and value
-            if arr[index] is not None:
+    def _start_migration(self, new_capacity: int) -> None:
+        """
+        Installs an empty table of new_capacity buckets and keeps the current one as the old table, to be moved
+        across a few buckets at a time by _migrate. Tombstones stay behind in the old table.
+        """
+        start = perf_counter()
+        new_table = DynamicArray.filled(new_capacity)
 
-                if arr[index].is_tombstone is False:
-                    key_value = arr[index].key
-                    value = arr[index].value
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._migrate_index = 0
 
-                    # 2a2 - Call the put method to put the key_value into the newly sized table.
-                    self.put(key_value, value)
+        self._buckets = new_table
+        self._capacity = new_capacity
+        self._tombstones = 0
+        self._version += 1
 
-        return
+        if self._stats is not None:
+            self._record_resize(start, 1)
+
+    def _migrate(self, count: int) -> None:
+        """
+        Moves the live entries of the next count buckets of the old table into the new one, and drops the old table
+        once all of its buckets have been moved. A key is only ever live in one of the two tables, so each entry goes
+        into the first empty or tombstone bucket of its probe sequence. The old slot is left holding _MOVED.
+        """
+        start = perf_counter() if self._stats is not None else 0.0
+
+        old = self._old_buckets.data()
+        table = self._buckets.data()
+        ht_capacity = self._capacity
+        probe_step = self._probe_step
+
+        index = self._migrate_index
+        stop = min(index + count, self._old_capacity)
+
+        while index < stop:
+            entry = old[index]
+
+            if entry is not None and entry.is_tombstone is False:
+                table_index = entry.hash % ht_capacity
+                step = 1 - probe_step
+                slot = table[table_index]
+                while slot is not None and slot.is_tombstone is False:
+                    step += probe_step
+                    table_index = (table_index + step) % ht_capacity
+                    slot = table[table_index]
+
+                if slot is not None:
+                    self._tombstones -= 1
+                table[table_index] = entry
+                old[index] = _MOVED
+
+            index += 1
+
+        self._migrate_index = index
+        if index == self._old_capacity:
+            self._old_buckets = None
+
+        if self._stats is not None:
+            self._record_resize(start, 0)
+
+    def _finish_migration(self) -> None:
+        """
+        Moves all remaining buckets of an in-progress migration into the new table.
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
 
     def table_load(self) -> float:
         """
@@ -214,7 +443,9 @@ class HashMap:
         Returns the number of empty buckets in the hash table.
         """
 
-        arr = self._buckets
+        self._finish_migration()
+
+        arr = self._buckets.data()
         ht_capacity = self._capacity
 
         empty_count = 0
@@ -234,37 +465,29 @@ class HashMap:
         It has O(1) time complexity.
         """
 
-        # 1 - The element is hashed and the remainder taken after dividing by the table size
-        ht_capacity = self._capacity
-        table = self._buckets
-        hash_function = self._hash_function
-
-        table_index = hash_function(key) % ht_capacity
-
-        # 2 - If the bucket located at the initial index is empty, the key is not in the table. Return None
-        if table[table_index] is None:
-            return None
+        # 1 - The element is hashed and its bucket found by quadratic probing from the remainder after dividing by
+        # the table size
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
 
-        # 2a - if the key is a match, and it is not a tombstone, return the associated value
-        elif table[table_index].key == key and table[table_index].is_tombstone is False:
-            return table[table_index].value
+        table = self._buckets.data()
+        key_hash = self._hash_function(key)
+        table_index = self._find_index(table, self._capacity, key, key_hash)
 
-        # Otherwise we compute the next index using quadratic probing
-        else:
-            j_val = 0
-            base_index = table_index
-            while True:
-                j_val += 1
+        # 1a - During a migration a key not found in the new table may still be in the old one
+        if table_index < 0 and self._old_buckets is not None:
+            table = self._old_buckets.data()
+            table_index = self._find_index(table, self._old_capacity, key, key_hash)
 
-                table_index = (base_index + j_val ** 2) % ht_capacity
+        if self._stats is not None:
+            self._record_probe('get')
 
-                # if the probe finds None, return none because it means key is not in the hash map
-                if table[table_index] is None:
-                    return None
+        # 2 - If the probe reached an empty bucket, the key is not in the table. Return None
+        if table_index < 0:
+            return None
 
-                # 3a - If the loop exited due to finding a matching key, return the value in its associated HashEntry
-                if table[table_index].key == key and table[table_index].is_tombstone is False:
-                    return table[table_index].value
+        # 3 - Otherwise return the value in its associated HashEntry
+        return table[table_index].value
 
     def contains_key(self, key: str) -> bool:
         """
@@ -274,40 +497,20 @@ class HashMap:
         It has O(1) Time Complexity.
         """
 
-        size = self._size
-        ht_capacity = self._capacity
-        hash_function = self._hash_function
-        table = self._buckets
-
         # 1 - If the hash map is empty, return False
-        if size == 0:
-            return False
-
-        # 2 - the input key is hashed and the remainder taken after dividing by the table size
-        table_index = hash_function(key) % ht_capacity
-
-        # 2a - If the bucket located at the initial index is empty return False
-        if table[table_index] is None:
+        if self._size == 0:
             return False
 
-        # 2a - if the initial index has a key match, and it is not a tombstone, return the associated value
-        elif table[table_index].key == key and table[table_index].is_tombstone is False:
-            return True
-
-        # Otherwise we compute the next index using quadratic probing
-        else:
-            j_val = 0
-            base_index = table_index
-            while True:
-                j_val += 1
-
-                table_index = (base_index + j_val ** 2) % ht_capacity
-
-                if table[table_index] is None:
-                    return False
+        # 2 - Return True if probing from the hashed index finds a live entry with a matching key, in the new table or
+        # during a migration in the old one
+        key_hash = self._hash_function(key)
+        found = self._find_index(self._buckets.data(), self._capacity, key, key_hash) >= 0 or \
+            self._old_buckets is not None and \
+            self._find_index(self._old_buckets.data(), self._old_capacity, key, key_hash) >= 0
 
-                if table[table_index].key == key and table[table_index].is_tombstone is False:
-                    return True
+        if self._stats is not None:
+            self._record_probe('get')
+        return found
 
     def remove(self, key: str) -> None:
         """
@@ -317,45 +520,275 @@ class HashMap:
         It has O(1) time complexity.
         """
 
-        size = self._size
-        ht_capacity = self._capacity
-        table = self._buckets
-        hash_function = self._hash_function
-
         # 1 - If the hash map is empty, return
-        if size == 0:
+        if self._size == 0:
             return
 
-        # 2 - the input key is hashed and the remainder taken after dividing by the table size
-        table_index = hash_function(key) % ht_capacity
+        # 2 - Probe from the hashed index for a live entry with a matching key
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
+
+        table = self._buckets.data()
+        key_hash = self._hash_function(key)
+        table_index = self._find_index(table, self._capacity, key, key_hash)
+
+        # 2a - During a migration a key not found in the new table may still be in the old one. Tombstones left in
+        # the old table are discarded with it, so they are not counted
+        if table_index < 0 and self._old_buckets is not None:
+            old_index = self._find_index(self._old_buckets.data(), self._old_capacity, key, key_hash)
+            if old_index >= 0:
+                self._old_buckets[old_index].is_tombstone = True
+                self._size -= 1
+                self._version += 1
+
+        if self._stats is not None:
+            self._record_probe('remove')
 
-        # 2a - If the bucket located at the initial index is empty return
-        if table[table_index] is None:
+        if table_index < 0:
             return
 
-        # 2b - if the initial index has a key match, and it is not a tombstone, make it a tombstone and decrement size
-        if table[table_index].key == key and table[table_index].is_tombstone is False:
-            table[table_index].is_tombstone = True
-            self._size -= 1
+        # 3 - Otherwise make it a tombstone, decrement size and count the tombstone
+        table[table_index].is_tombstone = True
+        self._size -= 1
+        self._tombstones += 1
+        self._version += 1
+        return
+
+    def _find_index(self, table: list, ht_capacity: int, key: str, key_hash: int) -> int:
+        """
+        Quadratic probes the table, the list behind a bucket array, for a live entry with the given key and returns its
+        index, or -1 if the probe reaches an empty bucket first. Entries whose cached hash differs are passed over
+        without comparing keys.
+
+        A small table can have every bucket of a probe sequence occupied, so the probe also gives up once it has made
+        as many steps as there are buckets, by which point the sequence has started to repeat.
+
+        While stats are recorded the probe is made by _find_index_counted instead.
+        """
+        if self._stats is not None:
+            return self._find_index_counted(table, ht_capacity, key, key_hash)
+
+        table_index = key_hash % ht_capacity
+        probe_step = self._probe_step
+        step = 1 - probe_step
+        last_step = ht_capacity * probe_step
+
+        entry = table[table_index]
+        while entry is not None:
+            if entry.hash == key_hash and entry.key == key and entry.is_tombstone is False:
+                return table_index
+
+            step += probe_step
+            if step > last_step:
+                return -1
+
+            table_index = (table_index + step) % ht_capacity
+            entry = table[table_index]
+
+        return -1
+
+    def _find_index_counted(self, table: list, ht_capacity: int, key: str, key_hash: int) -> int:
+        """
+        The probe of _find_index, also counting the buckets it examines and the tombstones it passes towards the
+        operation in progress (see _count_probe).
+        """
+        table_index = key_hash % ht_capacity
+        probe_step = self._probe_step
+        step = 1 - probe_step
+        last_step = ht_capacity * probe_step
+        tombstones = 0
+        found = -1
+
+        entry = table[table_index]
+        while entry is not None:
+            if entry.is_tombstone:
+                tombstones += 1
+            elif entry.hash == key_hash and entry.key == key:
+                found = table_index
+                break
+
+            if step + probe_step > last_step:
+                break
+
+            step += probe_step
+            table_index = (table_index + step) % ht_capacity
+            entry = table[table_index]
+
+        self._count_probe(step, tombstones)
+        return found
+
+    def _count_probe(self, step: int, tombstones: int) -> None:
+        """
+        Adds a probe that ended on the given step, and the tombstones it passed, to the counts of the operation in
+        progress. A probe's steps grow by _probe_step from 1 - _probe_step on its first bucket, so the step it ended
+        on gives the number of buckets it examined.
+        """
+        self._probed += (step - 1) // self._probe_step + 2
+        self._tombstones_passed += tombstones
+
+    def _record_probe(self, operation: str) -> None:
+        """
+        Adds the buckets examined by the given operation, over every probe it made in either table, and the tombstones
+        it passed to the recorded statistics, and resets the counts for the next operation.
+        """
+        histogram = self._stats['probes'][operation]
+        histogram[self._probed] = histogram.get(self._probed, 0) + 1
+        self._stats['probe_sequences'] += 1
+        self._stats['tombstones_seen'] += self._tombstones_passed
+        self._probed = 0
+        self._tombstones_passed = 0
+
+    def _record_resize(self, start: float, resizes: int) -> None:
+        """
+        Adds the time since start, and the given number of resizes, to the recorded statistics.
+        """
+        self._stats['resizes'] += resizes
+        self._stats['resize_seconds'] += perf_counter() - start
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the map's statistics as a dictionary. The size, capacity, load factor, tombstone and
+        empty bucket counts are always included. If the map was created with stats=True, the snapshot also holds the
+        number of resizes and the time spent on them (including incremental migration), a histogram of buckets
+        examined per get, put and remove, and the average number of tombstones passed per operation. Lookups by
+        contains_key count as gets, the keys of put_many, get_many and remove_many as one operation each, and the
+        buckets of both tables are counted for an operation made during a migration.
+        """
+        table = self._buckets.data()
+        empty = 0
+        for index in range(self._capacity):
+            if table[index] is None:
+                empty += 1
+
+        snapshot = {
+            'size': self._size,
+            'capacity': self._capacity,
+            'table_load': self.table_load(),
+            'tombstones': self._tombstones,
+            'empty_buckets': empty,
+            'migrating': self._old_buckets is not None,
+        }
+
+        recorded = self._stats
+        if recorded is not None:
+            snapshot['resizes'] = recorded['resizes']
+            snapshot['resize_seconds'] = recorded['resize_seconds']
+            snapshot['probes'] = {operation: dict(sorted(histogram.items()))
+                                  for operation, histogram in recorded['probes'].items()}
+            snapshot['tombstones_per_probe'] = recorded['tombstones_seen'] / max(1, recorded['probe_sequences'])
+
+        return snapshot
+
+    def put_many(self, pairs, hash_batch: callable = None) -> None:
+        """
+        Puts every (key, value) pair of pairs into the hash map, as put would one at a time. The table is resized or
+        compacted once up front so the whole batch fits, every key is hashed in one batch, and the pairs are then
+        inserted without any further load checks.
+
+        hash_batch, if given, is called with the list of keys and returns their hashes, like
+        a6_include.batch_hash_function_1. It must hash them as the map's hash function does, with its seed if it has
+        one, but without mix_hash, which the map applies itself; ValueError is raised if the first key shows otherwise.
+        By default the map's hash function is passed to a6_include.batch_hash.
+        """
+        pairs = _materialize(pairs)
+        if not pairs:
             return
 
-        # 3 - Otherwise Quadratic probe until finding a table_index that is either none or has a matching key
-        else:
-            j_val = 0
-            base_index = table_index
-            while True:
-                j_val += 1
-                table_index = (base_index + j_val ** 2) % ht_capacity
-
-                # 3a - If the table index holds nothing, the value is not in the hash table and we return.
-                if table[table_index] is None:
-                    return
-
-                # 3b - if the probed index has a key match, and is not a tombstone, make it a tombstone, decrement size
-                if table[table_index].key == key and table[table_index].is_tombstone is False:
-                    table[table_index].is_tombstone = True
-                    self._size -= 1
-                    return
+        # 1 - Finish any migration. If inserting the whole batch could take live entries plus tombstones to the
+        # compaction threshold, rehash once, growing until the live entries alone stay below it
+        self._finish_migration()
+        needed = self._size + len(pairs)
+        threshold = self._compact_threshold
+
+        if (needed + self._tombstones - 1) / self._capacity >= threshold:
+            new_capacity = self._capacity
+            while (needed - 1) / new_capacity >= threshold:
+                new_capacity = self._next_capacity(new_capacity * 2)
+            self._rehash(new_capacity)
+
+        # 2 - Hash all keys up front, then insert or update each pair
+        keys = [pair[0] for pair in pairs]
+        hashes = self._hash_batch(keys, hash_batch)
+
+        insert = self._insert
+        recording = self._stats is not None
+        for (key, value), key_hash in zip(pairs, hashes):
+            insert(key, value, key_hash)
+            if recording:
+                self._record_probe('put')
+
+    def _hash_batch(self, keys: list, hash_batch: callable = None) -> list:
+        """
+        Returns the hashes of keys, from hash_batch if one is given or else from the map's hash function. Hashes from
+        hash_batch are passed through mix_hash whenever the map mixes its own. Raises ValueError if hash_batch returns
+        the wrong number of hashes, or a hash for the first key that differs from the map's hash function.
+        """
+        if hash_batch is None:
+            return batch_hash(self._hash_function, keys)
+
+        hashes = hash_batch(keys)
+        if self._mix_hashes:
+            hashes = [mix_hash(key_hash) for key_hash in hashes]
+
+        # Keys hashed by a function other than the map's would be stored where get never looks for them
+        if len(hashes) != len(keys) or hashes[0] != self._hash_function(keys[0]):
+            raise ValueError('hash_batch does not hash keys as the hash function of the map does')
+        return hashes
+
+    def get_many(self, keys, hash_batch: callable = None) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key of keys, in order, with None for keys that are not in
+        the hash map. Keys are hashed in one batch, as in put_many.
+        """
+        keys = _materialize(keys)
+        results = DynamicArray.filled(len(keys))
+        if not keys or self._size == 0:
+            return results
+
+        self._finish_migration()
+        hashes = self._hash_batch(keys, hash_batch)
+
+        table = self._buckets.data()
+        ht_capacity = self._capacity
+        find_index = self._find_index
+
+        recording = self._stats is not None
+
+        for index in range(len(keys)):
+            table_index = find_index(table, ht_capacity, keys[index], hashes[index])
+            if table_index >= 0:
+                results[index] = table[table_index].value
+            if recording:
+                self._record_probe('get')
+
+        return results
+
+    def remove_many(self, keys, hash_batch: callable = None) -> None:
+        """
+        Removes every key of keys from the hash map, ignoring keys that are not in it. Keys are hashed in one batch,
+        as in put_many.
+        """
+        keys = _materialize(keys)
+        if not keys or self._size == 0:
+            return
+
+        self._finish_migration()
+        hashes = self._hash_batch(keys, hash_batch)
+
+        table = self._buckets.data()
+        ht_capacity = self._capacity
+        find_index = self._find_index
+        recording = self._stats is not None
+
+        for key, key_hash in zip(keys, hashes):
+            table_index = find_index(table, ht_capacity, key, key_hash)
+            if recording:
+                self._record_probe('remove')
+            if table_index >= 0:
+                table[table_index].is_tombstone = True
+                self._size -= 1
+                self._tombstones += 1
+                self._version += 1
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -363,63 +796,139 @@ class HashMap:
         of the keys in the dynamic array does not matter.
         """
 
-        # 1 - Initialize a Dynamic Array object
-        arr = DynamicArray()
-
-        # 2 - Iterate through the hash map, appending each key value pair as a tuple in the Dynamic Array.
-        for active_element in self:
-            arr.append((active_element.key, active_element.value))
-
-        return arr
+        # 1 - Collect each live key/value pair as a tuple in one pass over the table, then wrap them in a Dynamic Array
+        return DynamicArray((entry.key, entry.value) for entry in self._entries())
 
     def clear(self) -> None:
         """
         Clears the contents of the hash map. It does not change the underlying hash table capacity.
         """
 
-        # 1 - Create a new Dynamic Array at self._buckets
-        self._buckets = DynamicArray()
-
-        # 2 - Append 'None'
-        for _ in range(self._capacity):
-            self._buckets.append(None)
+        # 1 - Create a new Dynamic Array at self._buckets, filled with 'None'
+        self._buckets = DynamicArray.filled(self._capacity)
 
-        # reset size to 0
+        # reset size and tombstone count to 0 and abandon any migration in progress
         self._size = 0
+        self._tombstones = 0
+        self._old_buckets = None
+        self._version += 1
 
         return
 
     def __iter__(self):
         """
-        This method enables the hash map to iterate across itself. Uses a variable to track the iterators
-        progress through the hash map's contents.
+        Returns a new iterator over the live entries of the hash map, each a HashEntry. Every iterator keeps its own
+        position, so iterations can be nested or run side by side. Adding or removing a key, clearing or resizing the
+        map while an iterator is in use makes its next step raise RuntimeError; updating the value of a key does not.
         """
+        return self._entries()
 
-        self._index = 0
+    def _entries(self):
+        """
+        Generator behind every iteration of the hash map. The table's list is scanned directly, without a bounds check
+        per bucket, and the version is compared after each entry is handed out to detect changes to the map.
+        """
+        self._finish_migration()
+        version = self._version
+
+        for entry in self._buckets.data():
+            if entry is not None and entry.is_tombstone is False:
+                yield entry
+                if self._version != version:
+                    raise RuntimeError('hash map changed during iteration')
+
+    def keys(self):
+        """
+        Returns an iterator over the keys of the hash map, in table order
+        """
+        for entry in self._entries():
+            yield entry.key
 
-        return self
+    def values(self):
+        """
+        Returns an iterator over the values of the hash map, in table order
+        """
+        for entry in self._entries():
+            yield entry.value
+
+    def items(self):
+        """
+        Returns an iterator over the (key, value) pairs of the hash map, in table order
+        """
+        for entry in self._entries():
+            yield entry.key, entry.value
 
-    def __next__(self):
+    def save(self, path: str) -> None:
         """
-        This method returns the next item in the hash map, based on the current location of the iterator. It only
-        iterates over active items.
+        Writes a snapshot of the hash map to path, to be read back by load.
         """
+        self.snapshot().write(path)
+
+    def snapshot(self) -> Snapshot:
+        """
+        Returns a snapshot of the hash map (see a6_include.Snapshot): its capacity, hash function and capacity policy,
+        every live entry with its cached hash and bucket index, and the bucket index of every tombstone. The
+        tombstones are kept because entries beyond them in a probe sequence are only found by probing past them. The
+        hash function must be one of those in a6_include.HASH_FUNCTIONS so that load can find it again, and not
+        builtin_hash, whose string hashes differ between processes.
+        """
+        self._finish_migration()
+        snapshot = Snapshot('oa', self._capacity, hash_function_name(self._hash_function), self._seed,
+                            self._power_of_two)
+
+        table = self._buckets.data()
+        for index in range(self._capacity):
+            entry = table[index]
+            if entry is None:
+                continue
+
+            if entry.is_tombstone:
+                snapshot.tombstones.append(index)
+            else:
+                snapshot.add(index, entry.hash, entry.key, entry.value)
+
+        return snapshot
+
+    @classmethod
+    def load(cls, path: str, **options) -> "HashMap":
+        """
+        Returns a new hash map holding the contents of a snapshot written by save. Every entry is placed straight into
+        its saved bucket with its saved hash, so no key is hashed and nothing is probed. options are passed on to the
+        constructor, such as compact_threshold or stats; function, seed and capacity_policy may be passed too, but only
+        with their saved values.
+        """
+        snapshot = Snapshot.read(path)
+        if snapshot.kind != 'oa':
+            raise ValueError(path + ' is not a snapshot of an open addressing HashMap')
+
+        hash_map = cls(1, **snapshot.map_options(**options))
+
+        # 1 - Build a table of the saved capacity, which is already a prime or power of two
+        table = DynamicArray.filled(snapshot.capacity)
+
+        # 2 - Put every entry and tombstone back in its bucket
+        hashes = snapshot.hashes
+        positions = snapshot.positions
+        keys = snapshot.keys
+        values = snapshot.values
 
-        index = self._index
-        da = self._buckets
+        for index in range(len(keys)):
+            table[positions[index]] = HashEntry(keys[index], values[index], hashes[index])
 
-        try:
-            value = da[index]
-        except DynamicArrayException:
-            raise StopIteration
+        for index in snapshot.tombstones:
+            tombstone = HashEntry(None, None)
+            tombstone.is_tombstone = True
+            table[index] = tombstone
 
-        while value is None or value.is_tombstone is True:
-            self._index += 1
-            try:
-                value = da[self._index]
-            except DynamicArrayException:
-                raise StopIteration
+        hash_map._buckets = table
+        hash_map._capacity = snapshot.capacity
+        hash_map._size = len(keys)
+        hash_map._tombstones = len(snapshot.tombstones)
+        return hash_map
 
-        self._index += 1
 
-        return value
+def _materialize(items) -> list:
+    """
+    Return the contents of a DynamicArray or any other iterable as a list, for the batch methods
+    """
+    return list(items)
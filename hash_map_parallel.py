@@ -0,0 +1,151 @@
+
+import mmap
+import os
+from multiprocessing import Pool
+
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+
+
+# Bytes of a file given to each worker task. Files are cut into many more slices than there are workers, so a slow
+# slice doesn't hold up the others and no task holds more than this much of the file at once
+SLICE_BYTES = 32 << 20
+
+# Elements counted per increment_many batch within a task
+CHUNK_SIZE = 4096
+
+
+def _count(elements: list, function: callable, chunk_size: int) -> list:
+    """
+    Count the elements into a local separate chaining HashMap and return its (element, count) pairs
+    """
+    counts = hash_map_sc.HashMap(function=function)
+    for start in range(0, len(elements), chunk_size):
+        counts.increment_many(elements[start:start + chunk_size])
+    return list(counts.get_keys_and_values())
+
+
+def _count_partition(task: tuple) -> list:
+    """
+    Worker task: count one partition of a DynamicArray or list
+    """
+    elements, function, chunk_size = task
+    return _count(elements, function, chunk_size)
+
+
+def _count_slice(task: tuple) -> list:
+    """
+    Worker task: count the lines of one byte range of a file. The range is widened to whole lines: a line belongs to
+    the slice it starts in, so a slice skips a line cut by its start and finishes a line cut by its end.
+    """
+    path, start, end, encoding, function, chunk_size = task
+
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        size = len(view)
+
+        # 1 - Move start past the line it cuts into, unless it is already at the start of a line
+        if start > 0:
+            newline = view.find(b'\n', start - 1)
+            start = size if newline == -1 else newline + 1
+
+        if start >= end:
+            return []
+
+        # 2 - Move end past the newline of the line holding its last byte
+        newline = view.find(b'\n', end - 1)
+        end = size if newline == -1 else newline + 1
+
+        text = view[start:end].decode(encoding)
+
+    # 3 - Split on newlines only, dropping the empty piece after a final newline and the carriage return of CRLF lines
+    lines = text.split('\n')
+    if text.endswith('\n'):
+        lines.pop()
+    if '\r' in text:
+        lines = [line[:-1] if line.endswith('\r') else line for line in lines]
+
+    return _count(lines, function, chunk_size)
+
+
+def _merge(counts: hash_map_sc.HashMap, results) -> None:
+    """
+    Add the (element, count) pairs of every local table to counts
+    """
+    increment = counts.increment
+    for pairs in results:
+        for key, count in pairs:
+            increment(key, count)
+
+
+def count_frequencies(source,
+                      workers: int = None,
+                      function: callable = hash_function_1,
+                      encoding: str = 'utf-8',
+                      slice_bytes: int = SLICE_BYTES,
+                      chunk_size: int = CHUNK_SIZE) -> hash_map_sc.HashMap:
+    """
+    Counts how often each element of source occurs, using a pool of worker processes, and returns a separate chaining
+    HashMap of element -> count.
+
+    source is either a DynamicArray (or list) of strings, which is split into one partition per worker, or the path of
+    a text file, whose lines are the elements. A file is memory-mapped by the workers and cut into slices of at most
+    slice_bytes, and at least four per worker when there is more than one, so only the slice boundaries are passed to
+    them. Each worker counts its part into a local HashMap with HashMap.increment_many, and the local tables are merged
+    into one at the end.
+
+    workers defaults to one per CPU. With a single worker everything is counted in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError('workers must be at least 1')
+    if slice_bytes < 1 or chunk_size < 1:
+        raise ValueError('slice_bytes and chunk_size must be at least 1')
+
+    # 1 - Split the input into tasks
+    if isinstance(source, (str, os.PathLike)):
+        size = os.path.getsize(source)
+        if workers > 1:
+            slice_bytes = max(1, min(slice_bytes, -(-size // (workers * 4))))
+        task = _count_slice
+        tasks = [(source, start, min(start + slice_bytes, size), encoding, function, chunk_size)
+                 for start in range(0, size, slice_bytes)]
+    else:
+        elements = hash_map_sc._materialize(source)
+        step = max(1, -(-len(elements) // workers))
+        task = _count_partition
+        tasks = [(elements[start:start + step], function, chunk_size) for start in range(0, len(elements), step)]
+
+    # 2 - Count the tasks, in worker processes unless only one is wanted, merging each local table into the result
+    # as it arrives
+    counts = hash_map_sc.HashMap(function=function)
+
+    if workers == 1 or len(tasks) <= 1:
+        _merge(counts, map(task, tasks))
+    else:
+        with Pool(min(workers, len(tasks))) as pool:
+            _merge(counts, pool.imap_unordered(task, tasks))
+
+    return counts
+
+
+def find_mode(source, workers: int = None, function: callable = hash_function_1, **options) -> tuple[DynamicArray, int]:
+    """
+    Returns a tuple of a dynamic array of the mode value(s) of source and their frequency, as hash_map_sc.find_mode
+    does, counting with count_frequencies across worker processes. source is a DynamicArray or the path of a text file
+    with one element per line. options are passed on to count_frequencies.
+
+    A source with no elements gives an empty dynamic array and a frequency of 0.
+    """
+    counts = count_frequencies(source, workers, function, **options)
+
+    # 1 - Find the highest count, then collect every element counted that often
+    pairs = counts.get_keys_and_values()
+    highest = 0
+    for key, count in pairs:
+        if count > highest:
+            highest = count
+
+    mode_da = DynamicArray(key for key, count in pairs if count == highest)
+
+    return mode_da, highest
@@ -0,0 +1,330 @@
+
+import hash_map_compact
+from a6_include import DynamicArray, Snapshot, hash_function_name
+from hash_map_compact import EMPTY, LIVE, HASH_MASK
+
+
+class HashMap(hash_map_compact.HashMap):
+    """
+    Open addressing HashMap using Robin Hood hashing over the flat array layout of hash_map_compact.HashMap.
+
+    Keys are placed by linear probing, but an inserted key takes over any slot whose occupant is closer to its own
+    home slot, and the displaced occupant moves on instead. This keeps every key's probe distance close to the
+    average, so the table can run at a load factor of 0.9. A lookup stops as soon as it reaches a slot whose
+    occupant is closer to home than the key would be at that point, since the key can't be any further along.
+    Removal shifts the following displaced entries back one slot instead of leaving a tombstone.
+
+    It has the same API as hash_map_oa.HashMap, so the two can be swapped for comparison, apart from the options
+    that only apply to quadratic probing or to incremental resizing. The batch methods put, get or remove one key
+    at a time, and stats() reports a histogram of probe distances rather than of probes per operation.
+    """
+
+    def __init__(self, capacity: int, function, max_load: float = 0.9, seed: int = None) -> None:
+        """
+        Initialize new HashMap that uses
+        Robin Hood linear probing for collision resolution
+
+        The table is doubled when an insert would take the load factor above max_load, which must be greater than 0
+        and less than 1.
+        """
+        if not 0 < max_load < 1:
+            raise ValueError('max_load must be in the range (0, 1)')
+
+        super().__init__(capacity, function, seed=seed)
+        self._max_load = max_load
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map. If the given key already exists in the hash map, its associated
+        value is replaced with the new value. If the given key is not in the hash map, a new key/value pair is added.
+
+        When adding a pair would take the load factor above max_load, the table is resized to double its current
+        capacity first.
+        """
+        if self._size + 1 > self._max_load * self._capacity:
+            self.resize_table(self._capacity * 2)
+
+        ht_capacity = self._capacity
+        hashes = self._hashes
+        keys = self._keys
+        states = self._states
+
+        key_hash = self._hash_function(key) & HASH_MASK
+        table_index = key_hash % ht_capacity
+        distance = 0
+
+        # 1 - Probe for the key until reaching an empty slot, or a slot whose occupant is closer to home than the key
+        # would be there. Either way the key is not in the table and belongs in that slot
+        while states[table_index] == LIVE:
+            slot_hash = hashes[table_index]
+            if slot_hash == key_hash and keys[table_index] == key:
+                self._values[table_index] = value
+                return
+
+            if (table_index - slot_hash) % ht_capacity < distance:
+                break
+
+            table_index += 1
+            if table_index == ht_capacity:
+                table_index = 0
+            distance += 1
+
+        # 2 - Insert the pair there, carrying any occupant forward to the next slot it can take over
+        self._place(table_index, distance, key_hash, key, value)
+        self._size += 1
+
+    def _place(self, table_index: int, distance: int, key_hash: int, key: str, value: object) -> None:
+        """
+        Stores a key known not to be in the table at table_index, where it is distance slots from home. Each
+        occupant it displaces is carried forward in the same way until an empty slot is reached.
+        """
+        ht_capacity = self._capacity
+        hashes = self._hashes
+        keys = self._keys
+        values = self._values
+        states = self._states
+
+        while states[table_index] == LIVE:
+            slot_distance = (table_index - hashes[table_index]) % ht_capacity
+            if slot_distance < distance:
+                key_hash, hashes[table_index] = hashes[table_index], key_hash
+                key, keys[table_index] = keys[table_index], key
+                value, values[table_index] = values[table_index], value
+                distance = slot_distance
+
+            table_index += 1
+            if table_index == ht_capacity:
+                table_index = 0
+            distance += 1
+
+        hashes[table_index] = key_hash
+        keys[table_index] = key
+        values[table_index] = value
+        states[table_index] = LIVE
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the underlying table. All key/value pairs are moved into the new table.
+        """
+        # 1 - Ignore capacities smaller than the number of elements, otherwise round up to a prime
+        if new_capacity < self._size:
+            return
+        elif new_capacity == 2:
+            new_capacity = 2
+        elif not self._is_prime(new_capacity):
+            new_capacity = self._next_prime(new_capacity)
+
+        # 2 - Keep the load factor within max_load
+        while self._size > self._max_load * new_capacity:
+            new_capacity = self._next_prime(new_capacity * 2)
+
+        self._rehash(new_capacity)
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every entry into new arrays of new_capacity slots using Robin Hood placement from the stored hash.
+        """
+        old_hashes = self._hashes
+        old_keys = self._keys
+        old_values = self._values
+        old_states = self._states
+        old_capacity = self._capacity
+
+        self._allocate(new_capacity)
+        self._capacity = new_capacity
+
+        for index in range(old_capacity):
+            if old_states[index] == LIVE:
+                key_hash = old_hashes[index]
+                self._place(key_hash % new_capacity, 0, key_hash, old_keys[index], old_values[index])
+
+    def _find_index(self, key: str) -> int:
+        """
+        Returns the index of the slot holding the given key, or -1 if the probe reaches an empty slot or a slot whose
+        occupant is closer to home than the key would be.
+        """
+        ht_capacity = self._capacity
+        hashes = self._hashes
+        keys = self._keys
+        states = self._states
+
+        key_hash = self._hash_function(key) & HASH_MASK
+        table_index = key_hash % ht_capacity
+        distance = 0
+
+        while states[table_index] == LIVE:
+            slot_hash = hashes[table_index]
+            if slot_hash == key_hash and keys[table_index] == key:
+                return table_index
+
+            if (table_index - slot_hash) % ht_capacity < distance:
+                return -1
+
+            table_index += 1
+            if table_index == ht_capacity:
+                table_index = 0
+            distance += 1
+
+        return -1
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map. If the key is not in the hash map the
+        method does nothing. Entries after it that are away from their home slot are shifted back by one, so no
+        tombstone is left behind.
+        """
+        if self._size == 0:
+            return
+
+        table_index = self._find_index(key)
+        if table_index < 0:
+            return
+
+        ht_capacity = self._capacity
+        hashes = self._hashes
+        keys = self._keys
+        values = self._values
+        states = self._states
+
+        # Backward shift deletion: pull each following displaced entry into the gap until reaching an empty slot or
+        # an entry already in its home slot
+        next_index = table_index + 1 if table_index + 1 < ht_capacity else 0
+        while states[next_index] == LIVE and hashes[next_index] % ht_capacity != next_index:
+            hashes[table_index] = hashes[next_index]
+            keys[table_index] = keys[next_index]
+            values[table_index] = values[next_index]
+            table_index = next_index
+            next_index = table_index + 1 if table_index + 1 < ht_capacity else 0
+
+        states[table_index] = EMPTY
+        keys[table_index] = None
+        values[table_index] = None
+        self._size -= 1
+
+    def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) pair of pairs into the hash map, as put would one at a time.
+        """
+        for key, value in pairs:
+            self.put(key, value)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key of keys, in order, with None for keys that are not in
+        the hash map.
+        """
+        return DynamicArray(self.get(key) for key in keys)
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key of keys from the hash map, ignoring keys that are not in it.
+        """
+        for key in keys:
+            self.remove(key)
+
+    def keys(self):
+        """
+        Returns an iterator over the keys of the hash map, in table order
+        """
+        for entry in self:
+            yield entry.key
+
+    def values(self):
+        """
+        Returns an iterator over the values of the hash map, in table order
+        """
+        for entry in self:
+            yield entry.value
+
+    def items(self):
+        """
+        Returns an iterator over the (key, value) pairs of the hash map, in table order
+        """
+        for entry in self:
+            yield entry.key, entry.value
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the map's statistics as a dictionary: the size, capacity, load factor, tombstone and
+        empty slot counts, as hash_map_oa.HashMap.stats reports them, and the distribution of probe distances over the
+        keys (distance from home slot -> number of keys), which is the number of extra slots a lookup of each key
+        examines.
+        """
+        ht_capacity = self._capacity
+        hashes = self._hashes
+        states = self._states
+        distances = {}
+
+        for index in range(ht_capacity):
+            if states[index] == LIVE:
+                distance = (index - hashes[index]) % ht_capacity
+                distances[distance] = distances.get(distance, 0) + 1
+
+        return {
+            'size': self._size,
+            'capacity': ht_capacity,
+            'table_load': self.table_load(),
+            'tombstones': 0,
+            'empty_buckets': self.empty_buckets(),
+            'migrating': False,
+            'probe_distances': dict(sorted(distances.items())),
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Writes a snapshot of the hash map to path, to be read back by load.
+        """
+        self.snapshot().write(path)
+
+    def snapshot(self) -> Snapshot:
+        """
+        Returns a snapshot of the hash map (see a6_include.Snapshot): its capacity and hash function, and every key
+        with its stored hash and slot index. The hash function must be one of those in a6_include.HASH_FUNCTIONS so
+        that load can find it again, and not builtin_hash, whose string hashes differ between processes.
+        """
+        snapshot = Snapshot('rh', self._capacity, hash_function_name(self._hash_function), self._seed)
+
+        hashes = self._hashes
+        keys = self._keys
+        values = self._values
+        states = self._states
+
+        for index in range(self._capacity):
+            if states[index] == LIVE:
+                snapshot.add(index, hashes[index], keys[index], values[index])
+
+        return snapshot
+
+    @classmethod
+    def load(cls, path: str, **options) -> "HashMap":
+        """
+        Returns a new hash map holding the contents of a snapshot written by save. Every key is put straight back into
+        its saved slot with its saved hash, so no key is hashed and nothing is displaced. options are passed on to the
+        constructor, such as max_load; function and seed may be passed too, but only with their saved values.
+        """
+        snapshot = Snapshot.read(path)
+        if snapshot.kind != 'rh':
+            raise ValueError(path + ' is not a snapshot of a Robin Hood HashMap')
+
+        # The saved map's capacity is always prime, which is all its capacity_policy says
+        options = snapshot.map_options(**options)
+        del options['capacity_policy']
+        hash_map = cls(1, **options)
+
+        hash_map._allocate(snapshot.capacity)
+        hash_map._capacity = snapshot.capacity
+
+        hashes = hash_map._hashes
+        keys = hash_map._keys
+        values = hash_map._values
+        states = hash_map._states
+
+        for index in range(len(snapshot.keys)):
+            position = snapshot.positions[index]
+            hashes[position] = snapshot.hashes[index]
+            keys[position] = snapshot.keys[index]
+            values[position] = snapshot.values[index]
+            states[position] = LIVE
+
+        hash_map._size = len(snapshot.keys)
+        return hash_map
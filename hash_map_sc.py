@@ -1,30 +1,121 @@
+from itertools import islice
+from time import perf_counter
 
-from a6_include import (DynamicArray, LinkedList,
-                        hash_function_1, hash_function_2)
+from a6_include import (DynamicArray, LinkedList, MoveToFrontList, Snapshot, SortedBucket, TransposeList, batch_hash,
+                        hash_function_name, mix_hash, mixed_hash, needs_mixing, seeded_hash, hash_function_1,
+                        hash_function_2)
+
+
+# Capacity policies accepted by HashMap
+CAPACITY_POLICIES = ('prime', 'power_of_two')
+
+# Chain policies accepted by HashMap, and the linked list class the chains are built from under each. Each class looks
+# keys up with contains, so a lookup costs the same under every policy
+CHAIN_POLICIES = {
+    'static': LinkedList,
+    'move_to_front': MoveToFrontList,
+    'transpose': TransposeList,
+}
+
+# A chain longer than TREEIFY_THRESHOLD nodes is replaced by a SortedBucket, and a SortedBucket left with
+# UNTREEIFY_THRESHOLD nodes or fewer by a removal goes back to being a chain. The gap keeps a bucket whose length
+# hovers around the threshold from being converted back and forth
+TREEIFY_THRESHOLD = 8
+UNTREEIFY_THRESHOLD = 6
+
+# Shared by every bucket that has never held a node, so an empty table costs one reference per bucket rather than a
+# LinkedList each. It is never inserted into: a bucket is given its own LinkedList on its first insert (see
+# _claim_bucket), and reads need no special case since the shared list is simply empty
+EMPTY_BUCKET = LinkedList()
+
+# Primes already found by _next_prime, keyed by the number the search started from. A growing map doubles through
+# the same sizes every time, so each prime is only searched for once
+_NEXT_PRIME = {}
 
 
 class HashMap:
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1,
+                 incremental: bool = False,
+                 migrate_step: int = 8,
+                 seed: int = None,
+                 stats: bool = False,
+                 capacity_policy: str = 'prime',
+                 chain_policy: str = 'static',
+                 treeify: bool = False) -> None:
         """
         Initialize new HashMap that uses
         separate chaining for collision resolution
+
+        With incremental set, a resize keeps the old bucket array alongside the new one and moves migrate_step old
+        buckets across on each put, get and remove, instead of rehashing everything at once.
+
+        If a seed is given, function must be one of the keyed hash functions in a6_include (such as siphash_hash) and
+        is called with that seed. Pass a6_include.random_seed() to give each map its own unpredictable hash.
+
+        With stats set, the map records the number of resizes and the time spent on them for stats() to report.
+
+        capacity_policy is 'prime' (the default) or 'power_of_two'. Under 'power_of_two' the capacity is always a power
+        of two, so no prime has to be searched for on a resize. Only the low bits of a hash pick its bucket, so hash
+        functions that are not well mixed (see a6_include.needs_mixing) have their hashes passed through
+        a6_include.mix_hash.
+
+        chain_policy is 'static' (the default), 'move_to_front' or 'transpose'. Under 'static' a chain keeps its nodes
+        in the order they were inserted. Under the other two, every lookup that finds a key moves its node to the front
+        of its chain or one place nearer to it, so the keys used most often end up at the front of their chains.
+        Lookups that miss leave the chains as they are.
+
+        With treeify set, a chain that grows past TREEIFY_THRESHOLD nodes is replaced by an a6_include.SortedBucket,
+        which finds a key by bisection on its (full hash, key), so a hash function that sends many keys to one bucket
+        costs O(log n) per lookup rather than O(n). The keys sharing a full hash must then be comparable, as strings
+        are: a chain whose keys can't be sorted is left as a chain, but a key that can't be compared with those of a
+        bucket already sorted makes the insert raise TypeError. Without treeify, any keys can share a bucket.
         """
-        self._buckets = DynamicArray()
+        if capacity_policy not in CAPACITY_POLICIES:
+            raise ValueError('capacity_policy must be one of ' + ', '.join(CAPACITY_POLICIES))
+        if chain_policy not in CHAIN_POLICIES:
+            raise ValueError('chain_policy must be one of ' + ', '.join(CHAIN_POLICIES))
+
+        self._power_of_two = capacity_policy == 'power_of_two'
+        # capacity must be a prime number, or a power of two under the power_of_two policy
+        self._capacity = self._next_capacity(capacity)
+        self._buckets = DynamicArray.filled(self._capacity, EMPTY_BUCKET)
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+        if seed is not None:
+            function = seeded_hash(function, seed)
+
+        # Under the power_of_two policy, hashes that don't already depend on the whole key in their low bits are mixed
+        self._mix_hashes = self._power_of_two and needs_mixing(function)
+        if self._mix_hashes:
+            function = mixed_hash(function)
 
         self._hash_function = function
+        self._seed = seed
         self._size = 0
 
+        # Class of every chain the map builds, and whether long chains are replaced by sorted buckets
+        self._chain_policy = chain_policy
+        self._chain = CHAIN_POLICIES[chain_policy]
+        self._treeify = treeify
+
+        # Incremental resize state; _old_buckets is None unless a migration is in progress
+        self._incremental = incremental
+        self._migrate_step = migrate_step
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+
+        # Recorded statistics; None unless stats were requested
+        self._stats = None
+        if stats:
+            self._stats = {'resizes': 0, 'resize_seconds': 0.0}
+
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
         """
+        self._finish_migration()
         out = ''
         for i in range(self._buckets.length()):
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
@@ -34,13 +125,34 @@ class HashMap:
         """
         Increment from given number and the find the closest prime number
         """
-        if capacity % 2 == 0:
-            capacity += 1
+        prime = _NEXT_PRIME.get(capacity)
+        if prime is not None:
+            return prime
+
+        prime = capacity
+        if prime % 2 == 0:
+            prime += 1
+
+        while not self._is_prime(prime):
+            prime += 2
 
-        while not self._is_prime(capacity):
-            capacity += 2
+        _NEXT_PRIME[capacity] = prime
+        return prime
 
-        return capacity
+    @staticmethod
+    def _next_power_of_two(capacity: int) -> int:
+        """
+        Return the smallest power of two that is at least the given number
+        """
+        return 1 << max(capacity - 1, 0).bit_length()
+
+    def _next_capacity(self, capacity: int) -> int:
+        """
+        Return the smallest capacity allowed by the capacity policy that is at least the given number
+        """
+        if self._power_of_two:
+            return self._next_power_of_two(capacity)
+        return self._next_prime(capacity)
 
     @staticmethod
     def _is_prime(capacity: int) -> bool:
@@ -87,21 +199,33 @@ class HashMap:
         """
         # 1 - If the current load factor of the table is greater than or equal to 1.0, the table must be resized to
         # double its current capacity
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
+
         if self.table_load() >= 1.0:
             self.resize_table(self._capacity * 2)
 
-        # 2 - The element is hashed and the remainder taken after dividing by the table size
-        table = self._buckets
+        # 2 - The element is hashed and the remainder taken after dividing by the table size. During a migration the
+        # key's old bucket is moved across first, so only the new table needs to be examined.
+        key_hash = self._hash_function(key)
+
+        if self._old_buckets is not None:
+            self._migrate_bucket(key_hash % self._old_capacity)
 
-        table_index = self._hash_function(key) % self._capacity
+        table = self._buckets.data()
+        table_index = key_hash % self._capacity
 
         # 3 - Linked list located in the hash table at the table index is examined.
-        node = table[table_index].contains(key)
+        node = table[table_index].contains(key, key_hash)
 
         # 3a - if the given key is not located in the hash table,
-        # insert a new SL node with the given value to the linked list
+        # insert a new SL node with the given value (and the full hash, kept for resizes) to the linked list,
+        # replacing the list with a sorted bucket if it has grown too long
         if node is None:
-            table[table_index].insert(key, value)
+            bucket = _claim_bucket(table, table_index, self._chain)
+            bucket.insert(key, value, key_hash)
+            if bucket.length() > TREEIFY_THRESHOLD:
+                self._treeify_bucket(table, table_index)
 
             # Increase the size by one
             self._size += 1
@@ -119,43 +243,193 @@ class HashMap:
         meaning the hash table links are rehashed into the new table using the put method.
         """
         # 1 - First check that new_capacity is not less than 1, if so return and do nothing. If not, change it to the
-        # next highest prime number. (using is_prime and next_prime).
+        # next highest prime number (using is_prime and next_prime), or power of two under the power_of_two policy.
         if new_capacity < 1:
             return
+        elif self._power_of_two:
+            new_capacity = self._next_power_of_two(new_capacity)
         elif new_capacity == 2:
             new_capacity = 2
         elif not self._is_prime(new_capacity):
             new_capacity = self._next_prime(new_capacity)
 
-        # 2 - Initialize the new table and fill it with linked list buckets
-        new_table = DynamicArray()
+        # 2 - Re-inserting through put would have grown the table again once its load reached 1.0, so do the same
+        while self._size and (self._size - 1) / new_capacity >= 1.0:
+            new_capacity = self._next_capacity(new_capacity * 2)
 
-        for _ in range(new_capacity):
-            new_table.append(LinkedList())
+        # 3 - A migration still in progress is completed before the next resize begins
+        self._finish_migration()
 
-        # 2 - Iterate through each bucket of the old table, and initialize capacity and size for the new DA
-        arr = self._buckets
+        if self._incremental:
+            self._start_migration(new_capacity)
+        else:
+            self._rehash(new_capacity)
 
-        self._buckets = new_table
-        self._size = 0
+        return
 
-        old_capacity = self._capacity
-        self._capacity = new_capacity
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every node into a new table of new_capacity buckets. Nodes are relinked into their new bucket rather
+        than re-inserted through put, so no node is allocated and no load check is made per entry.
+        """
+        start = perf_counter()
 
-        for index in range(old_capacity):
+        # 1 - Initialize the new table, every bucket starting as the shared empty bucket
+        new_buckets = DynamicArray.filled(new_capacity, EMPTY_BUCKET)
+        new_table = new_buckets.data()
 
-            # 2a - if the bucket is not empty, iterate through the linked list
-            if arr[index].length() > 0:
+        # 2 - Move each node of each non-empty bucket to the front of its bucket in the new table, giving that bucket
+        # its own list first if it has none. The list iterator has already advanced past a node when it is yielded, so
+        # relinking it does not disturb the walk. Each node carries the full hash of its key, so nothing is rehashed.
+        # A sorted bucket is split into chains like any other, and a chain that grows too long is sorted again.
+        arr = self._buckets.data()
+        chain = self._chain
 
-                # 2a1 - For each node extract the key and value
+        for index in range(self._capacity):
+            if arr[index].length() > 0:
                 for node in arr[index]:
-                    key_value = node.key
-                    value = node.value
+                    new_index = node.hash % new_capacity
+                    bucket = new_table[new_index]
+                    if bucket is EMPTY_BUCKET:
+                        bucket = new_table[new_index] = chain()
+                    bucket.insert_node(node)
+                    if bucket.length() > TREEIFY_THRESHOLD:
+                        self._treeify_bucket(new_table, new_index)
+
+        self._buckets = new_buckets
+        self._capacity = new_capacity
 
-                    # 2a2 - Call the put method to put the key_value into the newly sized table.
-                    self.put(key_value, value)
+        if self._stats is not None:
+            self._record_resize(start, 1)
 
-        return
+    def _start_migration(self, new_capacity: int) -> None:
+        """
+        Installs an empty table of new_capacity buckets and keeps the current one as the old table, to be moved
+        across a few buckets at a time by _migrate.
+        """
+        start = perf_counter()
+        new_table = DynamicArray.filled(new_capacity, EMPTY_BUCKET)
+
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._migrate_index = 0
+
+        self._buckets = new_table
+        self._capacity = new_capacity
+
+        if self._stats is not None:
+            self._record_resize(start, 1)
+
+    def _migrate_bucket(self, index: int) -> None:
+        """
+        Moves every node of the old table's bucket at index into the new table, leaving the old bucket empty.
+        """
+        bucket = self._old_buckets[index]
+
+        if bucket.length() > 0:
+            table = self._buckets.data()
+            ht_capacity = self._capacity
+            for node in bucket:
+                new_index = node.hash % ht_capacity
+                new_bucket = _claim_bucket(table, new_index, self._chain)
+                new_bucket.insert_node(node)
+                if new_bucket.length() > TREEIFY_THRESHOLD:
+                    self._treeify_bucket(table, new_index)
+            self._old_buckets[index] = EMPTY_BUCKET
+
+    def _treeify_bucket(self, table: list, index: int) -> None:
+        """
+        Replaces the chain at index of a table's list, which has grown past TREEIFY_THRESHOLD nodes, with a
+        SortedBucket holding the same nodes. Does nothing if the bucket is already sorted, treeify is not set or the
+        keys of the chain can't be sorted.
+        """
+        bucket = table[index]
+        if self._treeify and type(bucket) is not SortedBucket:
+            # Sorting fails before any node is unlinked, so the chain is left whole
+            try:
+                table[index] = SortedBucket(bucket)
+            except TypeError:
+                pass
+
+    def _untreeify_bucket(self, table: list, index: int) -> None:
+        """
+        Replaces the bucket at index of a table's list with a chain of its nodes if it is a SortedBucket that has
+        shrunk to UNTREEIFY_THRESHOLD nodes or fewer.
+        """
+        bucket = table[index]
+        if type(bucket) is SortedBucket and bucket.length() <= UNTREEIFY_THRESHOLD:
+            chain = self._chain()
+            for node in bucket:
+                chain.insert_node(node)
+            table[index] = chain
+
+    def _migrate(self, count: int) -> None:
+        """
+        Moves the next count buckets of the old table into the new one, and drops the old table once all of its
+        buckets have been moved.
+        """
+        start = perf_counter() if self._stats is not None else 0.0
+
+        index = self._migrate_index
+        stop = min(index + count, self._old_capacity)
+
+        while index < stop:
+            self._migrate_bucket(index)
+            index += 1
+
+        self._migrate_index = index
+        if index == self._old_capacity:
+            self._old_buckets = None
+
+        if self._stats is not None:
+            self._record_resize(start, 0)
+
+    def _finish_migration(self) -> None:
+        """
+        Moves all remaining buckets of an in-progress migration into the new table.
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+    def _record_resize(self, start: float, resizes: int) -> None:
+        """
+        Adds the time since start, and the given number of resizes, to the recorded statistics.
+        """
+        self._stats['resizes'] += resizes
+        self._stats['resize_seconds'] += perf_counter() - start
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the map's statistics as a dictionary. The size, capacity, load factor, empty bucket
+        count, the distribution of chain lengths over the buckets (chain length -> number of buckets) and the number of
+        buckets held as sorted buckets are always included. If the map was created with stats=True, the snapshot also
+        holds the number of resizes and the time spent on them, including incremental migration.
+        """
+        table = self._buckets.data()
+        chain_lengths = {}
+        sorted_buckets = 0
+        for index in range(self._capacity):
+            length = table[index].length()
+            chain_lengths[length] = chain_lengths.get(length, 0) + 1
+            if type(table[index]) is SortedBucket:
+                sorted_buckets += 1
+
+        snapshot = {
+            'size': self._size,
+            'capacity': self._capacity,
+            'table_load': self.table_load(),
+            'empty_buckets': chain_lengths.get(0, 0),
+            'chain_lengths': dict(sorted(chain_lengths.items())),
+            'longest_chain': max(chain_lengths),
+            'sorted_buckets': sorted_buckets,
+            'migrating': self._old_buckets is not None,
+        }
+
+        if self._stats is not None:
+            snapshot['resizes'] = self._stats['resizes']
+            snapshot['resize_seconds'] = self._stats['resize_seconds']
+
+        return snapshot
 
     def table_load(self) -> float:
         """
@@ -182,7 +456,9 @@ class HashMap:
         Returns the number of empty buckets in the hash table.
         """
 
-        array = self._buckets
+        self._finish_migration()
+
+        array = self._buckets.data()
         ht_capacity = self._capacity
 
         empty_count = 0
@@ -202,12 +478,21 @@ class HashMap:
         """
 
         # 1 - The element is hashed and the remainder taken after dividing by the table size
-        table = self._buckets
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
+
+        table = self._buckets.data()
 
-        table_index = self._hash_function(key) % self._capacity
+        key_hash = self._hash_function(key)
+        table_index = key_hash % self._capacity
 
-        # 2 - Linked list located in the hash table at the table index is examined.
-        node = table[table_index].contains(key)
+        # 2 - Linked list located in the hash table at the table index is examined. During a migration a key not found
+        # there may still be in its bucket of the old table, which is searched without reordering it under the chain
+        # policy, since its nodes are about to move
+        node = table[table_index].contains(key, key_hash)
+
+        if node is None and self._old_buckets is not None:
+            node = self._old_buckets[key_hash % self._old_capacity].find(key, key_hash)
 
         # 3 - If the target bucket is empty or does not contain the given key return None.
         if node is None:
@@ -228,18 +513,22 @@ class HashMap:
         size = self._size
         ht_capacity = self._capacity
         hash_function = self._hash_function
-        table = self._buckets
+        table = self._buckets.data()
 
         # 1 - If the hash map is empty, return False
         if size == 0:
             return False
 
         # 2 - the input key is hashed and the remainder taken after dividing by the table size
-        table_index = hash_function(key) % ht_capacity
+        key_hash = hash_function(key)
+        table_index = key_hash % ht_capacity
 
-        # 2 - Return True if the key is found in its correct bucket using the contains() method
-        if table[table_index].contains(key):
+        # 2 - Return True if the key is found in its correct bucket using the contains() method, or during a migration
+        # in its bucket of the old table
+        if table[table_index].contains(key, key_hash):
             return True
+        elif self._old_buckets is not None:
+            return self._old_buckets[key_hash % self._old_capacity].find(key, key_hash) is not None
         else:
             return False
 
@@ -253,24 +542,228 @@ class HashMap:
 
         size = self._size
         ht_capacity = self._capacity
-        table = self._buckets
+        table = self._buckets.data()
         hash_function = self._hash_function
 
         # 1 - If the hash map is empty, return
         if size == 0:
             return
 
-        # 2 - the input key is hashed and the remainder taken after dividing by the table size
-        table_index = hash_function(key) % ht_capacity
+        # 2 - the input key is hashed and the remainder taken after dividing by the table size. During a migration the
+        # key's old bucket is moved across first, so only the new table needs to be examined.
+        key_hash = hash_function(key)
 
-        # 3 - Remove the key from its associated index and decrement size
-        if not table[table_index].contains(key):
-            return
-        else:
-            table[table_index].remove(key)
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
+
+        if self._old_buckets is not None:
+            self._migrate_bucket(key_hash % self._old_capacity)
+
+        table_index = key_hash % ht_capacity
+
+        # 3 - Remove the key from its associated index in a single pass over the chain, and decrement size if it was
+        # there. A sorted bucket that has become short enough goes back to being a chain.
+        if table[table_index].remove(key, key_hash):
             self._size -= 1
+            self._untreeify_bucket(table, table_index)
+
+        return
+
+    def put_many(self, pairs, hash_batch: callable = None) -> None:
+        """
+        Puts every (key, value) pair of pairs into the hash map, as put would one at a time. The table is resized once
+        up front to hold all of them, every key is hashed in one batch, and the pairs are then inserted without any
+        further load checks.
+
+        hash_batch, if given, is called with the list of keys and returns their hashes, like
+        a6_include.batch_hash_function_1. It must hash them as the map's hash function does, with its seed if it has
+        one, but without mix_hash, which the map applies itself; ValueError is raised if the first key shows otherwise.
+        By default the map's hash function is passed to a6_include.batch_hash.
+        """
+        pairs = _materialize(pairs)
+        if not pairs:
             return
 
+        # 1 - Finish any migration and grow the table once so the whole batch fits at a load factor of at most 1.0.
+        # It at least doubles, so a stream of small batches doesn't rehash on every one
+        self._finish_migration()
+        needed = self._size + len(pairs)
+        if needed > self._capacity:
+            self._rehash(self._next_capacity(max(needed, self._capacity * 2)))
+
+        # 2 - Hash all keys up front
+        keys = [pair[0] for pair in pairs]
+        hashes = self._hash_batch(keys, hash_batch)
+
+        # 3 - Insert or update each pair in its bucket
+        table = self._buckets.data()
+        ht_capacity = self._capacity
+        size = self._size
+        chain = self._chain
+
+        for (key, value), key_hash in zip(pairs, hashes):
+            table_index = key_hash % ht_capacity
+            bucket = table[table_index]
+            node = bucket.contains(key, key_hash)
+            if node is None:
+                if bucket is EMPTY_BUCKET:
+                    bucket = table[table_index] = chain()
+                bucket.insert(key, value, key_hash)
+                size += 1
+                if bucket.length() > TREEIFY_THRESHOLD:
+                    self._treeify_bucket(table, table_index)
+            else:
+                node.value = value
+
+        self._size = size
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """
+        Adds amount to the count stored for the given key, or stores amount if the key is not in the hash map, and
+        returns the new count. The key is hashed once and its chain walked once, where a get followed by a put would do
+        both twice. The table is resized, as put would, only when a new key is added.
+        """
+        # 1 - Hash the key, moving its old bucket across first during a migration
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
+
+        key_hash = self._hash_function(key)
+
+        if self._old_buckets is not None:
+            self._migrate_bucket(key_hash % self._old_capacity)
+
+        # 2 - If the key is already counted, add to its count in place
+        node = self._buckets[key_hash % self._capacity].contains(key, key_hash)
+        if node is not None:
+            node.value += amount
+            return node.value
+
+        # 3 - Otherwise resize if the table is full and add the key with a count of amount
+        if self.table_load() >= 1.0:
+            self.resize_table(self._capacity * 2)
+
+        table = self._buckets.data()
+        table_index = key_hash % self._capacity
+        bucket = _claim_bucket(table, table_index, self._chain)
+        bucket.insert(key, amount, key_hash)
+        if bucket.length() > TREEIFY_THRESHOLD:
+            self._treeify_bucket(table, table_index)
+
+        self._size += 1
+        return amount
+
+    def increment_many(self, keys, hash_batch: callable = None) -> int:
+        """
+        Adds one to the count stored for each key of keys, as increment would one at a time, and returns the highest
+        count any of them reached. Every key is hashed in one batch, and the table is grown only when a new key finds
+        it full.
+
+        hash_batch is as for put_many.
+        """
+        keys = _materialize(keys)
+        if not keys:
+            return 0
+
+        # 1 - Finish any migration and hash all keys up front
+        self._finish_migration()
+        hashes = self._hash_batch(keys, hash_batch)
+
+        # 2 - Count each key in its bucket, doubling the table whenever a new key would take the load factor past 1.0
+        table = self._buckets.data()
+        ht_capacity = self._capacity
+        size = self._size
+        highest = 0
+        chain = self._chain
+
+        for key, key_hash in zip(keys, hashes):
+            node = table[key_hash % ht_capacity].contains(key, key_hash)
+
+            if node is not None:
+                node.value += 1
+                count = node.value
+            else:
+                if size >= ht_capacity:
+                    self._rehash(self._next_capacity(ht_capacity * 2))
+                    table = self._buckets.data()
+                    ht_capacity = self._capacity
+
+                table_index = key_hash % ht_capacity
+                bucket = _claim_bucket(table, table_index, chain)
+                bucket.insert(key, 1, key_hash)
+                if bucket.length() > TREEIFY_THRESHOLD:
+                    self._treeify_bucket(table, table_index)
+                size += 1
+                count = 1
+
+            if count > highest:
+                highest = count
+
+        self._size = size
+        return highest
+
+    def _hash_batch(self, keys: list, hash_batch: callable = None) -> list:
+        """
+        Returns the hashes of keys, from hash_batch if one is given or else from the map's hash function. Hashes from
+        hash_batch are passed through mix_hash whenever the map mixes its own. Raises ValueError if hash_batch returns
+        the wrong number of hashes, or a hash for the first key that differs from the map's hash function.
+        """
+        if hash_batch is None:
+            return batch_hash(self._hash_function, keys)
+
+        hashes = hash_batch(keys)
+        if self._mix_hashes:
+            hashes = [mix_hash(key_hash) for key_hash in hashes]
+
+        # Keys hashed by a function other than the map's would be stored where get never looks for them
+        if len(hashes) != len(keys) or hashes[0] != self._hash_function(keys[0]):
+            raise ValueError('hash_batch does not hash keys as the hash function of the map does')
+        return hashes
+
+    def get_many(self, keys, hash_batch: callable = None) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key of keys, in order, with None for keys that are not in
+        the hash map. Keys are hashed in one batch, as in put_many.
+        """
+        keys = _materialize(keys)
+        results = DynamicArray.filled(len(keys))
+        if not keys or self._size == 0:
+            return results
+
+        self._finish_migration()
+        hashes = self._hash_batch(keys, hash_batch)
+
+        table = self._buckets.data()
+        ht_capacity = self._capacity
+
+        for index in range(len(keys)):
+            key_hash = hashes[index]
+            node = table[key_hash % ht_capacity].contains(keys[index], key_hash)
+            if node is not None:
+                results[index] = node.value
+
+        return results
+
+    def remove_many(self, keys, hash_batch: callable = None) -> None:
+        """
+        Removes every key of keys from the hash map, ignoring keys that are not in it. Keys are hashed in one batch,
+        as in put_many.
+        """
+        keys = _materialize(keys)
+        if not keys or self._size == 0:
+            return
+
+        self._finish_migration()
+        hashes = self._hash_batch(keys, hash_batch)
+
+        table = self._buckets.data()
+        ht_capacity = self._capacity
+
+        for key, key_hash in zip(keys, hashes):
+            table_index = key_hash % ht_capacity
+            if table[table_index].remove(key, key_hash):
+                self._size -= 1
+                self._untreeify_bucket(table, table_index)
+
     def get_keys_and_values(self) -> DynamicArray:
         """
         Returns a dynamic array where each index contains a tuple of a key/value pair stored in the hash map. The order
@@ -280,8 +773,9 @@ class HashMap:
         arr = DynamicArray()
 
         # 2 - Iterate through the hash map, appending each key value pair as a tuple in the Dynamic Array.
+        self._finish_migration()
         ht_capacity = self._capacity
-        buckets = self._buckets
+        buckets = self._buckets.data()
 
         for index in range(ht_capacity):
 
@@ -297,18 +791,93 @@ class HashMap:
         Clears the contents of the hash map. It does not change the underlying hash table capacity.
         """
 
-        # 1 - Create a new Dynamic Array at self._buckets
-        self._buckets = DynamicArray()
+        # 1 - Create a new Dynamic Array at self._buckets of the current capacity, every bucket the shared empty bucket
+        self._buckets = DynamicArray.filled(self._capacity, EMPTY_BUCKET)
 
-        # 2 - Append LinkedList objects equal to the current capacity
-        for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
-
-        # reset size to 0
+        # reset size to 0 and abandon any migration in progress
         self._size = 0
+        self._old_buckets = None
 
         return
 
+    def save(self, path: str) -> None:
+        """
+        Writes a snapshot of the hash map to path, to be read back by load.
+        """
+        self.snapshot().write(path)
+
+    def snapshot(self) -> Snapshot:
+        """
+        Returns a snapshot of the hash map (see a6_include.Snapshot): its capacity, hash function and capacity policy,
+        and every entry with its cached hash and bucket index, in chain order. The hash function must be one of those
+        in a6_include.HASH_FUNCTIONS so that load can find it again, and not builtin_hash, whose string hashes differ
+        between processes.
+        """
+        self._finish_migration()
+        snapshot = Snapshot('sc', self._capacity, hash_function_name(self._hash_function), self._seed,
+                            self._power_of_two)
+
+        table = self._buckets.data()
+        for index in range(self._capacity):
+            for node in table[index]:
+                snapshot.add(index, node.hash, node.key, node.value)
+
+        return snapshot
+
+    @classmethod
+    def load(cls, path: str, **options) -> "HashMap":
+        """
+        Returns a new hash map holding the contents of a snapshot written by save. Every node is linked straight into
+        its saved bucket with its saved hash, so no key is hashed and no load factor is checked. options are passed
+        on to the constructor, such as incremental or stats; function, seed and capacity_policy may be passed too, but
+        only with their saved values.
+        """
+        snapshot = Snapshot.read(path)
+        if snapshot.kind != 'sc':
+            raise ValueError(path + ' is not a snapshot of a separate chaining HashMap')
+
+        hash_map = cls(1, **snapshot.map_options(**options))
+
+        # 1 - Build a table of the saved capacity, which is already a prime or power of two
+        table = DynamicArray.filled(snapshot.capacity, EMPTY_BUCKET)
+        data = table.data()
+
+        # 2 - Nodes are inserted at the front of their bucket, so each chain is rebuilt from its last node to keep its
+        # order
+        hashes = snapshot.hashes
+        positions = snapshot.positions
+        keys = snapshot.keys
+        values = snapshot.values
+
+        for index in range(len(keys) - 1, -1, -1):
+            bucket = _claim_bucket(data, positions[index], hash_map._chain)
+            bucket.insert(keys[index], values[index], hashes[index])
+            if bucket.length() > TREEIFY_THRESHOLD:
+                hash_map._treeify_bucket(data, positions[index])
+
+        hash_map._buckets = table
+        hash_map._capacity = snapshot.capacity
+        hash_map._size = len(keys)
+        return hash_map
+
+
+def _claim_bucket(table: list, index: int, chain: type = LinkedList) -> LinkedList:
+    """
+    Return the bucket at index of a table's list, first giving it a new chain of its own (of class chain) if it is
+    still the shared EMPTY_BUCKET, so that a node can be inserted into it
+    """
+    bucket = table[index]
+    if bucket is EMPTY_BUCKET:
+        bucket = table[index] = chain()
+    return bucket
+
+
+def _materialize(items) -> list:
+    """
+    Return the contents of a DynamicArray or any other iterable as a list, for the batch methods
+    """
+    return list(items)
+
 
 def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
     """
@@ -326,40 +895,190 @@ def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
     The function has O(N) time complexity, made possible with the separate chaining hash map.
     """
 
-    map = HashMap()
+    # 1 - Count every element of the array with a single lookup-or-insert each, O(N)
+    finder = ModeFinder()
+    finder.update(da)
 
-    highest_frequency = 1
+    # 2 - Collect the element(s) counted at the highest frequency
+    return finder.mode()
 
-    mode_da = DynamicArray()
 
-    # 1 - We iterate through the input array hashing each element O(N). Key is element, value is # of repetitions
-    for index in range(da.length()):
+class ModeFinder:
+    """
+    Running exact mode of a stream of strings, for inputs that don't fit in a DynamicArray or arrive over time.
 
-        current_frequency = map.get(da[index])
+    Elements are consumed from any iterable in chunks of chunk_size. Each chunk is hashed in one batch and every
+    element counted with a single lookup-or-insert (see HashMap.increment_many). The mode can be read at any point
+    between updates. Memory grows with the number of distinct elements; HeavyHitters bounds it at the cost of exact
+    counts.
+    """
 
-        if current_frequency is None:
-            current_frequency = 1
-        else:
-            current_frequency += 1
+    def __init__(self, function: callable = hash_function_1, chunk_size: int = 4096, **options) -> None:
+        """
+        Initialize an empty mode finder counting into a HashMap built with function and options
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be at least 1')
 
-        # 2 - If the current frequency beats the highest, make a new mode array and append the current value
-        if current_frequency > highest_frequency:
+        self._counts = HashMap(function=function, **options)
+        self._chunk_size = chunk_size
+        self._highest = 0
+        self._seen = 0
 
-            mode_val = da[index]
+    def update(self, items) -> None:
+        """
+        Counts every element of items, which may be a DynamicArray, an iterator or a generator.
+        """
+        for chunk in _chunks(items, self._chunk_size):
+            highest = self._counts.increment_many(chunk)
+            if highest > self._highest:
+                self._highest = highest
+            self._seen += len(chunk)
 
-            highest_frequency = current_frequency
+    def frequency(self, key: str) -> int:
+        """
+        Returns the number of times key has been seen
+        """
+        count = self._counts.get(key)
+        return 0 if count is None else count
 
-            mode_da = DynamicArray()
-            mode_da.append(mode_val)
+    def seen(self) -> int:
+        """
+        Returns the number of elements counted so far
+        """
+        return self._seen
 
-        # 3 - If the current frequency ties the highest, append the current value to the existing mode array
-        elif current_frequency == highest_frequency:
+    def mode(self) -> tuple[DynamicArray, int]:
+        """
+        Returns a dynamic array of the element(s) seen most often so far and how often that was, as find_mode does.
+        The ties are only collected here, in one pass over the counts, rather than kept while counting.
+        """
+        mode_da = DynamicArray()
+        highest = self._highest
+
+        # An incremental resize in progress still holds some counts in its old buckets
+        self._counts._finish_migration()
+        for bucket in self._counts._buckets:
+            for node in bucket:
+                if node.value == highest:
+                    mode_da.append(node.key)
+
+        return mode_da, highest
+
+
+class HeavyHitters:
+    """
+    Approximate mode and top-k of a stream in bounded memory, by the Misra-Gries algorithm.
+
+    At most k counters are kept. An element that has a counter has it incremented. Any other element takes a free
+    counter if there is one, and otherwise every counter is decremented and the ones reaching zero are dropped. Each
+    counter therefore undercounts its element by at most the number of decrement rounds, which is at most
+    seen / (k + 1), and every element seen more often than that is guaranteed to hold a counter.
+    """
+
+    def __init__(self, k: int, function: callable = hash_function_1, chunk_size: int = 4096, **options) -> None:
+        """
+        Initialize an empty summary of at most k counters, kept in a HashMap built with function and options
+        """
+        if k < 1:
+            raise ValueError('k must be at least 1')
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be at least 1')
+
+        self._k = k
+        self._counts = HashMap(k, function, **options)
+        self._chunk_size = chunk_size
+        self._seen = 0
+        self._decrements = 0
+
+    def update(self, items) -> None:
+        """
+        Counts every element of items, which may be a DynamicArray, an iterator or a generator.
+        """
+        counts = self._counts
+        k = self._k
 
-            mode_da.append(da[index])
+        for chunk in _chunks(items, self._chunk_size):
+            for key in chunk:
+                # 1 - Count the key if it holds a counter or a counter is free
+                if counts._size < k or counts.contains_key(key):
+                    counts.increment(key)
 
-        # If the current frequency is less than the highest, don't do anything else
+                # 2 - Otherwise the key and one count of every other key cancel out
+                else:
+                    self._decrement_all()
 
-        # 4 - 'Put' the element into the hash table along with current frequency (minimum of 1)
-        map.put(da[index], current_frequency)
+            self._seen += len(chunk)
 
-    return mode_da, highest_frequency
+    def _decrement_all(self) -> None:
+        """
+        Decrements every counter, dropping the ones that reach zero. Each round removes k counts that were added one at
+        a time, so its O(k) cost is paid for by the increments before it.
+        """
+        counts = self._counts
+        dropped = []
+
+        # 1 - An incremental resize in progress still holds some counters in its old buckets
+        counts._finish_migration()
+
+        # 2 - Decrement in place, then drop the counters at zero through remove_many so that their buckets are
+        # emptied or untreeified as any other removal would
+        for bucket in counts._buckets:
+            for node in bucket:
+                node.value -= 1
+                if node.value == 0:
+                    dropped.append(node.key)
+
+        counts.remove_many(dropped)
+        self._decrements += 1
+
+    def seen(self) -> int:
+        """
+        Returns the number of elements counted so far
+        """
+        return self._seen
+
+    def error(self) -> int:
+        """
+        Returns the most that any estimated count can fall short of the true count
+        """
+        return self._decrements
+
+    def top(self, n: int = None) -> DynamicArray:
+        """
+        Returns a dynamic array of (element, estimated count) tuples for the n elements with the highest estimated
+        counts, or for every element holding a counter, highest first.
+        """
+        ranked = sorted(self._counts.get_keys_and_values(), key=lambda pair: pair[1], reverse=True)
+        return DynamicArray(ranked if n is None else ranked[:n])
+
+    def mode(self) -> tuple[DynamicArray, int]:
+        """
+        Returns a dynamic array of the element(s) with the highest estimated count and that estimate. Any element whose
+        true count is more than error() above every other element's is certain to be the mode.
+        """
+        mode_da = DynamicArray()
+        highest = 0
+
+        self._counts._finish_migration()
+        for bucket in self._counts._buckets:
+            for node in bucket:
+                if node.value > highest:
+                    highest = node.value
+                    mode_da = DynamicArray()
+                if node.value == highest:
+                    mode_da.append(node.key)
+
+        return mode_da, highest
+
+
+def _chunks(items, size: int):
+    """
+    Yield the contents of a DynamicArray, iterator or generator as lists of at most size elements
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,292 @@
+
+import os
+from multiprocessing import Pipe, Process
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_1, hash_function_2, mix_hash
+
+
+# Map classes a shard can be built from
+SHARD_MAPS = {
+    'sc': hash_map_sc.HashMap,
+    'oa': hash_map_oa.HashMap,
+}
+
+
+def _serve(connection, kind: str, capacity: int, function, options: dict) -> None:
+    """
+    Worker process loop. Builds one shard map, then reads (method name, arguments) requests from the connection and
+    answers each with (True, result), or (False, exception) if the method raised, until it is sent None.
+    """
+    shard = SHARD_MAPS[kind](capacity, function, **options)
+
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+
+        method, arguments = request
+        try:
+            result = getattr(shard, method)(*arguments)
+        except Exception as error:
+            connection.send((False, error))
+        else:
+            connection.send((True, result))
+
+    connection.close()
+
+
+class HashMap:
+    """
+    HashMap partitioned by key across worker processes. Each worker owns one shard, a hash_map_sc.HashMap or
+    hash_map_oa.HashMap, and the parent process talks to it over a pipe, so the shards do their hashing and probing
+    on separate cores.
+
+    put_many, get_many and remove_many split a batch by shard, send every shard its part before waiting for any
+    reply, and merge the results, so all shards work on a batch at the same time. Single key operations make one
+    round trip to one shard and are much slower than on a local map; the sharded map is meant for bulk work.
+
+    Keys are routed by the high bits of Python's built-in hash passed through mix_hash, which only the parent process
+    computes. The shard maps choose buckets by the low bits of their own hash, which may be that same built-in hash,
+    so routing by its low bits would leave each shard with keys that all agree in them.
+
+    The worker processes must be shut down with close(), or by using the map as a context manager.
+    """
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 shards: int = None,
+                 kind: str = 'sc',
+                 **options) -> None:
+        """
+        Initialize new HashMap that spreads its keys over the given number of shards, by default one per CPU. kind
+        selects the map used for each shard, 'sc' or 'oa', and capacity is divided between them. options are passed
+        on to every shard map, such as seed or capacity_policy.
+
+        function and any options must be picklable, which the hash functions in a6_include are, since they are sent
+        to the worker processes.
+        """
+        if kind not in SHARD_MAPS:
+            raise ValueError('kind must be one of ' + ', '.join(SHARD_MAPS))
+
+        if shards is None:
+            shards = os.cpu_count() or 1
+        if shards < 1:
+            raise ValueError('shards must be at least 1')
+
+        shard_capacity = max(1, -(-capacity // shards))
+        self._shards = shards
+        self._connections = []
+        self._processes = []
+
+        for _ in range(shards):
+            parent, child = Pipe()
+            process = Process(target=_serve, args=(child, kind, shard_capacity, function, options), daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def __enter__(self) -> "HashMap":
+        """
+        Return the map, for use in a with statement
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Shut down the worker processes at the end of a with statement
+        """
+        self.close()
+
+    def close(self) -> None:
+        """
+        Shut down the worker processes. The map can't be used afterwards.
+        """
+        for connection, process in zip(self._connections, self._processes):
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            process.join()
+            connection.close()
+
+        self._connections = []
+        self._processes = []
+
+    def _shard(self, key: str) -> int:
+        """
+        Return the number of the shard that owns the key
+        """
+        return _shard_of(key, self._shards)
+
+    def _receive(self, shard: int) -> object:
+        """
+        Wait for the reply of the given shard and return its result, re-raising any exception the shard raised
+        """
+        succeeded, result = self._connections[shard].recv()
+        if not succeeded:
+            raise result
+        return result
+
+    def _call(self, shard: int, method: str, *arguments) -> object:
+        """
+        Call a method of one shard map and return its result
+        """
+        self._connections[shard].send((method, arguments))
+        return self._receive(shard)
+
+    def _call_all(self, method: str, arguments: list = None) -> list:
+        """
+        Call a method of every shard map, with the arguments for each shard if given, and return their results in
+        shard order. Every request is sent before any reply is read, so the shards run in parallel.
+
+        The reply of every shard that was sent a request is read before any error is raised, the first shard's error
+        first, so each pipe is left ready for the next call.
+        """
+        sent = 0
+        try:
+            for shard, connection in enumerate(self._connections):
+                connection.send((method, arguments[shard] if arguments else ()))
+                sent += 1
+        finally:
+            replies = [self._connections[shard].recv() for shard in range(sent)]
+
+        for succeeded, result in replies:
+            if not succeeded:
+                raise result
+        return [result for succeeded, result in replies]
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(self._call_all('get_size'))
+
+    def get_capacity(self) -> int:
+        """
+        Return the total capacity of the shards
+        """
+        return sum(self._call_all('get_capacity'))
+
+    def table_load(self) -> float:
+        """
+        Returns the load factor over all of the shards.
+        """
+        return self.get_size() / self.get_capacity()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets over all of the shards.
+        """
+        return sum(self._call_all('empty_buckets'))
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the shard that owns the key, or adds it if the key is not in the hash map.
+        """
+        self._call(self._shard(key), 'put', key, value)
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, or None if the key is not in the hash map.
+        """
+        return self._call(self._shard(key), 'get', key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise False.
+        """
+        return self._call(self._shard(key), 'contains_key', key)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map. If the key is not in the hash map, it does
+        nothing.
+        """
+        self._call(self._shard(key), 'remove', key)
+
+    def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) pair of pairs into the hash map. The pairs are split by shard and each shard's part
+        is passed to its put_many, all shards working at once.
+        """
+        batches = [[] for _ in range(self._shards)]
+        shards = self._shards
+
+        for pair in _materialize(pairs):
+            batches[_shard_of(pair[0], shards)].append(pair)
+
+        self._call_all('put_many', [(batch,) for batch in batches])
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key of keys, in order, with None for keys that are not in
+        the hash map. The keys are split by shard and looked up by each shard's get_many, all shards working at once.
+        """
+        keys = _materialize(keys)
+        shards = self._shards
+        batches = [[] for _ in range(shards)]
+        owners = [0] * len(keys)
+
+        for index in range(len(keys)):
+            shard = _shard_of(keys[index], shards)
+            owners[index] = shard
+            batches[shard].append(keys[index])
+
+        # Each shard answers in the order its keys were sent, so the results are merged back by walking the owners
+        replies = self._call_all('get_many', [(batch,) for batch in batches])
+        positions = [0] * shards
+        results = DynamicArray.filled(len(keys))
+
+        for index in range(len(keys)):
+            shard = owners[index]
+            results[index] = replies[shard][positions[shard]]
+            positions[shard] += 1
+
+        return results
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key of keys from the hash map, ignoring keys that are not in it. The keys are split by shard and
+        removed by each shard's remove_many, all shards working at once.
+        """
+        batches = [[] for _ in range(self._shards)]
+        shards = self._shards
+
+        for key in _materialize(keys):
+            batches[_shard_of(key, shards)].append(key)
+
+        self._call_all('remove_many', [(batch,) for batch in batches])
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair stored in the hash map, gathered
+        from every shard. The order of the keys in the dynamic array does not matter.
+        """
+        arr = DynamicArray()
+        for pairs in self._call_all('get_keys_and_values'):
+            arr.extend(pairs)
+        return arr
+
+    def clear(self) -> None:
+        """
+        Clears the contents of every shard. It does not change their capacity.
+        """
+        self._call_all('clear')
+
+
+def _shard_of(key: str, shards: int) -> int:
+    """
+    Return the number of the shard, of the given number of shards, that owns the key
+    """
+    return (mix_hash(hash(key)) >> 32) % shards
+
+
+def _materialize(items) -> list:
+    """
+    Return the contents of a DynamicArray or any other iterable as a list, for the batch methods
+    """
+    return list(items)
@@ -0,0 +1,528 @@
+
+import mmap
+import os
+import pickle
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+from a6_include import (DynamicArray, HASH_FUNCTIONS, MASK_64, builtin_hash, mixed_hash, needs_mixing, seeded_hash,
+                        hash_function_1, hash_function_2)
+
+
+# Identifies a buffer holding a table, and the version of its layout
+MAGIC = b'HMSHM\x00\x00\x01'
+
+# magic, capacity, size, tombstones, heap start, heap end, hash function name, seed, whether the seed is used
+HEADER = struct.Struct('<8sQQQQQ32s16s?')
+HEADER_SIZE = 128
+
+# Offsets of the header fields that change as the table is written
+SIZE_OFFSET = 16
+TOMBSTONES_OFFSET = 24
+HEAP_END_OFFSET = 40
+FIELD = struct.Struct('<Q')
+
+# Each slot holds the full hash of its key and the offsets of its key and value records in the heap
+SLOT = struct.Struct('<QQQ')
+
+# Key offsets marking a slot as empty or as a tombstone. The heap starts after the header, so no record is at either
+EMPTY = 0
+TOMBSTONE = 1
+
+# A key record is the length of the key followed by its UTF-8 bytes. A value record is a type tag and the length of
+# the payload, followed by the payload
+KEY_LENGTH = struct.Struct('<I')
+VALUE_HEADER = struct.Struct('<BI')
+FLOAT = struct.Struct('<d')
+
+# Value type tags
+TAG_NONE, TAG_FALSE, TAG_TRUE, TAG_INT, TAG_FLOAT, TAG_STR, TAG_BYTES, TAG_PICKLE = range(8)
+
+# A put that would take live entries plus tombstones past this fraction of the slots raises SharedTableFull
+MAX_LOAD = 0.75
+
+# Heap bytes reserved per slot when no heap size is given
+DEFAULT_HEAP_PER_SLOT = 64
+
+
+# Before Python 3.13, attach uses these to decide whether it may take back the resource tracker registration of a
+# block: the names of the blocks created in this process (or its parent, before a fork), which this process's tracker
+# already holds, and whether this process was forked from one that had already started the tracker they then share
+_created_blocks = set()
+_shared_tracker = False
+
+
+def _note_fork() -> None:
+    """
+    Record, in a newly forked child, whether it shares its parent's resource tracker
+    """
+    global _shared_tracker
+    _shared_tracker = _shared_tracker or getattr(resource_tracker._resource_tracker, '_fd', None) is not None
+
+
+os.register_at_fork(after_in_child=_note_fork)
+
+
+class SharedTableFull(Exception):
+    """
+    Raised by put when the table has no free slot or heap space left. A shared table can't grow in place, since
+    other processes have it mapped.
+    """
+    pass
+
+
+class HashMap:
+    """
+    Open addressing HashMap stored entirely in one flat buffer: a multiprocessing.shared_memory block, or a file
+    mapped with mmap. Nothing in the table is a Python object, so processes can share it without copying or
+    unpickling it. Reference counting doesn't touch the pages either, so forked readers don't break copy-on-write.
+
+    The buffer holds a header, then a power-of-two array of fixed-width slots, then a heap. Each slot holds the full
+    hash of its key and the heap offsets of its key and value records. Collisions are resolved by triangular probing.
+    A lookup compares hashes first and then compares the key's UTF-8 bytes with the heap in place.
+
+    The process that creates the map may put, remove and clear. Other processes attach() to it by name or path and
+    read it with get, contains_key and get_keys_and_values. Writes are not synchronised with readers, so the map is
+    meant to be built first and read afterwards. Replaced values and removed keys leave their records in the heap.
+
+    The hash function is stored in the header by its name in a6_include.HASH_FUNCTIONS, together with any seed,
+    so a reader hashes keys exactly as the writer did. builtin_hash is not accepted, since string hashes differ
+    between processes.
+
+    Values may be None, bool, int, float, str or bytes, which are stored directly, or any other object that pickle
+    can serialise.
+    """
+
+    def __init__(self,
+                 capacity: int,
+                 function: callable = hash_function_1,
+                 heap_size: int = None,
+                 seed: int = None,
+                 name: str = None,
+                 path: str = None) -> None:
+        """
+        Create a new table with room for capacity slots, rounded up to a power of two, and heap_size bytes of key
+        and value records (by default 64 per slot). Up to MAX_LOAD of the slots can be used.
+
+        The table is placed in a new shared memory block, called name if given, or, if path is given, in a new file
+        at path that is mapped into memory.
+        """
+        if name is not None and path is not None:
+            raise ValueError('give either a shared memory name or a file path, not both')
+
+        function_name = _function_name(function)
+
+        # The seed is stored in 16 bytes, which holds every seed that a6_include.random_seed returns
+        if seed is not None:
+            seeded_hash(function, seed)
+            if not 0 <= seed < 1 << 128:
+                raise ValueError('seed must be a non-negative integer of at most 128 bits')
+
+        ht_capacity = 2
+        while ht_capacity < capacity:
+            ht_capacity *= 2
+
+        if heap_size is None:
+            heap_size = DEFAULT_HEAP_PER_SLOT * ht_capacity
+
+        heap_start = HEADER_SIZE + ht_capacity * SLOT.size
+        total = heap_start + heap_size
+
+        if path is not None:
+            with open(path, 'w+b') as file:
+                file.truncate(total)
+                self._open_file(file, writable=True)
+        else:
+            self._open_block(shared_memory.SharedMemory(name=name, create=True, size=total))
+            _created_blocks.add(self._block._name)
+
+        seed_bytes = (seed or 0).to_bytes(16, 'little')
+        HEADER.pack_into(self._buffer, 0, MAGIC, ht_capacity, 0, 0, heap_start, heap_start,
+                         function_name.encode('ascii'), seed_bytes, seed is not None)
+
+        self._writable = True
+        self._read_header()
+
+    @classmethod
+    def attach(cls, name: str = None, path: str = None) -> "HashMap":
+        """
+        Attach to a table created by another process, by the name of its shared memory block or the path of its
+        file. The attached map can only be read.
+        """
+        if (name is None) == (path is None):
+            raise ValueError('give either a shared memory name or a file path')
+
+        hash_map = cls.__new__(cls)
+
+        if path is not None:
+            with open(path, 'rb') as file:
+                hash_map._open_file(file, writable=False)
+        else:
+            try:
+                block = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                # Before Python 3.13 every attaching process registers the block with its resource tracker, which
+                # unlinks it when the process exits, while the creator still owns it. The registration is taken back,
+                # unless the tracker may also hold the creator's own registration of the block: when this process
+                # created it, or shares its tracker with the process it was forked from
+                block = shared_memory.SharedMemory(name=name)
+                if not _shared_tracker and block._name not in _created_blocks:
+                    resource_tracker.unregister(block._name, 'shared_memory')
+            hash_map._open_block(block)
+
+        hash_map._writable = False
+        hash_map._read_header()
+        return hash_map
+
+    def _open_block(self, block: shared_memory.SharedMemory) -> None:
+        """
+        Use a shared memory block as the table's buffer
+        """
+        self._block = block
+        self._mmap = None
+        self._buffer = block.buf
+        self.name = block.name
+
+    def _open_file(self, file, writable: bool) -> None:
+        """
+        Map an open file into memory and use it as the table's buffer
+        """
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        self._block = None
+        self._mmap = mmap.mmap(file.fileno(), 0, access=access)
+        self._buffer = memoryview(self._mmap)
+        self.name = file.name
+
+    def _read_header(self) -> None:
+        """
+        Check the header and load the layout and hash function of the table from it
+        """
+        magic, ht_capacity, _, _, heap_start, _, function_name, seed_bytes, seeded = \
+            HEADER.unpack_from(self._buffer, 0)
+
+        if magic != MAGIC:
+            raise ValueError(str(self.name) + ' does not hold a shared hash table')
+
+        self._capacity = ht_capacity
+        self._heap_start = heap_start
+        self._heap_limit = len(self._buffer)
+
+        function = HASH_FUNCTIONS[function_name.rstrip(b'\x00').decode('ascii')]
+        if seeded:
+            function = seeded_hash(function, int.from_bytes(seed_bytes, 'little'))
+        if needs_mixing(function):
+            function = mixed_hash(function)
+        self._hash_function = function
+
+    def close(self) -> None:
+        """
+        Release this process's mapping of the table. The table itself stays available to other processes.
+        """
+        if self._buffer is None:
+            return
+
+        self._buffer.release()
+        self._buffer = None
+        if self._block is not None:
+            self._block.close()
+        else:
+            self._mmap.close()
+
+    def unlink(self) -> None:
+        """
+        Destroy the shared memory block once every process has closed it. Tables stored in a file are left for the
+        caller to delete.
+        """
+        if self._block is not None:
+            self._block.unlink()
+            _created_blocks.discard(self._block._name)
+
+    def __enter__(self) -> "HashMap":
+        """
+        Return the map, for use in a with statement
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Close the map at the end of a with statement
+        """
+        self.close()
+
+    def _field(self, offset: int) -> int:
+        """
+        Read one of the changing header fields
+        """
+        return FIELD.unpack_from(self._buffer, offset)[0]
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._field(SIZE_OFFSET)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def tombstone_count(self) -> int:
+        """
+        Return the number of slots holding a tombstone
+        """
+        return self._field(TOMBSTONES_OFFSET)
+
+    def heap_free(self) -> int:
+        """
+        Return the number of heap bytes still free for new records
+        """
+        return self._heap_limit - self._field(HEAP_END_OFFSET)
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self.get_size() / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty slots in the hash table.
+        """
+        buffer = self._buffer
+        empty = 0
+        for index in range(self._capacity):
+            if SLOT.unpack_from(buffer, HEADER_SIZE + index * SLOT.size)[1] == EMPTY:
+                empty += 1
+        return empty
+
+    def _probe(self, key_bytes: bytes, key_hash: int) -> tuple:
+        """
+        Triangular probes for the key and returns (index of its slot, index of the first tombstone passed), where
+        the first is -1 if the key is not in the table and the second -1 if no tombstone was passed. The probe ends at
+        an empty slot, or once every slot has been visited.
+        """
+        buffer = self._buffer
+        mask = self._capacity - 1
+        table_index = key_hash & mask
+        key_length = len(key_bytes)
+        tombstone_index = -1
+
+        for step in range(1, self._capacity + 1):
+            slot_hash, key_offset, _ = SLOT.unpack_from(buffer, HEADER_SIZE + table_index * SLOT.size)
+
+            if key_offset == EMPTY:
+                break
+
+            if key_offset == TOMBSTONE:
+                if tombstone_index < 0:
+                    tombstone_index = table_index
+
+            elif slot_hash == key_hash and KEY_LENGTH.unpack_from(buffer, key_offset)[0] == key_length:
+                start = key_offset + KEY_LENGTH.size
+                if buffer[start:start + key_length] == key_bytes:
+                    return table_index, tombstone_index
+
+            table_index = (table_index + step) & mask
+
+        return -1, tombstone_index
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, or None if the key is not in the hash map.
+        """
+        table_index, _ = self._probe(key.encode('utf-8', 'surrogatepass'), self._hash_function(key) & MASK_64)
+        if table_index < 0:
+            return None
+
+        value_offset = SLOT.unpack_from(self._buffer, HEADER_SIZE + table_index * SLOT.size)[2]
+        return _read_value(self._buffer, value_offset)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise False.
+        """
+        return self._probe(key.encode('utf-8', 'surrogatepass'), self._hash_function(key) & MASK_64)[0] >= 0
+
+    def _check_writable(self) -> None:
+        """
+        Raise ValueError if this process attached to the table rather than creating it
+        """
+        if not self._writable:
+            raise ValueError('an attached shared table is read only')
+
+    def _append(self, record: bytes) -> int:
+        """
+        Copy a record to the end of the heap and return its offset, or raise SharedTableFull if it doesn't fit
+        """
+        offset = self._field(HEAP_END_OFFSET)
+        end = offset + len(record)
+        if end > self._heap_limit:
+            raise SharedTableFull('no heap space left for a ' + str(len(record)) + ' byte record')
+
+        self._buffer[offset:end] = record
+        FIELD.pack_into(self._buffer, HEAP_END_OFFSET, end)
+        return offset
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, or adds it if the key is not in the hash map. The key and the new
+        value are appended to the heap, and the slot is written last. Raises SharedTableFull if the table has no room.
+        """
+        self._check_writable()
+
+        key_bytes = key.encode('utf-8', 'surrogatepass')
+        key_hash = self._hash_function(key) & MASK_64
+        table_index, tombstone_index = self._probe(key_bytes, key_hash)
+        buffer = self._buffer
+
+        # 1 - The key is in the table: only the value record is new
+        if table_index >= 0:
+            slot_offset = HEADER_SIZE + table_index * SLOT.size
+            key_offset = SLOT.unpack_from(buffer, slot_offset)[1]
+            SLOT.pack_into(buffer, slot_offset, key_hash, key_offset, self._append(_value_record(value)))
+            return
+
+        # 2 - Otherwise reuse the first tombstone passed, or take the empty slot the probe ended at if the load allows
+        size = self._field(SIZE_OFFSET)
+        tombstones = self._field(TOMBSTONES_OFFSET)
+
+        if tombstone_index >= 0:
+            table_index = tombstone_index
+            tombstones -= 1
+        elif size + tombstones + 1 > MAX_LOAD * self._capacity:
+            raise SharedTableFull('all ' + str(self._capacity) + ' slots are in use')
+        else:
+            table_index = self._probe_empty(key_hash)
+
+        key_offset = self._append(KEY_LENGTH.pack(len(key_bytes)) + key_bytes)
+        value_offset = self._append(_value_record(value))
+
+        SLOT.pack_into(buffer, HEADER_SIZE + table_index * SLOT.size, key_hash, key_offset, value_offset)
+        FIELD.pack_into(buffer, SIZE_OFFSET, size + 1)
+        FIELD.pack_into(buffer, TOMBSTONES_OFFSET, tombstones)
+
+    def _probe_empty(self, key_hash: int) -> int:
+        """
+        Returns the index of the first empty slot of the key's probe sequence
+        """
+        buffer = self._buffer
+        mask = self._capacity - 1
+        table_index = key_hash & mask
+        step = 0
+
+        while SLOT.unpack_from(buffer, HEADER_SIZE + table_index * SLOT.size)[1] != EMPTY:
+            step += 1
+            table_index = (table_index + step) & mask
+
+        return table_index
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map. If the key is not in the hash map the
+        method does nothing. The slot becomes a tombstone; its records stay in the heap.
+        """
+        self._check_writable()
+
+        table_index, _ = self._probe(key.encode('utf-8', 'surrogatepass'), self._hash_function(key) & MASK_64)
+        if table_index < 0:
+            return
+
+        buffer = self._buffer
+        SLOT.pack_into(buffer, HEADER_SIZE + table_index * SLOT.size, 0, TOMBSTONE, 0)
+        FIELD.pack_into(buffer, SIZE_OFFSET, self._field(SIZE_OFFSET) - 1)
+        FIELD.pack_into(buffer, TOMBSTONES_OFFSET, self._field(TOMBSTONES_OFFSET) + 1)
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map and empties the heap. It does not change the table capacity.
+        """
+        self._check_writable()
+
+        buffer = self._buffer
+        buffer[HEADER_SIZE:self._heap_start] = bytes(self._heap_start - HEADER_SIZE)
+        FIELD.pack_into(buffer, SIZE_OFFSET, 0)
+        FIELD.pack_into(buffer, TOMBSTONES_OFFSET, 0)
+        FIELD.pack_into(buffer, HEAP_END_OFFSET, self._heap_start)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair stored in the hash map. The order
+        of the keys in the dynamic array does not matter.
+        """
+        arr = DynamicArray()
+        buffer = self._buffer
+
+        for index in range(self._capacity):
+            _, key_offset, value_offset = SLOT.unpack_from(buffer, HEADER_SIZE + index * SLOT.size)
+            if key_offset > TOMBSTONE:
+                length = KEY_LENGTH.unpack_from(buffer, key_offset)[0]
+                start = key_offset + KEY_LENGTH.size
+                key = str(buffer[start:start + length], 'utf-8', 'surrogatepass')
+                arr.append((key, _read_value(buffer, value_offset)))
+
+        return arr
+
+
+def _function_name(function) -> str:
+    """
+    Return the name a6_include.HASH_FUNCTIONS registers function under. Raise ValueError for builtin_hash, or any
+    function that is not registered
+    """
+    if function is builtin_hash:
+        raise ValueError('builtin_hash differs between processes, so it cannot hash a shared table')
+
+    for name, registered in HASH_FUNCTIONS.items():
+        if registered is function:
+            return name
+
+    raise ValueError(getattr(function, '__name__', repr(function)) + ' is not in a6_include.HASH_FUNCTIONS')
+
+
+def _value_record(value: object) -> bytes:
+    """
+    Encode a value as a heap record
+    """
+    if value is None:
+        tag, payload = TAG_NONE, b''
+    elif value is False:
+        tag, payload = TAG_FALSE, b''
+    elif value is True:
+        tag, payload = TAG_TRUE, b''
+    elif type(value) is int:
+        tag, payload = TAG_INT, value.to_bytes(value.bit_length() // 8 + 1, 'little', signed=True)
+    elif type(value) is float:
+        tag, payload = TAG_FLOAT, FLOAT.pack(value)
+    elif type(value) is str:
+        tag, payload = TAG_STR, value.encode('utf-8', 'surrogatepass')
+    elif type(value) is bytes:
+        tag, payload = TAG_BYTES, value
+    else:
+        tag, payload = TAG_PICKLE, pickle.dumps(value)
+
+    return VALUE_HEADER.pack(tag, len(payload)) + payload
+
+
+def _read_value(buffer: memoryview, offset: int) -> object:
+    """
+    Decode the value record at offset
+    """
+    tag, length = VALUE_HEADER.unpack_from(buffer, offset)
+    start = offset + VALUE_HEADER.size
+    payload = buffer[start:start + length]
+
+    if tag == TAG_NONE:
+        return None
+    if tag == TAG_FALSE:
+        return False
+    if tag == TAG_TRUE:
+        return True
+    if tag == TAG_INT:
+        return int.from_bytes(payload, 'little', signed=True)
+    if tag == TAG_FLOAT:
+        return FLOAT.unpack(payload)[0]
+    if tag == TAG_STR:
+        return str(payload, 'utf-8', 'surrogatepass')
+    if tag == TAG_BYTES:
+        return bytes(payload)
+    return pickle.loads(payload)
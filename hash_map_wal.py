@@ -0,0 +1,404 @@
+
+import os
+import pickle
+import struct
+import threading
+import zlib
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import DynamicArray, Snapshot, hash_function_1, hash_function_2
+
+
+# Map classes the log can be kept for
+WAL_MAPS = {
+    'sc': hash_map_sc.HashMap,
+    'oa': hash_map_oa.HashMap,
+}
+
+# Each record is the CRC-32 of its operation and payload, the operation, and the payload length, then the payload
+RECORD = struct.Struct('<IBI')
+
+# Logged operations. A put's payload is the pickled (key, value) pair, a remove's the pickled key, a clear's empty
+PUT = 1
+REMOVE = 2
+CLEAR = 3
+
+
+class HashMap:
+    """
+    HashMap whose changes are made durable by an append-only write-ahead log.
+
+    Every put, remove and clear is applied to an in-memory hash_map_sc.HashMap or hash_map_oa.HashMap and appended
+    to the log file path + '.log' as a checksummed record. Records are written and fsynced in groups: with
+    sync_interval 0 every change is on disk before the method returns, with a positive sync_interval a background
+    thread flushes the pending records that often, and with sync_interval None they are written in groups of
+    group_size but only fsynced by flush and close. A batch passed to put_many or remove_many is always written as
+    one group.
+
+    Each change is pickled before it is applied, so a key or value that can't be logged leaves the map unchanged. A
+    record whose write fails stays pending, to be written again by the next write or flush.
+
+    When the log grows past compact_bytes it is compacted: the log is rotated to path + '.log.compacting', a snapshot
+    of the map is taken (see a6_include.Snapshot), and a background thread writes it to path + '.snapshot' and deletes
+    the rotated log. Taking the snapshot copies every entry while the lock is held, so writers pause for time linear
+    in the size of the map; only the disk writes happen in the background.
+
+    Opening a map loads the snapshot, if there is one, and replays the logs on top of it. Consecutive puts and
+    removes are replayed through put_many and remove_many. A torn record at the end of the log, left by a crash
+    during a write, is discarded.
+    """
+
+    def __init__(self,
+                 path: str,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 kind: str = 'sc',
+                 sync_interval: float = 0.1,
+                 group_size: int = 1024,
+                 compact_bytes: int = 64 << 20,
+                 **options) -> None:
+        """
+        Open the durable map stored at path, or start a new one. kind selects the in-memory map, 'sc' or 'oa', which
+        is built from capacity, function and options when there is no snapshot yet. A snapshot records its own hash
+        function, so function and capacity only apply to a new map, and seed or capacity_policy passed when reopening
+        a map must match the saved ones.
+        """
+        if kind not in WAL_MAPS:
+            raise ValueError('kind must be one of ' + ', '.join(WAL_MAPS))
+        if sync_interval is not None and sync_interval < 0:
+            raise ValueError('sync_interval must be 0 or more, or None')
+        if group_size < 1:
+            raise ValueError('group_size must be at least 1')
+
+        self._snapshot_path = path + '.snapshot'
+        self._log_path = path + '.log'
+        self._compacting_path = path + '.log.compacting'
+        self._sync_interval = sync_interval
+        self._group_size = group_size
+        self._compact_bytes = compact_bytes
+
+        # 1 - Load the last snapshot and replay every log written since it. A new map saves an empty snapshot first,
+        # so its hash function and options are on disk before anything is logged
+        if os.path.exists(self._snapshot_path):
+            self._map = WAL_MAPS[kind].load(self._snapshot_path, **options)
+        else:
+            self._map = WAL_MAPS[kind](capacity, function, **options)
+            self._map.save(self._snapshot_path)
+
+        rotated = os.path.exists(self._compacting_path)
+        if rotated:
+            self._replay(self._compacting_path)
+        log_end = self._replay(self._log_path)
+
+        # 2 - Open the log for appending, cutting off any torn record at its end
+        self._log = open(self._log_path, 'ab', buffering=0)
+        self._log.truncate(log_end)
+        self._log_bytes = log_end
+        self._pending = []
+        self._lock = threading.RLock()
+        self._compactor = None
+
+        # 3 - A compaction interrupted by a crash is finished before anything else is logged
+        if rotated:
+            self._map.save(self._snapshot_path)
+            os.remove(self._compacting_path)
+
+        # 4 - Start the background flusher
+        self._closed = threading.Event()
+        self._flusher = None
+        if sync_interval:
+            self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._flusher.start()
+
+    def _replay(self, log_path: str) -> int:
+        """
+        Applies every complete record of the log at log_path to the map and returns the offset just past the last
+        one. Runs of puts and of removes are applied as one put_many or remove_many each.
+        """
+        if not os.path.exists(log_path):
+            return 0
+
+        with open(log_path, 'rb') as file:
+            data = file.read()
+
+        hash_map = self._map
+        run_operation = None
+        run = []
+        offset = 0
+
+        while offset + RECORD.size <= len(data):
+            checksum, operation, length = RECORD.unpack_from(data, offset)
+            start = offset + RECORD.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload, operation) != checksum:
+                break
+
+            # Apply the run of records collected so far once the operation changes
+            if operation != run_operation and run:
+                _apply(hash_map, run_operation, run)
+                run = []
+            run_operation = operation
+
+            if operation == CLEAR:
+                hash_map.clear()
+            else:
+                run.append(pickle.loads(payload))
+            offset = start + length
+
+        if run:
+            _apply(hash_map, run_operation, run)
+
+        return offset
+
+    def _append(self, operation: int, payloads, group: bool = False) -> None:
+        """
+        Adds one record per payload to the pending group, then writes the group out if the durability settings call
+        for it, or if group is set. Must be called with the lock held.
+        """
+        for payload in payloads:
+            self._pending.append(RECORD.pack(zlib.crc32(payload, operation), operation, len(payload)) + payload)
+
+        if self._sync_interval == 0:
+            self._write(sync=True)
+        elif group or len(self._pending) >= self._group_size:
+            self._write(sync=self._sync_interval is not None)
+
+    def _write(self, sync: bool) -> None:
+        """
+        Writes the pending group of records to the log, fsyncing it if sync is set, and starts a compaction if the log
+        has grown past compact_bytes. Must be called with the lock held.
+        """
+        # The records stay pending until they have been written, so a failed write is retried by the next one. The log
+        # is unbuffered, so whatever part of the group reached it can be cut off again before the retry
+        if self._pending:
+            group = memoryview(b''.join(self._pending))
+            written = 0
+            try:
+                while written < len(group):
+                    written += self._log.write(group[written:])
+            except OSError:
+                os.ftruncate(self._log.fileno(), self._log_bytes)
+                raise
+
+            self._pending = []
+            self._log_bytes += len(group)
+
+        if sync:
+            os.fsync(self._log.fileno())
+
+        if self._log_bytes >= self._compact_bytes and self._compactor is None:
+            self._start_compaction()
+
+    def _flush_periodically(self) -> None:
+        """
+        Background thread: writes and fsyncs the pending records every sync_interval seconds until the map is closed
+        """
+        while not self._closed.wait(self._sync_interval):
+            with self._lock:
+                if self._pending:
+                    self._write(sync=True)
+
+    def flush(self) -> None:
+        """
+        Writes every pending record to the log and fsyncs it.
+        """
+        with self._lock:
+            self._write(sync=True)
+
+    def _start_compaction(self) -> None:
+        """
+        Rotates the log, takes a snapshot of the map as it is now and starts a background thread that writes it out.
+        Must be called with the lock held, with no compaction running; the snapshot is taken before it returns, so
+        writers wait for it.
+        """
+        # A rotated log left by a failed compaction is folded into this one
+        if os.path.exists(self._compacting_path):
+            self._log.close()
+            with open(self._compacting_path, 'ab') as rotated, open(self._log_path, 'rb') as log:
+                rotated.write(log.read())
+                rotated.flush()
+                os.fsync(rotated.fileno())
+            os.remove(self._log_path)
+        else:
+            os.fsync(self._log.fileno())
+            self._log.close()
+            os.replace(self._log_path, self._compacting_path)
+
+        self._log = open(self._log_path, 'ab', buffering=0)
+        self._log_bytes = 0
+
+        snapshot = self._map.snapshot()
+        self._compactor = threading.Thread(target=self._compact, args=(snapshot,), daemon=True)
+        self._compactor.start()
+
+    def _compact(self, snapshot: Snapshot) -> None:
+        """
+        Background thread: writes the snapshot and then deletes the rotated log it replaces
+        """
+        try:
+            snapshot.write(self._snapshot_path)
+            os.remove(self._compacting_path)
+        finally:
+            with self._lock:
+                self._compactor = None
+
+    def compact(self, wait: bool = True) -> None:
+        """
+        Compacts the log into a new snapshot now, waiting for it to be written unless wait is False. Does nothing if a
+        compaction is already running, apart from waiting for it.
+        """
+        with self._lock:
+            self._write(sync=True)
+            if self._compactor is None:
+                self._start_compaction()
+            compactor = self._compactor
+
+        if wait and compactor is not None:
+            compactor.join()
+
+    def close(self) -> None:
+        """
+        Writes and fsyncs every pending record, waits for any compaction to finish and closes the log.
+        """
+        if self._closed.is_set():
+            return
+
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+
+        with self._lock:
+            self._write(sync=True)
+            compactor = self._compactor
+
+        if compactor is not None:
+            compactor.join()
+
+        self._log.close()
+
+    def __enter__(self) -> "HashMap":
+        """
+        Return the map, for use in a with statement
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Close the map at the end of a with statement
+        """
+        self.close()
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, or adds it if the key is not in the hash map, and logs the change.
+        """
+        payload = pickle.dumps((key, value), pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._map.put(key, value)
+            self._append(PUT, (payload,))
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map and logs the change. If the key is not in the
+        hash map nothing is removed or logged.
+        """
+        payload = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if self._map.contains_key(key):
+                self._map.remove(key)
+                self._append(REMOVE, (payload,))
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map and logs the change.
+        """
+        with self._lock:
+            self._map.clear()
+            self._append(CLEAR, (b'',))
+
+    def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) pair of pairs into the hash map, and logs them as one group of records.
+        """
+        pairs = _materialize(pairs)
+        payloads = [pickle.dumps(pair, pickle.HIGHEST_PROTOCOL) for pair in pairs]
+        with self._lock:
+            self._map.put_many(pairs)
+            self._append(PUT, payloads, group=True)
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key of keys from the hash map, and logs them as one group of records.
+        """
+        keys = _materialize(keys)
+        payloads = [pickle.dumps(key, pickle.HIGHEST_PROTOCOL) for key in keys]
+        with self._lock:
+            self._map.remove_many(keys)
+            self._append(REMOVE, payloads, group=True)
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, or None if the key is not in the hash map.
+        """
+        return self._map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise False.
+        """
+        return self._map.contains_key(key)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key of keys, in order, with None for keys that are not in
+        the hash map.
+        """
+        return self._map.get_many(keys)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._map.get_capacity()
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self._map.table_load()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return self._map.empty_buckets()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair stored in the hash map.
+        """
+        return self._map.get_keys_and_values()
+
+
+def _apply(hash_map, operation: int, run: list) -> None:
+    """
+    Apply a run of replayed put or remove payloads to the map in one batch
+    """
+    if operation == PUT:
+        hash_map.put_many(run)
+    else:
+        hash_map.remove_many(run)
+
+
+def _materialize(items) -> list:
+    """
+    Return the contents of a DynamicArray or any other iterable as a list, for the batch methods
+    """
+    return list(items)
@@ -0,0 +1,6 @@
+
+import os
+import sys
+
+# The hash map modules sit at the top of the repository rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,102 @@
+
+import random
+
+import pytest
+
+import a6_include
+import hash_map_concurrent
+import hash_map_oa
+import hash_map_sc
+from a6_include import (BATCH_CHUNK_SIZE, BATCH_MAX_KEY_LENGTH, batch_hash, batch_hash_function_1,
+                        batch_hash_function_2, fnv1a_hash, hash_function_1, hash_function_2, mixed_hash)
+
+
+def _keys(count: int, seed: int = 5) -> list:
+    """
+    Return keys of many lengths, from empty to past BATCH_MAX_KEY_LENGTH, some of them with non-ASCII characters
+    """
+    generator = random.Random(seed)
+    lengths = [0, 1, 7, 64, 65, BATCH_MAX_KEY_LENGTH, BATCH_MAX_KEY_LENGTH + 1, 5000]
+    alphabet = 'abcxyzé€𝄞'
+    return [''.join(generator.choice(alphabet) for _ in range(generator.choice(lengths))) for _ in range(count)]
+
+
+@pytest.mark.parametrize('batch_function, function', [(batch_hash_function_1, hash_function_1),
+                                                      (batch_hash_function_2, hash_function_2)])
+def test_batch_matches_scalar(batch_function, function):
+    keys = _keys(BATCH_CHUNK_SIZE + 100)
+    assert batch_function(keys) == [function(key) for key in keys]
+    assert batch_function(iter(keys[:10])) == [function(key) for key in keys[:10]]
+    assert batch_function([]) == []
+
+
+@pytest.mark.parametrize('batch_function, function', [(batch_hash_function_1, hash_function_1),
+                                                      (batch_hash_function_2, hash_function_2)])
+def test_long_keys_only(batch_function, function):
+    keys = ['a' * (BATCH_MAX_KEY_LENGTH + 1), 'b' * 50000]
+    assert batch_function(keys) == [function(key) for key in keys]
+
+
+@pytest.mark.skipif(a6_include.numpy is None, reason='NumPy is not installed')
+def test_long_key_does_not_widen_the_matrix(monkeypatch):
+    widths = []
+    code_point_matrix = a6_include._code_point_matrix
+
+    def recording_matrix(keys):
+        matrix = code_point_matrix(keys)
+        widths.append(matrix.shape[1])
+        return matrix
+
+    monkeypatch.setattr(a6_include, '_code_point_matrix', recording_matrix)
+    keys = ['key' + str(index) for index in range(100)] + ['x' * 50000]
+
+    assert batch_hash_function_2(keys) == [hash_function_2(key) for key in keys]
+    assert max(widths) <= BATCH_MAX_KEY_LENGTH
+
+
+def test_batch_hash():
+    keys = _keys(300)
+    assert batch_hash(hash_function_2, keys) == [hash_function_2(key) for key in keys]
+    assert batch_hash(mixed_hash(hash_function_1), keys) == [mixed_hash(hash_function_1)(key) for key in keys]
+    assert batch_hash(fnv1a_hash, keys) == [fnv1a_hash(key) for key in keys]
+
+
+MAPS = [hash_map_sc.HashMap, hash_map_oa.HashMap, hash_map_concurrent.HashMap]
+
+
+@pytest.mark.parametrize('map_class', MAPS)
+@pytest.mark.parametrize('capacity_policy', ['prime', 'power_of_two'])
+def test_maps_take_a_matching_batch_function(map_class, capacity_policy):
+    hash_map = map_class(11, hash_function_2, capacity_policy=capacity_policy)
+    keys = ['key' + str(index) for index in range(100)]
+
+    hash_map.put_many([(key, key) for key in keys], batch_hash_function_2)
+    assert all(hash_map.get(key) == key for key in keys)
+    assert list(hash_map.get_many(keys[:3], batch_hash_function_2)) == keys[:3]
+
+    hash_map.remove_many(keys[:50], batch_hash_function_2)
+    assert hash_map.get_size() == 50
+    assert not hash_map.contains_key(keys[0])
+
+
+@pytest.mark.parametrize('map_class', MAPS)
+@pytest.mark.parametrize('function, options', [(hash_function_2, {}), (fnv1a_hash, {'seed': 3})])
+def test_maps_reject_a_batch_function_that_differs(map_class, function, options):
+    hash_map = map_class(11, function, **options)
+    hash_map.put('kept', 1)
+
+    with pytest.raises(ValueError):
+        hash_map.put_many([('ab', 1), ('cd', 2)], batch_hash_function_1)
+    with pytest.raises(ValueError):
+        hash_map.get_many(['kept'], batch_hash_function_1)
+    with pytest.raises(ValueError):
+        hash_map.remove_many(['kept'], lambda keys: [function(key) for key in keys][:-1] or [0])
+
+    assert hash_map.get_size() == 1
+    assert hash_map.get('kept') == 1
+
+
+def test_increment_many_rejects_a_batch_function_that_differs():
+    hash_map = hash_map_sc.HashMap(11, hash_function_2)
+    with pytest.raises(ValueError):
+        hash_map.increment_many(['ab', 'cd'], batch_hash_function_1)
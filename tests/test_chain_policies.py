@@ -0,0 +1,70 @@
+
+import pytest
+
+import hash_map_sc
+
+
+def _order(bucket) -> list:
+    return [node.key for node in bucket]
+
+
+def _chained_map(chain_policy: str, **options) -> hash_map_sc.HashMap:
+    # Every key hashes to 10, the last bucket of the initial table; nodes are inserted at the front of their chain
+    hash_map = hash_map_sc.HashMap(11, lambda key: 10, chain_policy=chain_policy, **options)
+    for key in 'edcba':
+        hash_map.put(key, key.upper())
+    return hash_map
+
+
+@pytest.mark.parametrize('chain_policy, after_d, after_e', [('static', 'abcde', 'abcde'),
+                                                           ('move_to_front', 'dabce', 'edabc'),
+                                                           ('transpose', 'abdce', 'abdec')])
+def test_policies(chain_policy, after_d, after_e):
+    hash_map = _chained_map(chain_policy)
+    bucket = hash_map._buckets[10]
+    assert _order(bucket) == list('abcde')
+
+    assert hash_map.get('d') == 'D'
+    assert _order(bucket) == list(after_d)
+
+    assert hash_map.contains_key('e')
+    assert _order(bucket) == list(after_e)
+
+    # Misses leave the chain as it is
+    assert hash_map.get('missing') is None
+    assert not hash_map.contains_key('missing')
+    assert _order(bucket) == list(after_e)
+
+
+@pytest.mark.parametrize('chain_policy', ['move_to_front', 'transpose'])
+def test_old_table_lookups_keep_their_order(chain_policy):
+    hash_map = _chained_map(chain_policy, incremental=True, migrate_step=1)
+    hash_map.resize_table(23)
+    old_bucket = hash_map._old_buckets[10]
+
+    assert hash_map.get('e') == 'E'
+    assert hash_map.contains_key('c')
+    assert hash_map._old_buckets is not None
+    assert _order(old_bucket) == list('abcde')
+
+    # Once the keys have moved, lookups in the new table reorder their chain again
+    hash_map._finish_migration()
+    bucket = hash_map._buckets[10]
+    before = _order(bucket).index('c')
+    hash_map.get('c')
+    after = _order(bucket).index('c')
+    assert after == (0 if chain_policy == 'move_to_front' else before - 1)
+
+
+def test_remove_under_each_policy():
+    for chain_policy in hash_map_sc.CHAIN_POLICIES:
+        hash_map = _chained_map(chain_policy)
+        hash_map.remove('c')
+        hash_map.remove('missing')
+        assert hash_map.get_size() == 4
+        assert _order(hash_map._buckets[10]) == list('abde')
+
+
+def test_bad_chain_policy():
+    with pytest.raises(ValueError):
+        hash_map_sc.HashMap(11, chain_policy='random')
@@ -0,0 +1,223 @@
+
+import random
+from collections import OrderedDict
+
+import pytest
+
+import hash_map_cache
+from a6_include import hash_function_1, hash_function_2
+
+
+class Clock:
+    """
+    Clock for the cache that only moves when a test advances it
+    """
+
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _eviction_order(cache) -> list:
+    """
+    Returns the cached keys from the next to be evicted to the last
+    """
+    keys = []
+    node = cache._order.newer
+    while node is not cache._order:
+        keys.append(node.key)
+        node = node.newer
+    return keys
+
+
+@pytest.mark.parametrize('arguments', [{'max_size': 0}, {'policy': 'fifo'}, {'ttl': 0}])
+def test_invalid_arguments(arguments):
+    options = {'max_size': 3, 'function': hash_function_1}
+    options.update(arguments)
+    with pytest.raises(ValueError):
+        hash_map_cache.HashMap(**options)
+
+    with pytest.raises(ValueError):
+        hash_map_cache.HashMap(3).put('key', 1, ttl=-1)
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = hash_map_cache.HashMap(3, hash_function_1, policy='lru')
+    for key in ('a', 'b', 'c'):
+        cache.put(key, key.upper())
+    assert _eviction_order(cache) == ['a', 'b', 'c']
+
+    # A hit and an update both count as a use; contains_key does not
+    assert cache.get('a') == 'A'
+    cache.put('b', 'B2')
+    assert cache.contains_key('c')
+    assert _eviction_order(cache) == ['c', 'a', 'b']
+
+    cache.put('d', 'D')
+    assert not cache.contains_key('c')
+    assert _eviction_order(cache) == ['a', 'b', 'd']
+
+    cache.put('e', 'E')
+    assert cache.get('a') is None
+    assert cache.get_size() == 3
+    assert cache.stats()['evictions'] == 2
+
+
+def test_lfu_evicts_the_least_frequently_used():
+    cache = hash_map_cache.HashMap(3, hash_function_2, policy='lfu')
+    for key in ('a', 'b', 'c'):
+        cache.put(key, key.upper())
+
+    cache.get('a')
+    cache.get('a')
+    cache.get('b')
+    assert _eviction_order(cache) == ['c', 'b', 'a']
+
+    # c has the lowest count. The new entry d starts at the lowest count, so it goes next, ahead of b
+    cache.put('d', 'D')
+    assert not cache.contains_key('c')
+    cache.put('e', 'E')
+    assert not cache.contains_key('d')
+    assert _eviction_order(cache) == ['e', 'b', 'a']
+
+
+def test_lfu_breaks_ties_by_last_use():
+    cache = hash_map_cache.HashMap(3, hash_function_1, policy='lfu')
+    for key in ('x', 'y', 'z'):
+        cache.put(key, 0)
+
+    cache.get('x')
+    cache.get('y')
+    cache.get('z')
+    cache.get('x')
+    cache.get('y')
+    assert _eviction_order(cache) == ['z', 'x', 'y']
+
+    cache.get('z')
+    assert _eviction_order(cache) == ['x', 'y', 'z']
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_lru_matches_an_ordered_dict(seed):
+    rng = random.Random(seed)
+    cache = hash_map_cache.HashMap(8, hash_function_1, policy='lru')
+    model = OrderedDict()
+
+    for step in range(3000):
+        key = 'k' + str(rng.randrange(20))
+        if rng.random() < 0.5:
+            cache.put(key, step)
+            if key in model:
+                model.move_to_end(key)
+            elif len(model) == 8:
+                model.popitem(last=False)
+            model[key] = step
+        else:
+            assert cache.get(key) == model.get(key)
+            if key in model:
+                model.move_to_end(key)
+
+    assert _eviction_order(cache) == list(model)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_lfu_matches_a_model(seed):
+    rng = random.Random(seed)
+    cache = hash_map_cache.HashMap(8, hash_function_2, policy='lfu')
+
+    # The model holds each key's value, use count and the step it was last used at, and evicts the smallest
+    # (count, last use)
+    model = {}
+
+    for step in range(3000):
+        key = 'k' + str(rng.randrange(20))
+        if rng.random() < 0.5:
+            cache.put(key, step)
+            if key in model:
+                model[key] = [step, model[key][1] + 1, step]
+            else:
+                if len(model) == 8:
+                    del model[min(model, key=lambda cached: model[cached][1:])]
+                model[key] = [step, 1, step]
+        else:
+            assert cache.get(key) == (model[key][0] if key in model else None)
+            if key in model:
+                model[key][1] += 1
+                model[key][2] = step
+
+    assert _eviction_order(cache) == sorted(model, key=lambda cached: model[cached][1:])
+
+
+@pytest.mark.parametrize('policy', hash_map_cache.CACHE_POLICIES)
+def test_entries_expire_by_the_injected_clock(policy):
+    clock = Clock()
+    cache = hash_map_cache.HashMap(4, hash_function_1, policy=policy, ttl=10, clock=clock)
+    cache.put('a', 1)
+    cache.put('b', 2, ttl=30)
+
+    clock.now += 9.5
+    assert cache.get('a') == 1
+
+    # Expiry is at put time plus ttl; a lookup at that moment drops the entry and counts a miss
+    clock.now += 0.5
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    assert cache.get_size() == 1
+
+    # Updating a key restarts its time to live, and contains_key drops an expired entry without counting a miss
+    clock.now += 15
+    cache.put('b', 3, ttl=5)
+    clock.now += 4
+    assert cache.contains_key('b')
+    clock.now += 1
+    assert not cache.contains_key('b')
+    assert cache.get_size() == 0
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expirations'], stats['evictions']) == (2, 1, 2, 0)
+
+
+def test_entries_without_a_ttl_never_expire():
+    clock = Clock()
+    cache = hash_map_cache.HashMap(2, hash_function_1, clock=clock)
+    cache.put('a', 1)
+    cache.put('b', 2, ttl=1)
+
+    clock.now += 1e9
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+
+
+def test_expired_entry_at_the_front_is_evicted():
+    clock = Clock()
+    cache = hash_map_cache.HashMap(2, hash_function_1, ttl=5, clock=clock)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    clock.now += 10
+
+    # Neither expired entry has been looked up, so a put into the full cache evicts the front one
+    cache.put('c', 3)
+    assert _eviction_order(cache) == ['b', 'c']
+    assert cache.stats()['evictions'] == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+
+def test_hit_and_miss_counts():
+    cache = hash_map_cache.HashMap(2, hash_function_2)
+    cache.put('a', 1)
+    cache.get('a')
+    cache.get('a')
+    cache.get('missing')
+    assert list(cache.get_many(['a', 'b'])) == [1, None]
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (3, 2)
+    assert (stats['policy'], stats['max_size']) == ('lru', 2)
+
+    cache.clear()
+    assert cache.get_size() == 0
+    assert _eviction_order(cache) == []
+    assert cache.stats()['hits'] == 3
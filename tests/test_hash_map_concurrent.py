@@ -0,0 +1,140 @@
+
+import sys
+import threading
+
+import pytest
+
+import hash_map_concurrent
+from a6_include import hash_function_1, hash_function_2
+
+
+THREADS = 8
+
+
+@pytest.fixture(autouse=True)
+def frequent_switches():
+    """
+    Switch threads as often as possible, so that operations on different threads interleave
+    """
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def _run_threads(target, count: int = THREADS) -> None:
+    """
+    Runs target(thread_number) on count threads started together, and re-raises the first failure of any of them.
+    The threads are daemons, so one stuck in a corrupted chain fails the test instead of hanging the run
+    """
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def run(number: int) -> None:
+        barrier.wait()
+        try:
+            target(number)
+        except BaseException as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=run, args=(number,), daemon=True) for number in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+        assert not thread.is_alive()
+
+    if errors:
+        raise errors[0]
+
+
+def test_stripes_must_be_positive():
+    with pytest.raises(ValueError):
+        hash_map_concurrent.HashMap(11, hash_function_1, stripes=0)
+
+
+@pytest.mark.parametrize('stripes', [1, 4, 16])
+@pytest.mark.parametrize('function', [hash_function_1, hash_function_2])
+def test_concurrent_puts_and_gets(stripes, function):
+    # A small starting capacity makes the table resize many times while the threads are writing
+    hash_map = hash_map_concurrent.HashMap(3, function, stripes=stripes)
+    per_thread = 1500
+
+    def work(number: int) -> None:
+        for index in range(per_thread):
+            key = 't' + str(number) + 'k' + str(index)
+            hash_map.put(key, index)
+
+            # A lock-free read must see the thread's own writes, even while another thread is resizing
+            assert hash_map.get(key) == index
+            if index >= 10:
+                assert hash_map.contains_key('t' + str(number) + 'k' + str(index - 10))
+
+    _run_threads(work)
+
+    assert hash_map.get_size() == THREADS * per_thread
+    for number in range(THREADS):
+        for index in range(per_thread):
+            assert hash_map.get('t' + str(number) + 'k' + str(index)) == index
+    assert hash_map.get_keys_and_values().length() == THREADS * per_thread
+
+
+def test_concurrent_updates_of_shared_keys():
+    hash_map = hash_map_concurrent.HashMap(11, hash_function_2, stripes=4)
+    keys = ['shared' + str(index) for index in range(200)]
+
+    def work(number: int) -> None:
+        for round_number in range(5):
+            for key in keys:
+                hash_map.put(key, (number, round_number))
+                assert hash_map.get(key) is not None
+
+    _run_threads(work)
+
+    # Every key holds the last value one of the threads wrote to it
+    assert hash_map.get_size() == len(keys)
+    for key in keys:
+        number, round_number = hash_map.get(key)
+        assert 0 <= number < THREADS and round_number == 4
+
+
+def test_concurrent_increments_are_not_lost():
+    hash_map = hash_map_concurrent.HashMap(5, hash_function_1, stripes=8)
+    keys = ['count' + str(index) for index in range(100)]
+    rounds = 50
+
+    def work(number: int) -> None:
+        for _ in range(rounds):
+            for key in keys:
+                hash_map.increment(key)
+
+    _run_threads(work)
+
+    assert hash_map.get_size() == len(keys)
+    for key in keys:
+        assert hash_map.get(key) == THREADS * rounds
+
+
+def test_concurrent_puts_and_removes():
+    hash_map = hash_map_concurrent.HashMap(7, hash_function_2, stripes=16)
+    per_thread = 1000
+
+    def work(number: int) -> None:
+        # Each thread adds its own keys and removes the odd ones again, while a batch insert from another thread
+        # takes every stripe lock
+        prefix = 't' + str(number) + 'k'
+        for index in range(per_thread):
+            hash_map.put(prefix + str(index), index)
+            if index % 2:
+                hash_map.remove(prefix + str(index))
+                assert not hash_map.contains_key(prefix + str(index))
+            if index % 250 == 0:
+                hash_map.put_many([('batch' + str(number) + '_' + str(index), index)])
+
+    _run_threads(work)
+
+    assert hash_map.get_size() == THREADS * (per_thread // 2 + 4)
+    for number in range(THREADS):
+        for index in range(per_thread):
+            expected = None if index % 2 else index
+            assert hash_map.get('t' + str(number) + 'k' + str(index)) == expected
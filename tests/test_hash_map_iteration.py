@@ -0,0 +1,90 @@
+
+import pytest
+
+import hash_map_oa
+from a6_include import hash_function_1, hash_function_2
+
+
+def _filled(count: int = 30, **options):
+    hash_map = hash_map_oa.HashMap(11, hash_function_1, **options)
+    for index in range(count):
+        hash_map.put('key' + str(index), index)
+    return hash_map
+
+
+def test_iteration_yields_each_live_entry_once():
+    hash_map = _filled()
+    for index in range(0, 30, 3):
+        hash_map.remove('key' + str(index))
+
+    expected = {'key' + str(index): index for index in range(30) if index % 3}
+    assert {entry.key: entry.value for entry in hash_map} == expected
+    assert sorted(hash_map.keys()) == sorted(expected)
+    assert sorted(hash_map.values()) == sorted(expected.values())
+    assert sorted(hash_map.items()) == sorted(expected.items())
+    assert sorted(hash_map.get_keys_and_values()) == sorted(expected.items())
+
+
+def test_iterators_are_independent():
+    hash_map = _filled(10)
+
+    # Nested loops each keep their own position
+    pairs = [(outer.key, inner.key) for outer in hash_map for inner in hash_map]
+    assert len(pairs) == 100
+    assert len(set(pairs)) == 100
+
+    # Two iterators stepped alternately see the same sequence
+    first = iter(hash_map)
+    second = iter(hash_map)
+    assert next(first).key == next(second).key
+    assert next(first).key == next(second).key
+    assert [entry.key for entry in first] == [entry.key for entry in second]
+
+
+@pytest.mark.parametrize('change', [
+    lambda hash_map: hash_map.put('new', 1),
+    lambda hash_map: hash_map.remove('key5'),
+    lambda hash_map: hash_map.clear(),
+    lambda hash_map: hash_map.resize_table(200),
+    lambda hash_map: hash_map.put_many([('new', 1)]),
+    lambda hash_map: hash_map.remove_many(['key5']),
+])
+def test_changing_the_map_invalidates_iterators(change):
+    hash_map = _filled()
+    iterator = iter(hash_map)
+    next(iterator)
+
+    change(hash_map)
+    with pytest.raises(RuntimeError):
+        next(iterator)
+
+
+def test_updating_values_does_not_invalidate_iterators():
+    hash_map = _filled()
+
+    # Updating an existing key, or removing a key that is not there, leaves the set of entries as it was
+    for entry in hash_map:
+        hash_map.put(entry.key, -entry.value)
+        hash_map.remove('missing')
+
+    assert sorted(hash_map.values()) == sorted(-index for index in range(30))
+
+
+def test_iterators_started_after_a_change_are_valid():
+    hash_map = _filled()
+    iterator = iter(hash_map)
+    next(iterator)
+    hash_map.put('new', 1)
+
+    assert sum(1 for _ in hash_map) == 31
+
+
+@pytest.mark.parametrize('function', [hash_function_1, hash_function_2])
+def test_iteration_during_a_migration_sees_both_tables(function):
+    hash_map = hash_map_oa.HashMap(11, function, incremental=True, migrate_step=1)
+    index = 0
+    while hash_map._old_buckets is None:
+        hash_map.put('key' + str(index), index)
+        index += 1
+
+    assert sorted(hash_map.items()) == sorted(('key' + str(key), key) for key in range(index))
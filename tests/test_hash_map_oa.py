@@ -0,0 +1,58 @@
+
+import hash_map_oa
+from a6_include import hash_function_1, hash_function_2
+
+
+def test_baseline_constructor():
+    for function in (hash_function_1, hash_function_2):
+        hash_map = hash_map_oa.HashMap(20, function)
+
+        assert hash_map.get_capacity() == 23
+        assert hash_map._capacity == 23
+        assert hash_map._buckets.length() == 23
+        assert all(hash_map._buckets[index] is None for index in range(23))
+        assert hash_map._hash_function is function
+        assert hash_map.get_size() == 0
+
+    # A prime capacity is kept as it is
+    assert hash_map_oa.HashMap(53, hash_function_1).get_capacity() == 53
+
+
+def test_removals_leave_tombstones_that_compaction_flushes():
+    hash_map = hash_map_oa.HashMap(101, hash_function_1)
+    for index in range(40):
+        hash_map.put('key' + str(index), index)
+    for index in range(30):
+        hash_map.remove('key' + str(index))
+
+    assert hash_map.tombstone_count() == 30
+    assert hash_map.get_capacity() == 101
+
+    # Puts either reuse a tombstone or fill an empty bucket. Once live entries plus tombstones reach half of the
+    # table, a put rehashes in place instead of growing
+    index = 40
+    while hash_map.tombstone_count():
+        hash_map.put('key' + str(index), index)
+        index += 1
+        assert index < 100
+
+    assert hash_map.get_capacity() == 101
+    assert hash_map.get_size() == index - 30
+    for key in range(30, index):
+        assert hash_map.get('key' + str(key)) == key
+    assert not hash_map.contains_key('key0')
+
+
+def test_put_after_tombstone_does_not_store_the_key_twice():
+    hash_map = hash_map_oa.HashMap(11, lambda key: 0)
+    hash_map.put('a', 1)
+    hash_map.put('b', 2)
+    hash_map.remove('a')
+
+    # 'b' lies past the tombstone left by 'a', so the update must find it instead of reusing the tombstone
+    hash_map.put('b', 3)
+
+    assert hash_map.get_size() == 1
+    assert hash_map.get('b') == 3
+    hash_map.remove('b')
+    assert not hash_map.contains_key('b')
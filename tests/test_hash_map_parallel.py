@@ -0,0 +1,65 @@
+
+import random
+from collections import Counter
+
+import pytest
+
+import hash_map_parallel
+from a6_include import DynamicArray, hash_function_2
+
+
+def _elements(count: int = 3000) -> list:
+    generator = random.Random(3)
+    return ['key' + str(generator.randrange(200)) for _ in range(count)]
+
+
+@pytest.fixture(params=[1, 2])
+def workers(request):
+    return request.param
+
+
+def test_count_frequencies_of_an_array(workers):
+    elements = _elements()
+    counts = hash_map_parallel.count_frequencies(DynamicArray(elements), workers, hash_function_2, chunk_size=64)
+
+    assert dict(counts.get_keys_and_values()) == Counter(elements)
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+@pytest.mark.parametrize('final_newline', [True, False])
+def test_count_frequencies_of_a_file(tmp_path, workers, newline, final_newline):
+    # Empty lines are elements too, and slices of a few bytes cut through most lines
+    elements = _elements() + ['', '', 'ünïcode']
+    random.Random(4).shuffle(elements)
+    path = tmp_path / 'elements.txt'
+    path.write_bytes((newline.join(elements) + (newline if final_newline else '')).encode('utf-8'))
+
+    counts = hash_map_parallel.count_frequencies(str(path), workers, hash_function_2, slice_bytes=7)
+
+    assert dict(counts.get_keys_and_values()) == Counter(elements)
+
+
+def test_find_mode(tmp_path, workers):
+    elements = ['a', 'b', 'b', 'c', 'c', 'd']
+    path = tmp_path / 'elements.txt'
+    path.write_text('\n'.join(elements) + '\n')
+
+    for source in (DynamicArray(elements), str(path)):
+        mode, frequency = hash_map_parallel.find_mode(source, workers, hash_function_2)
+        assert sorted(mode) == ['b', 'c']
+        assert frequency == 2
+
+
+def test_find_mode_of_nothing(tmp_path, workers):
+    path = tmp_path / 'empty.txt'
+    path.write_bytes(b'')
+
+    for source in (DynamicArray(), str(path)):
+        mode, frequency = hash_map_parallel.find_mode(source, workers, hash_function_2)
+        assert mode.length() == 0
+        assert frequency == 0
+
+
+def test_bad_arguments():
+    with pytest.raises(ValueError):
+        hash_map_parallel.count_frequencies(DynamicArray(['a']), workers=0)
@@ -0,0 +1,133 @@
+
+import random
+
+import pytest
+
+import hash_map_oa
+import hash_map_rh
+from a6_include import fnv1a_hash, hash_function_2
+
+
+def _slots(hash_map) -> list:
+    """
+    Return the key in each slot of the table, or None for an empty slot
+    """
+    return [hash_map._keys[index] if hash_map._states[index] else None for index in range(hash_map.get_capacity())]
+
+
+def _check_invariant(hash_map) -> None:
+    """
+    Assert that no slot is further from its home than one more than the slot before it, and that every key is found
+    """
+    capacity = hash_map.get_capacity()
+    distances = [(index - hash_map._hashes[index]) % capacity if hash_map._states[index] else -1
+                 for index in range(capacity)]
+
+    for index in range(capacity):
+        if distances[index] > 0:
+            assert distances[index] <= distances[index - 1] + 1
+
+    for key in hash_map.keys():
+        assert hash_map.contains_key(key)
+
+
+def test_backward_shift_deletion():
+    # Every key has home slot 0, so the keys fill slots 0, 1, 2, ... in the order they are put
+    hash_map = hash_map_rh.HashMap(11, lambda key: 0)
+    for key in 'abcd':
+        hash_map.put(key, key)
+    assert _slots(hash_map)[:5] == ['a', 'b', 'c', 'd', None]
+
+    hash_map.remove('b')
+    assert _slots(hash_map)[:5] == ['a', 'c', 'd', None, None]
+    assert hash_map.tombstone_count() == 0
+
+    hash_map.remove('a')
+    hash_map.remove('missing')
+    assert _slots(hash_map)[:4] == ['c', 'd', None, None]
+    assert [hash_map.get(key) for key in 'abcd'] == [None, None, 'c', 'd']
+
+
+def test_backward_shift_stops_at_a_key_in_its_home_slot():
+    homes = {'a': 3, 'b': 3, 'c': 5}
+    hash_map = hash_map_rh.HashMap(11, homes.get)
+    for key in 'abc':
+        hash_map.put(key, key)
+    assert _slots(hash_map)[3:7] == ['a', 'b', 'c', None]
+
+    # 'c' is already home, so only 'b' moves back
+    hash_map.remove('a')
+    assert _slots(hash_map)[3:7] == ['b', None, 'c', None]
+
+
+def test_backward_shift_wraps_around():
+    homes = {'a': 9, 'b': 9, 'c': 9, 'd': 0}
+    hash_map = hash_map_rh.HashMap(11, homes.get)
+    for key in 'abcd':
+        hash_map.put(key, key)
+    assert _slots(hash_map)[:2] == ['c', 'd']
+
+    hash_map.remove('a')
+    assert _slots(hash_map)[9:] == ['b', 'c']
+    assert _slots(hash_map)[:2] == ['d', None]
+    _check_invariant(hash_map)
+
+
+def test_matches_a_dict():
+    generator = random.Random(7)
+    hash_map = hash_map_rh.HashMap(5, hash_function_2)
+    expected = {}
+
+    for step in range(5000):
+        key = 'key' + str(generator.randrange(300))
+        if generator.random() < 0.4:
+            hash_map.remove(key)
+            expected.pop(key, None)
+        else:
+            hash_map.put(key, step)
+            expected[key] = step
+
+    assert dict(hash_map.items()) == expected
+    assert hash_map.get_size() == len(expected)
+    assert hash_map.table_load() <= 0.9
+    _check_invariant(hash_map)
+
+
+@pytest.mark.parametrize('map_class', [hash_map_oa.HashMap, hash_map_rh.HashMap])
+def test_same_api_as_open_addressing(tmp_path, map_class):
+    hash_map = map_class(11, fnv1a_hash, seed=3)
+    hash_map.put_many([('key' + str(index), index) for index in range(100)])
+    hash_map.remove_many(['key' + str(index) for index in range(0, 100, 2)])
+
+    assert list(hash_map.get_many(['key0', 'key1', 'missing'])) == [None, 1, None]
+    assert sorted(hash_map.keys()) == sorted('key' + str(index) for index in range(1, 100, 2))
+    assert sum(hash_map.values()) == sum(range(1, 100, 2))
+    assert dict(hash_map.items()) == dict(hash_map.get_keys_and_values())
+
+    stats = hash_map.stats()
+    assert (stats['size'], stats['capacity'], stats['tombstones']) == (50, hash_map.get_capacity(),
+                                                                      hash_map.tombstone_count())
+
+    path = str(tmp_path / 'map.snap')
+    hash_map.save(path)
+    loaded = map_class.load(path)
+    assert dict(loaded.items()) == dict(hash_map.items())
+    loaded.put('key0', 0)
+    assert loaded.get('key0') == 0
+
+
+def test_probe_distances():
+    hash_map = hash_map_rh.HashMap(11, lambda key: 0)
+    for key in 'abc':
+        hash_map.put(key, key)
+    assert hash_map.stats()['probe_distances'] == {0: 1, 1: 1, 2: 1}
+
+
+def test_load_rejects_other_kinds(tmp_path):
+    path = str(tmp_path / 'map.snap')
+    hash_map_oa.HashMap(11, hash_function_2).save(path)
+
+    with pytest.raises(ValueError):
+        hash_map_rh.HashMap.load(path)
+    with pytest.raises(ValueError):
+        hash_map_rh.HashMap(11, hash_function_2, max_load=1)
@@ -0,0 +1,85 @@
+
+import math
+
+import pytest
+
+import hash_map_sharded
+from a6_include import builtin_hash, hash_function_2
+
+
+@pytest.fixture(params=['sc', 'oa'])
+def sharded(request):
+    with hash_map_sharded.HashMap(11, hash_function_2, shards=3, kind=request.param) as hash_map:
+        yield hash_map
+
+
+def _contents(hash_map) -> dict:
+    return dict(hash_map.get_keys_and_values())
+
+
+def test_single_key_operations(sharded):
+    sharded.put('a', 1)
+    sharded.put('b', 2)
+    sharded.put('a', 3)
+
+    assert sharded.get('a') == 3
+    assert sharded.get('missing') is None
+    assert sharded.contains_key('b')
+    assert sharded.get_size() == 2
+
+    sharded.remove('b')
+    sharded.remove('missing')
+    assert not sharded.contains_key('b')
+    assert _contents(sharded) == {'a': 3}
+
+
+def test_batch_operations(sharded):
+    keys = ['key' + str(index) for index in range(500)]
+    sharded.put_many(zip(keys, range(500)))
+
+    assert sharded.get_size() == 500
+    assert list(sharded.get_many(keys + ['missing'])) == list(range(500)) + [None]
+
+    sharded.remove_many(keys[:200])
+    assert sharded.get_size() == 300
+    assert _contents(sharded) == dict(zip(keys[200:], range(200, 500)))
+    assert sharded.get_capacity() >= 300
+    assert 0 <= sharded.empty_buckets() < sharded.get_capacity()
+
+    sharded.clear()
+    assert sharded.get_size() == 0
+
+
+def test_map_still_works_after_a_shard_raises(sharded):
+    sharded.put_many([('a', 1), ('b', 2)])
+
+    # hash_function_2 can't hash an int, so every shard given one raises
+    with pytest.raises(TypeError):
+        sharded.put_many([(index, index) for index in range(30)])
+
+    assert sharded.get_size() == 2
+    assert sharded.get('a') == 1
+
+    with pytest.raises(TypeError):
+        sharded.get(7)
+
+    assert sharded.get_many(['a', 'b']).length() == 2
+    assert _contents(sharded) == {'a': 1, 'b': 2}
+
+
+def test_bad_arguments():
+    with pytest.raises(ValueError):
+        hash_map_sharded.HashMap(kind='rh')
+    with pytest.raises(ValueError):
+        hash_map_sharded.HashMap(shards=0)
+
+
+def test_shards_spread_their_keys_over_their_buckets():
+    # The shards pick buckets by the low bits of the same built-in hash the keys are routed by
+    with hash_map_sharded.HashMap(8192, builtin_hash, shards=4, capacity_policy='power_of_two') as hash_map:
+        hash_map.put_many([('key' + str(index), index) for index in range(3000)])
+        capacity = hash_map.get_capacity()
+
+        # Keys spread at random leave about capacity * e^-load buckets empty; routing by the low bits left many more
+        assert hash_map.get_size() == 3000
+        assert hash_map.empty_buckets() < 1.05 * capacity * math.exp(-3000 / capacity)
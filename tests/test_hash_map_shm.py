@@ -0,0 +1,108 @@
+
+import multiprocessing
+import os
+import subprocess
+import sys
+
+import pytest
+
+import hash_map_shm
+from a6_include import builtin_hash, fnv1a_hash, hash_function_2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def table():
+    hash_map = hash_map_shm.HashMap(64, hash_function_2)
+    yield hash_map
+    hash_map.close()
+    hash_map.unlink()
+
+
+def _read_key(name: str, key: str, results) -> None:
+    reader = hash_map_shm.HashMap.attach(name=name)
+    results.put(reader.get(key))
+    reader.close()
+
+
+def test_put_get_remove(table):
+    values = [None, True, False, 7, -2 ** 70, 1.5, 'text', b'bytes', ('a', [1, 2])]
+    for index, value in enumerate(values):
+        table.put('key' + str(index), value)
+
+    assert table.get_size() == len(values)
+    for index, value in enumerate(values):
+        assert table.get('key' + str(index)) == value
+
+    table.put('key0', 'replaced')
+    table.remove('key1')
+    table.remove('missing')
+
+    assert table.get('key0') == 'replaced'
+    assert not table.contains_key('key1')
+    assert table.get('missing') is None
+    assert table.get_size() == len(values) - 1
+    assert table.tombstone_count() == 1
+    assert dict(table.get_keys_and_values())['key2'] is False
+
+    table.clear()
+    assert table.get_size() == 0
+    assert table.empty_buckets() == table.get_capacity()
+
+
+def test_full_table_raises(table):
+    with pytest.raises(hash_map_shm.SharedTableFull):
+        for index in range(table.get_capacity()):
+            table.put('key' + str(index), index)
+
+    assert table.table_load() <= hash_map_shm.MAX_LOAD
+
+
+def test_builtin_hash_is_rejected():
+    with pytest.raises(ValueError):
+        hash_map_shm.HashMap(16, builtin_hash)
+
+
+def test_attached_table_is_read_only(tmp_path):
+    path = str(tmp_path / 'table.bin')
+    writer = hash_map_shm.HashMap(16, fnv1a_hash, seed=5, path=path)
+    writer.put('a', 1)
+
+    with hash_map_shm.HashMap.attach(path=path) as reader:
+        assert reader.get('a') == 1
+        with pytest.raises(ValueError):
+            reader.put('b', 2)
+
+    writer.close()
+
+
+def test_block_survives_a_reader_process_exiting(table):
+    table.put('a', 1)
+    code = ('import hash_map_shm\n'
+            'reader = hash_map_shm.HashMap.attach(name=%r)\n'
+            'print(reader.get("a"))\n'
+            'reader.close()\n' % table.name)
+
+    reader = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert reader.stdout.strip() == '1'
+    assert 'leaked shared_memory' not in reader.stderr
+
+    # The block must still exist for the writer and for new readers
+    with hash_map_shm.HashMap.attach(name=table.name) as again:
+        assert again.get('a') == 1
+
+
+@pytest.mark.parametrize('method', ['fork', 'spawn'])
+def test_block_survives_a_multiprocessing_reader(table, method):
+    table.put('a', 1)
+    context = multiprocessing.get_context(method)
+    results = context.Queue()
+
+    reader = context.Process(target=_read_key, args=(table.name, 'a', results))
+    reader.start()
+    assert results.get(timeout=60) == 1
+    reader.join()
+
+    with hash_map_shm.HashMap.attach(name=table.name) as again:
+        assert again.get('a') == 1
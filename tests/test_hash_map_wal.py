@@ -0,0 +1,152 @@
+
+import os
+
+import pytest
+
+import hash_map_wal
+from a6_include import fnv1a_hash, hash_function_2, siphash_hash
+
+
+@pytest.fixture(params=['sc', 'oa'])
+def kind(request):
+    return request.param
+
+
+def test_changes_survive_reopening(tmp_path, kind):
+    path = str(tmp_path / 'map')
+    with hash_map_wal.HashMap(path, 11, hash_function_2, kind=kind, sync_interval=0) as hash_map:
+        for index in range(100):
+            hash_map.put('key' + str(index), index)
+        hash_map.remove('key0')
+        hash_map.put('key1', 'one')
+
+    with hash_map_wal.HashMap(path, kind=kind) as hash_map:
+        assert hash_map.get_size() == 99
+        assert hash_map.get('key0') is None
+        assert hash_map.get('key1') == 'one'
+        assert hash_map.get('key99') == 99
+
+        hash_map.clear()
+
+    with hash_map_wal.HashMap(path, kind=kind) as hash_map:
+        assert hash_map.get_size() == 0
+
+
+def test_batches_survive_reopening(tmp_path, kind):
+    path = str(tmp_path / 'map')
+    with hash_map_wal.HashMap(path, 11, hash_function_2, kind=kind, sync_interval=None) as hash_map:
+        hash_map.put_many([('key' + str(index), index) for index in range(50)])
+        hash_map.remove_many(['key' + str(index) for index in range(0, 50, 2)])
+
+    with hash_map_wal.HashMap(path, kind=kind) as hash_map:
+        assert hash_map.get_size() == 25
+        assert list(hash_map.get_many(['key0', 'key1', 'key49'])) == [None, 1, 49]
+
+
+@pytest.mark.parametrize('function, options', [(fnv1a_hash, {'seed': 5}),
+                                               (hash_function_2, {'capacity_policy': 'power_of_two'}),
+                                               (siphash_hash, {'seed': 9, 'capacity_policy': 'power_of_two'})])
+def test_reopen_with_the_same_options(tmp_path, kind, function, options):
+    path = str(tmp_path / 'map')
+    hash_map = hash_map_wal.HashMap(path, 11, function, kind=kind, **options)
+    hash_map.put_many([('key' + str(index), index) for index in range(100)])
+    hash_map.compact()
+    hash_map.put('after', 'compaction')
+    hash_map.close()
+
+    with hash_map_wal.HashMap(path, 11, function, kind=kind, **options) as hash_map:
+        assert hash_map.get_size() == 101
+        assert hash_map.get('key42') == 42
+        assert hash_map.get('after') == 'compaction'
+
+
+def test_reopen_with_other_options_raises(tmp_path, kind):
+    path = str(tmp_path / 'map')
+    hash_map_wal.HashMap(path, 11, fnv1a_hash, kind=kind, seed=5).close()
+
+    with pytest.raises(ValueError):
+        hash_map_wal.HashMap(path, 11, fnv1a_hash, kind=kind, seed=6)
+    with pytest.raises(ValueError):
+        hash_map_wal.HashMap(path, 11, fnv1a_hash, kind=kind, seed=5, capacity_policy='power_of_two')
+
+
+def test_torn_record_is_discarded(tmp_path, kind):
+    path = str(tmp_path / 'map')
+    with hash_map_wal.HashMap(path, 11, hash_function_2, kind=kind, sync_interval=0) as hash_map:
+        hash_map.put('kept', 1)
+        hash_map.put('torn', 2)
+
+    with open(path + '.log', 'r+b') as log:
+        log.truncate(os.path.getsize(path + '.log') - 1)
+
+    with hash_map_wal.HashMap(path, kind=kind, sync_interval=0) as hash_map:
+        assert hash_map.get('kept') == 1
+        assert not hash_map.contains_key('torn')
+        hash_map.put('next', 3)
+
+    with hash_map_wal.HashMap(path, kind=kind) as hash_map:
+        assert hash_map.get('next') == 3
+
+
+def test_bad_arguments(tmp_path):
+    path = str(tmp_path / 'map')
+    with pytest.raises(ValueError):
+        hash_map_wal.HashMap(path, kind='tree')
+    with pytest.raises(ValueError):
+        hash_map_wal.HashMap(path, sync_interval=-1)
+    with pytest.raises(ValueError):
+        hash_map_wal.HashMap(path, group_size=0)
+
+
+class _FailingLog:
+    """
+    Log file stand-in whose next write puts half of its bytes in the file and then fails, as a full disk would
+    """
+
+    def __init__(self, log) -> None:
+        self.log = log
+        self.failures = 1
+
+    def write(self, data) -> int:
+        if self.failures:
+            self.failures -= 1
+            self.log.write(data[:len(data) // 2])
+            raise OSError('no space left on device')
+        return self.log.write(data)
+
+    def __getattr__(self, name: str):
+        return getattr(self.log, name)
+
+
+def test_unpicklable_changes_are_not_applied(tmp_path, kind):
+    path = str(tmp_path / 'map')
+    with hash_map_wal.HashMap(path, 11, hash_function_2, kind=kind, sync_interval=0) as hash_map:
+        hash_map.put('kept', 1)
+
+        with pytest.raises(Exception):
+            hash_map.put('lambda', lambda: None)
+        with pytest.raises(Exception):
+            hash_map.put_many([('a', 1), ('lambda', lambda: None)])
+
+        assert hash_map.get_size() == 1
+        assert not hash_map.contains_key('a')
+
+    with hash_map_wal.HashMap(path, kind=kind) as hash_map:
+        assert list(hash_map.get_keys_and_values()) == [('kept', 1)]
+
+
+def test_failed_write_is_retried(tmp_path, kind):
+    path = str(tmp_path / 'map')
+    with hash_map_wal.HashMap(path, 11, hash_function_2, kind=kind, sync_interval=0) as hash_map:
+        hash_map.put('first', 1)
+        hash_map._log = _FailingLog(hash_map._log)
+
+        with pytest.raises(OSError):
+            hash_map.put_many([('second', 2), ('third', 3)])
+
+        # The map holds the batch and the log still has it pending, so the next write puts it in the log whole
+        assert hash_map.get('third') == 3
+        hash_map.put('fourth', 4)
+
+    with hash_map_wal.HashMap(path, kind=kind) as hash_map:
+        assert sorted(hash_map.get_keys_and_values()) == [('first', 1), ('fourth', 4), ('second', 2), ('third', 3)]
@@ -0,0 +1,168 @@
+
+import random
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import hash_function_1, hash_function_2
+
+
+MAPS = {'sc': hash_map_sc.HashMap, 'oa': hash_map_oa.HashMap}
+
+
+def _new_map(kind: str, **options):
+    return MAPS[kind](11, hash_function_1, incremental=True, migrate_step=1, **options)
+
+
+def _fill_until_migrating(hash_map, contents: dict) -> None:
+    """
+    Puts keys until a resize has begun a migration, recording them in contents
+    """
+    index = len(contents)
+    while hash_map._old_buckets is None:
+        key = 'key' + str(index)
+        hash_map.put(key, index)
+        contents[key] = index
+        index += 1
+
+
+def _assert_matches(hash_map, contents: dict) -> None:
+    assert hash_map.get_size() == len(contents)
+    for key, value in contents.items():
+        assert hash_map.get(key) == value
+    assert sorted(hash_map.get_keys_and_values()) == sorted(contents.items())
+
+
+@pytest.mark.parametrize('kind', MAPS)
+def test_resize_migrates_a_bucket_per_operation(kind):
+    hash_map = _new_map(kind)
+    contents = {}
+    _fill_until_migrating(hash_map, contents)
+
+    old_capacity = hash_map._old_capacity
+    assert hash_map.get_capacity() > old_capacity
+    assert hash_map.stats()['migrating']
+
+    # Each put, get and remove moves migrate_step old buckets across
+    index = hash_map._migrate_index
+    hash_map.get('key0')
+    assert hash_map._migrate_index == index + 1
+    hash_map.put('key0', 0)
+    hash_map.remove('missing')
+    assert hash_map._migrate_index == index + 3 or hash_map._old_buckets is None
+
+    while hash_map._old_buckets is not None:
+        hash_map.get('missing')
+
+    assert not hash_map.stats()['migrating']
+    _assert_matches(hash_map, contents)
+
+
+@pytest.mark.parametrize('kind', MAPS)
+def test_puts_and_removes_during_a_migration(kind):
+    hash_map = _new_map(kind)
+    contents = {}
+    _fill_until_migrating(hash_map, contents)
+    index = len(contents)
+
+    # Update, remove and re-add keys on both sides of the migration point, checking the map after each step
+    steps = 0
+    while hash_map._old_buckets is not None:
+        if steps % 3 == 0:
+            key = 'key' + str(steps % index)
+            hash_map.put(key, -steps)
+            contents[key] = -steps
+        elif steps % 3 == 1:
+            key = 'key' + str((steps * 7) % index)
+            hash_map.remove(key)
+            contents.pop(key, None)
+            assert not hash_map.contains_key(key)
+        else:
+            key = 'new' + str(steps)
+            hash_map.put(key, steps)
+            contents[key] = steps
+        assert hash_map.get_size() == len(contents)
+        steps += 1
+
+    assert steps > 1
+    _assert_matches(hash_map, contents)
+
+
+@pytest.mark.parametrize('kind', MAPS)
+@pytest.mark.parametrize('function', [hash_function_1, hash_function_2])
+def test_random_operations_match_a_dict(kind, function):
+    rng = random.Random(5)
+    hash_map = MAPS[kind](7, function, incremental=True, migrate_step=2)
+    contents = {}
+    migrations = 0
+
+    for step in range(3000):
+        key = 'k' + str(rng.randrange(400))
+        operation = rng.random()
+        if operation < 0.6:
+            hash_map.put(key, step)
+            contents[key] = step
+        elif operation < 0.85:
+            hash_map.remove(key)
+            contents.pop(key, None)
+        else:
+            assert hash_map.get(key) == contents.get(key)
+
+        if hash_map._old_buckets is not None:
+            migrations += 1
+        assert hash_map.get_size() == len(contents)
+
+    assert migrations > 0
+    _assert_matches(hash_map, contents)
+
+
+@pytest.mark.parametrize('kind', MAPS)
+def test_batch_operations_finish_the_migration(kind):
+    hash_map = _new_map(kind)
+    contents = {}
+    _fill_until_migrating(hash_map, contents)
+
+    assert list(hash_map.get_many(['key0', 'key1', 'missing'])) == [0, 1, None]
+    assert hash_map._old_buckets is None
+
+    _fill_until_migrating(hash_map, contents)
+    hash_map.remove_many(['key0', 'key2'])
+    del contents['key0'], contents['key2']
+    assert hash_map._old_buckets is None
+
+    _fill_until_migrating(hash_map, contents)
+    hash_map.put_many([('key1', 'one'), ('extra', 'x')])
+    contents.update({'key1': 'one', 'extra': 'x'})
+
+    _assert_matches(hash_map, contents)
+
+
+@pytest.mark.parametrize('kind', MAPS)
+def test_clear_abandons_the_migration(kind):
+    hash_map = _new_map(kind)
+    _fill_until_migrating(hash_map, {})
+
+    capacity = hash_map.get_capacity()
+    hash_map.clear()
+
+    assert hash_map._old_buckets is None
+    assert hash_map.get_size() == 0
+    assert hash_map.get_capacity() == capacity
+    assert hash_map.get('key0') is None
+
+    hash_map.put('key0', 'zero')
+    assert hash_map.get('key0') == 'zero'
+
+
+@pytest.mark.parametrize('kind', MAPS)
+def test_resize_during_a_migration_finishes_it_first(kind):
+    hash_map = _new_map(kind)
+    contents = {}
+    _fill_until_migrating(hash_map, contents)
+
+    hash_map.resize_table(hash_map.get_capacity() * 4)
+
+    # The old migration was completed, then a new one started from the table it produced
+    assert hash_map._migrate_index == 0
+    _assert_matches(hash_map, contents)
@@ -0,0 +1,141 @@
+
+import random
+from collections import Counter
+
+import pytest
+
+import hash_map_cache
+import hash_map_concurrent
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+
+INCREMENTAL = {'incremental': True, 'migrate_step': 1}
+
+
+def _stream(seed: int, length: int = 5000) -> list:
+    """
+    Return a skewed stream of keys, where a few keys are much more common than the rest
+    """
+    generator = random.Random(seed)
+    return ['key' + str(int(generator.paretovariate(1.2))) for _ in range(length)]
+
+
+@pytest.mark.parametrize('map_class', [hash_map_sc.HashMap, hash_map_concurrent.HashMap])
+def test_increment(map_class):
+    hash_map = map_class(5, hash_function_2)
+
+    assert hash_map.increment('a') == 1
+    assert hash_map.increment('a', 4) == 5
+    assert hash_map.increment_many(['a', 'b', 'b', 'c']) == 6
+    assert hash_map.increment_many([]) == 0
+    assert [hash_map.get(key) for key in 'abc'] == [6, 2, 1]
+
+
+def test_cache_increment():
+    cache = hash_map_cache.HashMap(2, hash_function_2)
+
+    assert cache.increment('a') == 1
+    assert cache.increment_many(['b', 'a', 'a']) == 3
+    cache.put('c', 1)
+
+    # 'a' was used last, so 'b' is the one evicted
+    assert cache.get('b') is None
+    assert cache.get('a') == 3
+
+
+def test_find_mode():
+    mode, frequency = hash_map_sc.find_mode(DynamicArray(['a', 'b', 'b', 'c', 'c']))
+    assert sorted(mode) == ['b', 'c']
+    assert frequency == 2
+
+
+@pytest.mark.parametrize('options', [{}, INCREMENTAL])
+def test_mode_finder(options):
+    stream = _stream(1)
+    counts = Counter(stream)
+    highest = max(counts.values())
+
+    finder = hash_map_sc.ModeFinder(hash_function_2, chunk_size=100, **options)
+    finder.update(iter(stream[:2500]))
+    finder.update(key for key in stream[2500:])
+
+    mode, frequency = finder.mode()
+    assert frequency == highest
+    assert sorted(mode) == sorted(key for key, count in counts.items() if count == highest)
+    assert finder.frequency('key1') == counts['key1']
+    assert finder.frequency('missing') == 0
+    assert finder.seen() == len(stream)
+
+
+def test_mode_finder_during_a_migration():
+    finder = hash_map_sc.ModeFinder(hash_function_2, **INCREMENTAL)
+    finder.update(['a', 'b', 'b', 'c'])
+
+    # With one bucket moved per operation, the counts stay spread over the old and new buckets until mode()
+    finder._counts.resize_table(101)
+    assert finder._counts._old_buckets is not None
+    mode, frequency = finder.mode()
+    assert (list(mode), frequency) == (['b'], 2)
+
+
+def test_heavy_hitters_during_a_migration():
+    hitters = hash_map_sc.HeavyHitters(3, hash_function_2, **INCREMENTAL)
+    hitters.update(['a', 'a', 'a', 'b', 'b', 'c'])
+    hitters._counts.resize_table(101)
+    assert hitters._counts._old_buckets is not None
+    mode, highest = hitters.mode()
+    assert (list(mode), highest) == (['a'], 3)
+
+    hitters._counts.resize_table(211)
+    hitters.update(['d'])
+    assert sorted(hitters.top()) == [('a', 2), ('b', 1)]
+    assert hitters._counts.get_size() == 2
+
+
+@pytest.mark.parametrize('function, options', [(hash_function_2, {}), (hash_function_2, INCREMENTAL),
+                                               (hash_function_1, INCREMENTAL), (lambda key: 0, {})])
+def test_heavy_hitters(function, options):
+    stream = _stream(2, 20000)
+    counts = Counter(stream)
+    k = 20
+
+    hitters = hash_map_sc.HeavyHitters(k, function, chunk_size=500, **options)
+    hitters.update(stream)
+    estimates = dict(hitters.top())
+    error = hitters.error()
+
+    assert hitters.seen() == len(stream)
+    assert error <= len(stream) // (k + 1)
+    assert len(estimates) <= k
+    assert hitters._counts.get_size() == len(estimates)
+
+    for key, count in counts.items():
+        if count > error:
+            assert counts[key] - error <= estimates[key] <= counts[key]
+
+    mode, highest = hitters.mode()
+    assert highest == max(estimates.values())
+    assert list(mode) == [key for key, estimate in estimates.items() if estimate == highest]
+    assert hitters.top(1)[0][1] == highest
+
+
+def test_heavy_hitters_empty_their_buckets():
+    # Every key lands in the same bucket, which is treeified once it holds more than TREEIFY_THRESHOLD counters
+    hitters = hash_map_sc.HeavyHitters(12, lambda key: 0, treeify=True)
+    hitters.update('key' + str(index) for index in range(12))
+    assert hitters._counts.stats()['sorted_buckets'] == 1
+
+    hitters.update(['other'])
+    stats = hitters._counts.stats()
+    assert stats['size'] == 0
+    assert stats['sorted_buckets'] == 0
+    assert stats['empty_buckets'] == stats['capacity']
+
+
+def test_bad_arguments():
+    with pytest.raises(ValueError):
+        hash_map_sc.ModeFinder(chunk_size=0)
+    with pytest.raises(ValueError):
+        hash_map_sc.HeavyHitters(0)
+    with pytest.raises(ValueError):
+        hash_map_sc.HeavyHitters(5, chunk_size=0)
@@ -0,0 +1,104 @@
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import HashEntry, fnv1a_hash, hash_function_1, hash_function_2
+
+
+MAPS = {'sc': hash_map_sc.HashMap, 'oa': hash_map_oa.HashMap}
+
+
+def _colliding(key) -> int:
+    """
+    Hash function that gives every key the same full hash
+    """
+    return 0
+
+
+@pytest.mark.parametrize('kind', MAPS)
+def test_capacity_is_a_power_of_two(kind):
+    hash_map = MAPS[kind](20, hash_function_1, capacity_policy='power_of_two')
+    assert hash_map.get_capacity() == 32
+
+    for index in range(500):
+        hash_map.put('key' + str(index), index)
+        capacity = hash_map.get_capacity()
+        assert capacity & (capacity - 1) == 0
+
+    hash_map.resize_table(3000)
+    assert hash_map.get_capacity() == 4096
+    for index in range(500):
+        assert hash_map.get('key' + str(index)) == index
+
+
+@pytest.mark.parametrize('kind', MAPS)
+def test_unknown_capacity_policy(kind):
+    with pytest.raises(ValueError):
+        MAPS[kind](11, hash_function_1, capacity_policy='fibonacci')
+
+
+@pytest.mark.parametrize('kind', MAPS)
+def test_poorly_mixed_hashes_are_mixed(kind):
+    hash_map = MAPS[kind](16, hash_function_1, capacity_policy='power_of_two')
+    assert hash_map._hash_function is not hash_function_1
+
+    # Well mixed hash functions, and every function under the prime policy, are used as given
+    assert hash_map_oa.HashMap(16, fnv1a_hash, capacity_policy='power_of_two')._hash_function is fnv1a_hash
+    assert MAPS[kind](16, hash_function_1)._hash_function is hash_function_1
+
+
+@pytest.mark.parametrize('capacity', [1, 2, 4, 8, 16, 64, 256])
+def test_triangular_probing_reaches_every_bucket(capacity):
+    hash_map = hash_map_oa.HashMap(capacity, _colliding, capacity_policy='power_of_two')
+    assert hash_map.get_capacity() == capacity
+    key_hash = hash_map._hash_function('target')
+
+    # Whichever bucket holds the key, a lookup through an otherwise full table must reach it
+    for target in range(capacity):
+        table = hash_map._buckets.data()
+        for index in range(capacity):
+            table[index] = HashEntry('other' + str(index), index, key_hash)
+        table[target] = HashEntry('target', 'found', key_hash)
+        hash_map._size = capacity
+
+        assert hash_map.get('target') == 'found'
+        assert hash_map.contains_key('target')
+
+
+@pytest.mark.parametrize('capacity', [1, 2, 8, 64])
+@pytest.mark.parametrize('tombstones', [False, True])
+def test_missing_key_probe_terminates_in_a_full_table(capacity, tombstones):
+    hash_map = hash_map_oa.HashMap(capacity, _colliding, capacity_policy='power_of_two')
+    key_hash = hash_map._hash_function('missing')
+
+    table = hash_map._buckets.data()
+    for index in range(capacity):
+        table[index] = HashEntry('other' + str(index), index, key_hash)
+        table[index].is_tombstone = tombstones
+    hash_map._size = 0 if tombstones else capacity
+    hash_map._tombstones = capacity if tombstones else 0
+
+    assert hash_map.get('missing') is None
+    assert not hash_map.contains_key('missing')
+    hash_map.remove('missing')
+
+
+@pytest.mark.parametrize('function', [_colliding, hash_function_1, hash_function_2])
+def test_colliding_keys_fill_half_of_the_table(function):
+    hash_map = hash_map_oa.HashMap(64, function, capacity_policy='power_of_two')
+
+    # Every key collides, so each one probes further along the triangular sequence than the last
+    keys = ['ab', 'ba'] if function is not _colliding else ['key' + str(index) for index in range(31)]
+    for key in keys:
+        hash_map.put(key, key.upper())
+
+    assert hash_map.get_capacity() == 64
+    for key in keys:
+        assert hash_map.get(key) == key.upper()
+    assert hash_map.get('missing') is None
+
+    for key in keys[::2]:
+        hash_map.remove(key)
+    for key in keys:
+        assert hash_map.contains_key(key) == (key not in keys[::2])
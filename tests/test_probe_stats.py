@@ -0,0 +1,81 @@
+
+import pytest
+
+import hash_map_oa
+
+
+class CountedKey(str):
+    """
+    String key that counts how often it is compared for equality
+    """
+
+    comparisons = 0
+
+    def __eq__(self, other) -> bool:
+        CountedKey.comparisons += 1
+        return str.__eq__(self, other)
+
+    __hash__ = str.__hash__
+
+
+def _colliding_map(**options) -> hash_map_oa.HashMap:
+    # Every key hashes to bucket 0, so each probe sequence runs through the keys in the order they were put
+    return hash_map_oa.HashMap(11, lambda key: 0, stats=True, **options)
+
+
+def test_probe_lengths():
+    hash_map = _colliding_map()
+    for key in 'abc':
+        hash_map.put(key, key)
+
+    hash_map.get('c')
+    hash_map.get('missing')
+    hash_map.contains_key('a')
+    hash_map.remove('b')
+    hash_map.get('c')
+
+    stats = hash_map.stats()
+    assert stats['probes']['put'] == {1: 1, 2: 1, 3: 1}
+    assert stats['probes']['get'] == {1: 1, 3: 2, 4: 1}
+    assert stats['probes']['remove'] == {2: 1}
+
+    # Only the last get passed the tombstone left by the remove
+    assert stats['tombstones_per_probe'] == 1 / 8
+
+
+def test_batch_operations_are_counted():
+    hash_map = _colliding_map()
+    hash_map.put_many([('a', 1), ('b', 2)])
+    hash_map.get_many(['b', 'missing'])
+    hash_map.remove_many(['a'])
+
+    stats = hash_map.stats()
+    assert stats['probes'] == {'get': {2: 1, 3: 1}, 'put': {1: 1, 2: 1}, 'remove': {1: 1}}
+
+
+def test_old_table_probes_are_counted():
+    hash_map = _colliding_map(incremental=True, migrate_step=1)
+    for key in 'abc':
+        hash_map.put(key, key)
+    hash_map.resize_table(23)
+
+    # get moves another bucket first, so 'a' is in the new table while 'c' is still third in the old one
+    hash_map.get('c')
+    assert hash_map.stats()['migrating']
+    assert hash_map.stats()['probes']['get'] == {2 + 3: 1}
+
+
+@pytest.mark.parametrize('operation', ['get', 'put', 'remove', 'contains_key'])
+def test_stats_do_not_probe_twice(operation):
+    comparisons = []
+    for stats in (False, True):
+        hash_map = hash_map_oa.HashMap(11, lambda key: 0, stats=stats)
+        for key in 'abcd':
+            hash_map.put(CountedKey(key), key)
+
+        CountedKey.comparisons = 0
+        arguments = (CountedKey('d'), 1) if operation == 'put' else (CountedKey('d'),)
+        getattr(hash_map, operation)(*arguments)
+        comparisons.append(CountedKey.comparisons)
+
+    assert comparisons[0] == comparisons[1]
@@ -0,0 +1,112 @@
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import hash_map_cache
+import hash_map_oa
+import hash_map_sc
+from a6_include import builtin_hash, fnv1a_hash, hash_function_2, mixed_hash, seeded_hash, siphash_hash
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MAPS = [hash_map_sc.HashMap, hash_map_oa.HashMap]
+
+
+@pytest.mark.parametrize('map_class', MAPS)
+@pytest.mark.parametrize('function, options', [(hash_function_2, {}), (siphash_hash, {'seed': 7}),
+                                               (fnv1a_hash, {'capacity_policy': 'power_of_two'})])
+def test_save_and_load(tmp_path, map_class, function, options):
+    path = str(tmp_path / 'map.snap')
+    hash_map = map_class(11, function, **options)
+    for index in range(200):
+        hash_map.put('key' + str(index), index)
+    for index in range(0, 200, 3):
+        hash_map.remove('key' + str(index))
+
+    hash_map.save(path)
+    loaded = map_class.load(path)
+
+    assert loaded.get_size() == hash_map.get_size()
+    assert loaded.get_capacity() == hash_map.get_capacity()
+    for index in range(200):
+        assert loaded.get('key' + str(index)) == hash_map.get('key' + str(index))
+
+    loaded.put('new', 1)
+    assert loaded.get('new') == 1
+
+
+def test_cache_save_and_load(tmp_path):
+    path = str(tmp_path / 'cache.snap')
+    cache = hash_map_cache.HashMap(3, fnv1a_hash, seed=3)
+    for key in 'abcd':
+        cache.put(key, key.upper())
+
+    cache.save(path)
+    loaded = hash_map_cache.HashMap.load(path, 3)
+
+    assert [loaded.get(key) for key in 'abcd'] == [None, 'B', 'C', 'D']
+
+
+def test_load_rejects_other_kind(tmp_path):
+    path = str(tmp_path / 'map.snap')
+    hash_map_oa.HashMap(11, hash_function_2).save(path)
+
+    with pytest.raises(ValueError):
+        hash_map_sc.HashMap.load(path)
+
+
+@pytest.mark.parametrize('map_class', MAPS)
+@pytest.mark.parametrize('function', [builtin_hash, seeded_hash(builtin_hash, 5), mixed_hash(builtin_hash)])
+def test_builtin_hash_cannot_be_saved(tmp_path, map_class, function):
+    hash_map = map_class(11, function)
+    hash_map.put('key', 1)
+
+    with pytest.raises(ValueError):
+        hash_map.save(str(tmp_path / 'map.snap'))
+
+
+def test_builtin_hash_cache_cannot_be_saved(tmp_path):
+    with pytest.raises(ValueError):
+        hash_map_cache.HashMap(3, builtin_hash).save(str(tmp_path / 'cache.snap'))
+
+
+@pytest.mark.parametrize('kind', ['sc', 'oa'])
+@pytest.mark.parametrize('function', ['fnv1a_hash', 'siphash_hash'])
+def test_load_in_a_process_with_another_hash_seed(tmp_path, kind, function):
+    path = str(tmp_path / 'map.snap')
+    save = ('import hash_map_%s, a6_include\n'
+            'hash_map = hash_map_%s.HashMap(11, a6_include.%s, seed=42)\n'
+            'for index in range(500):\n'
+            '    hash_map.put("key" + str(index), index)\n'
+            'hash_map.save(%r)\n' % (kind, kind, function, path))
+    load = ('import hash_map_%s\n'
+            'hash_map = hash_map_%s.HashMap.load(%r)\n'
+            'for index in range(500):\n'
+            '    hash_map.put("key" + str(index), hash_map.get("key" + str(index)) + 1)\n'
+            'print(hash_map.get_size(), sum(value for key, value in hash_map.get_keys_and_values()))\n'
+            % (kind, kind, path))
+
+    for hash_seed, code in (('1', save), ('2', load)):
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True,
+                                env=dict(os.environ, PYTHONHASHSEED=hash_seed))
+
+    # Every key is found again, rather than put a second time into another bucket
+    assert result.stdout.split() == ['500', str(sum(range(1, 501)))]
+
+
+@pytest.mark.parametrize('map_class', MAPS)
+def test_load_with_saved_options(tmp_path, map_class):
+    path = str(tmp_path / 'map.snap')
+    hash_map = map_class(11, fnv1a_hash, seed=5, capacity_policy='power_of_two')
+    hash_map.put('key', 1)
+    hash_map.save(path)
+
+    loaded = map_class.load(path, function=fnv1a_hash, seed=5, capacity_policy='power_of_two', stats=True)
+    assert loaded.get('key') == 1
+
+    for options in ({'seed': 6}, {'capacity_policy': 'prime'}, {'function': siphash_hash}):
+        with pytest.raises(ValueError):
+            map_class.load(path, **options)
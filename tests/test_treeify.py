@@ -0,0 +1,93 @@
+
+import pytest
+
+import hash_map_concurrent
+import hash_map_sc
+from a6_include import LinkedList, SortedBucket
+
+
+def _colliding(key) -> int:
+    """
+    Hash function that gives every key the same full hash
+    """
+    return 0
+
+
+def _bucket(hash_map):
+    return hash_map._buckets[0]
+
+
+def test_treeify_is_off_by_default():
+    hash_map = hash_map_sc.HashMap(5, _colliding)
+    for index in range(20):
+        hash_map.put('key' + str(index), index)
+
+    assert isinstance(_bucket(hash_map), LinkedList)
+    assert hash_map.stats()['sorted_buckets'] == 0
+
+
+def test_thresholds():
+    hash_map = hash_map_sc.HashMap(50, _colliding, treeify=True)
+    for index in range(hash_map_sc.TREEIFY_THRESHOLD):
+        hash_map.put('key' + str(index), index)
+    assert isinstance(_bucket(hash_map), LinkedList)
+
+    hash_map.put('key8', 8)
+    assert type(_bucket(hash_map)) is SortedBucket
+
+    # The bucket only goes back to a chain once a removal leaves it with UNTREEIFY_THRESHOLD nodes
+    hash_map.remove('key0')
+    hash_map.remove('key1')
+    assert type(_bucket(hash_map)) is SortedBucket
+    assert _bucket(hash_map).length() == hash_map_sc.UNTREEIFY_THRESHOLD + 1
+
+    hash_map.remove('key2')
+    assert isinstance(_bucket(hash_map), LinkedList)
+    assert sorted(key for key, value in hash_map.get_keys_and_values()) == ['key' + str(index) for index in range(3, 9)]
+
+
+def test_colliding_full_hashes():
+    hash_map = hash_map_sc.HashMap(50, _colliding, treeify=True)
+    keys = ['key' + str(index) for index in range(100)]
+    for index, key in enumerate(keys):
+        hash_map.put(key, index)
+    hash_map.put('key50', 'updated')
+    hash_map.remove('key10')
+
+    assert hash_map.stats()['sorted_buckets'] == 1
+    assert hash_map.get_size() == 99
+    assert hash_map.get('key50') == 'updated'
+    assert hash_map.get('key10') is None
+    assert all(hash_map.contains_key(key) for key in keys if key != 'key10')
+    assert list(hash_map.get_many(['key99', 'missing'])) == [99, None]
+    assert hash_map.increment('key0') == 1
+
+
+def test_batches_and_resizes_treeify():
+    hash_map = hash_map_sc.HashMap(3, _colliding, treeify=True, incremental=True, migrate_step=1)
+    hash_map.put_many([('key' + str(index), index) for index in range(30)])
+    for index in range(30, 60):
+        hash_map.put('key' + str(index), index)
+
+    assert hash_map.stats()['sorted_buckets'] == 1
+    assert dict(hash_map.get_keys_and_values()) == {'key' + str(index): index for index in range(60)}
+
+
+@pytest.mark.parametrize('treeify', [False, True])
+def test_keys_that_cannot_be_compared(treeify):
+    # Ints and strings can share a bucket, but can't be sorted together
+    hash_map = hash_map_sc.HashMap(50, _colliding, treeify=treeify)
+    keys = [index if index % 2 else str(index) for index in range(20)]
+    for key in keys:
+        hash_map.put(key, key)
+
+    assert isinstance(_bucket(hash_map), LinkedList)
+    assert [hash_map.get(key) for key in keys] == keys
+
+
+def test_concurrent_map_never_treeifies():
+    hash_map = hash_map_concurrent.HashMap(5, _colliding)
+    for index in range(20):
+        hash_map.put('key' + str(index), index)
+
+    assert hash_map.stats()['sorted_buckets'] == 0